@@ -0,0 +1,184 @@
+"""Company-name search benchmark — FTS5 index vs. the legacy ILIKE scan.
+
+Builds a throwaway SQLite file with N synthetic customers (one order
+each), then times company resolution and the full active-order query
+both ways.
+
+Run:  uv run python -m benchmarks.bench_company_search --customers 100000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import Engine, Select, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from ops_agent.models.base import Base, get_engine
+from ops_agent.models.company_index import (
+    company_user_ids,
+    create_company_index,
+)
+from ops_agent.models.order import Order
+from ops_agent.models.user import User
+from ops_agent.repositories.order_repo import SqlOrderRepository
+
+SYLLABLES = ["ka", "lor", "ven", "tri", "sol", "mar", "dex", "qui", "bo", "ran"]
+TRADES = ["Construction", "Builders", "Roofing", "Demolition", "Paving"]
+# Planted once each among the synthetic customers
+QUERIES = ["Chase Construction", "Omaha Builders", "Reno Paving"]
+BATCH = 10_000
+
+
+# ── Legacy query (pre-index) ─────────────────────────────────
+
+
+def _legacy_user_ids(company_name: str) -> Select[tuple[str]]:
+    like_pattern = f"%{company_name.replace(' ', '_')}%"
+    return select(User.id).where(User.username.ilike(like_pattern))
+
+
+def _legacy_active_orders(
+    session: Session, company_name: str
+) -> list[Order]:
+    like_pattern = f"%{company_name.replace(' ', '_')}%"
+    stmt = (
+        select(Order)
+        .join(User)
+        .options(joinedload(Order.user), joinedload(Order.product))
+        .where(
+            User.username.ilike(like_pattern),
+            Order.status == "Active",
+        )
+    )
+    return list(session.scalars(stmt).unique().all())
+
+
+# ── Setup ────────────────────────────────────────────────────
+
+
+def _build(engine: Engine, customers: int) -> None:
+    rng = random.Random(42)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        create_company_index(conn)
+    for start in range(0, customers, BATCH):
+        users: list[dict[str, object]] = []
+        orders: list[dict[str, object]] = []
+        for i in range(start, min(start + BATCH, customers)):
+            if i < len(QUERIES):
+                first, trade = QUERIES[i].split()
+            else:
+                first = "".join(
+                    rng.choice(SYLLABLES) for _ in range(3)
+                ).title()
+                trade = rng.choice(TRADES)
+            users.append(
+                {
+                    "id": f"u{i}",
+                    "email": f"u{i}@example.com",
+                    "first_name": first,
+                    "last_name": "Admin",
+                    "username": f"{first}_{trade}",
+                    "is_active": True,
+                }
+            )
+            orders.append(
+                {
+                    "id": f"o{i}",
+                    "user_id": f"u{i}",
+                    "conversation_id": f"c{i}",
+                    "code": f"ORD-{i}",
+                    "start_date": "2026-01-01",
+                    "end_date": "2026-01-08",
+                    "status": (
+                        "Active" if rng.random() < 0.3 else "Completed"
+                    ),
+                    "access_details": "",
+                    "is_deleted": False,
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(insert(User), users)
+            conn.execute(insert(Order), orders)
+
+
+def _time_ms(fn: Callable[[], object], repeat: int) -> list[float]:
+    timings: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(
+        f"  {label:<22} mean={statistics.fmean(timings):8.3f}ms "
+        f"p50={statistics.median(timings):8.3f}ms p95={p95:8.3f}ms"
+    )
+
+
+# ── Run ──────────────────────────────────────────────────────
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        build_start = time.perf_counter()
+        _build(engine, args.customers)
+        print(
+            f"Built {args.customers:,} customers in "
+            f"{time.perf_counter() - build_start:.1f}s"
+        )
+
+        with Session(engine) as session:
+            repo = SqlOrderRepository(session)
+            for name in QUERIES:
+                fts_ids = company_user_ids(name)
+                assert fts_ids is not None
+                legacy_ids = _legacy_user_ids(name)
+                print(f"\n{name!r}")
+                _report(
+                    "resolve (ILIKE)",
+                    _time_ms(
+                        lambda s=legacy_ids: session.scalars(s).all(),
+                        args.repeat,
+                    ),
+                )
+                _report(
+                    "resolve (FTS5)",
+                    _time_ms(
+                        lambda s=fts_ids: session.scalars(s).all(),
+                        args.repeat,
+                    ),
+                )
+                _report(
+                    "active orders (ILIKE)",
+                    _time_ms(
+                        lambda n=name: _legacy_active_orders(session, n),
+                        args.repeat,
+                    ),
+                )
+                _report(
+                    "active orders (FTS5)",
+                    _time_ms(
+                        lambda n=name: repo.find_active_by_company(n),
+                        args.repeat,
+                    ),
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""Repository and tool benchmarks on a production-shaped database.
+
+Generates a synthetic dataset (or reuses one), times seed_database
+into a fresh SQLite file, then times every repository method and tool
+fetch function against it: the largest account, a median one, the
+longest conversation and a spread of ordinary orders. Each result
+records latency percentiles and SQL statements per call, and the run
+is written to JSON so commits can be compared.
+
+Run:  uv run python -m benchmarks.bench_suite --scale medium --output after.json
+      uv run python -m benchmarks.bench_suite --data-dir /tmp/ops-prod \\
+          --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, func, select
+from sqlalchemy.orm import Session
+
+from benchmarks.generate_dataset import SCALES, Scale, generate
+from ops_agent.agent.deps import AgentDeps
+from ops_agent.agent.tools import (
+    fetch_company_orders,
+    fetch_order_info,
+    fetch_order_overview,
+    fetch_order_sentiment,
+    fetch_orders,
+)
+from ops_agent.logger import AgentLogger
+from ops_agent.models.base import get_engine, optimize_database
+from ops_agent.models.message import Message
+from ops_agent.models.order import Order
+from ops_agent.models.product import Product
+from ops_agent.models.query_recorder import record_queries
+from ops_agent.models.user import User
+from ops_agent.repositories.message_repo import SqlMessageRepository
+from ops_agent.repositories.order_repo import SqlOrderRepository
+from ops_agent.repositories.product_repo import SqlProductRepository
+from ops_agent.repositories.protocols import OrderFilter
+from ops_agent.services.data_service import seed_database
+
+# Distinct ordinary orders cycled through by single-order cases
+SAMPLE_ORDERS = 50
+BATCH_CODES = 25
+
+
+# ── Cases ────────────────────────────────────────────────────
+
+
+def _pick_cases(engine: Engine) -> dict[str, Any]:
+    """Inputs chosen from the loaded data: its extremes and a code sample."""
+    with Session(engine) as session:
+        codes = list(
+            session.scalars(
+                select(Order.code).order_by(func.random()).limit(SAMPLE_ORDERS)
+            )
+        )
+        if not codes:
+            raise SystemExit("No orders were seeded; nothing to benchmark")
+        per_company = session.execute(
+            select(User.username, func.count(Order.id))
+            .join(Order, Order.user_id == User.id)
+            .group_by(User.id)
+            .order_by(func.count(Order.id).desc(), User.username)
+        ).all()
+        longest = session.execute(
+            select(Order.code, Order.conversation_id)
+            .join(
+                Message, Message.conversation_id == Order.conversation_id
+            )
+            .group_by(Order.id)
+            .order_by(func.count(Message.id).desc(), Order.code)
+            .limit(1)
+        ).one()
+        product_ids = list(session.scalars(select(Product.id)))
+    return {
+        "big_company": per_company[0][0].replace("_", " "),
+        "median_company": per_company[len(per_company) // 2][0].replace(
+            "_", " "
+        ),
+        "codes": codes,
+        "long_code": longest.code,
+        "long_conversation": longest.conversation_id,
+        "product_ids": product_ids,
+    }
+
+
+# ── Timing ───────────────────────────────────────────────────
+
+
+def _summary(timings: list[float], queries: int) -> dict[str, float]:
+    return {
+        "n": len(timings),
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": statistics.median(timings),
+        "p95_ms": statistics.quantiles(timings, n=20)[-1],
+        "max_ms": max(timings),
+        "queries": queries,
+    }
+
+
+def _bench_sync(
+    session: Session, fn: Callable[[Any], object], inputs: Sequence[Any], repeat: int
+) -> dict[str, float]:
+    timings: list[float] = []
+    queries = 0
+    for i in range(repeat):
+        # A cold identity map, so every call really reads
+        session.expunge_all()
+        with record_queries() as stats:
+            start = time.perf_counter()
+            fn(inputs[i % len(inputs)])
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, stats.count)
+    return _summary(timings, queries)
+
+
+async def _bench_async(
+    session: Session,
+    fn: Callable[[Any], Awaitable[object]],
+    inputs: Sequence[Any],
+    repeat: int,
+) -> dict[str, float]:
+    timings: list[float] = []
+    queries = 0
+    for i in range(repeat):
+        session.expunge_all()
+        with record_queries() as stats:
+            start = time.perf_counter()
+            await fn(inputs[i % len(inputs)])
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, stats.count)
+    return _summary(timings, queries)
+
+
+def _bench_repositories(
+    session: Session, cases: dict[str, Any], repeat: int
+) -> dict[str, dict[str, float]]:
+    orders = SqlOrderRepository(session)
+    messages = SqlMessageRepository(session)
+    products = SqlProductRepository(session)
+    codes = cases["codes"]
+    batches = [codes[i : i + BATCH_CODES] for i in range(0, len(codes), 5)]
+    companies = {
+        "big": cases["big_company"],
+        "median": cases["median_company"],
+    }
+    runs: dict[str, tuple[Callable[[Any], object], Sequence[Any]]] = {
+        "order.get_by_code": (orders.get_by_code, codes),
+        "order.get_many_by_code": (orders.get_many_by_code, batches),
+        "message.get_by_conversation[long]": (
+            messages.get_by_conversation,
+            [cases["long_conversation"]],
+        ),
+        "message.get_sentiment_tally[long]": (
+            lambda c: messages.get_sentiment_tally(c, 10),
+            [cases["long_conversation"]],
+        ),
+        "product.get_by_id": (products.get_by_id, cases["product_ids"]),
+        "product.get_many": (products.get_many, [cases["product_ids"]]),
+    }
+    for size, name in companies.items():
+        runs[f"order.find_active_by_company[{size}]"] = (
+            orders.find_active_by_company,
+            [name],
+        )
+        runs[f"order.find_by_company[{size}]"] = (
+            lambda n: orders.find_by_company(
+                n, OrderFilter(status="Active"), limit=25
+            ),
+            [name],
+        )
+    return {
+        f"repo.{label}": _bench_sync(session, fn, inputs, repeat)
+        for label, (fn, inputs) in runs.items()
+    }
+
+
+async def _bench_tools(
+    session: Session, cases: dict[str, Any], repeat: int, log_dir: Path
+) -> dict[str, dict[str, float]]:
+    # No tool cache: these are the costs a cache miss pays
+    deps = AgentDeps(
+        order_repo=SqlOrderRepository(session),
+        message_repo=SqlMessageRepository(session),
+        product_repo=SqlProductRepository(session),
+        logger=AgentLogger(log_dir),
+        request_id="bench",
+    )
+    codes = cases["codes"]
+    long_code = [cases["long_code"]]
+    runs: dict[str, tuple[Callable[[Any], Awaitable[object]], Sequence[Any]]] = {
+        "fetch_order_info": (lambda c: fetch_order_info(deps, c), codes),
+        "fetch_orders": (
+            lambda cs: fetch_orders(deps, cs),
+            [codes[i : i + BATCH_CODES] for i in range(0, len(codes), 5)],
+        ),
+        "fetch_order_sentiment[long]": (
+            lambda c: fetch_order_sentiment(deps, c),
+            long_code,
+        ),
+        "fetch_order_overview[long]": (
+            lambda c: fetch_order_overview(deps, c),
+            long_code,
+        ),
+        "fetch_order_overview": (
+            lambda c: fetch_order_overview(deps, c),
+            codes,
+        ),
+    }
+    for size in ("big", "median"):
+        runs[f"fetch_company_orders[{size}]"] = (
+            lambda n: fetch_company_orders(
+                deps, n, OrderFilter(status="Active")
+            ),
+            [cases[f"{size}_company"]],
+        )
+    return {
+        f"tool.{label}": await _bench_async(session, fn, inputs, repeat)
+        for label, (fn, inputs) in runs.items()
+    }
+
+
+# ── Report ───────────────────────────────────────────────────
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def _print_results(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]] | None,
+) -> None:
+    for name, r in results.items():
+        line = (
+            f"  {name:<42} p50={r['p50_ms']:9.3f}ms "
+            f"p95={r['p95_ms']:9.3f}ms queries={r['queries']:.0f}"
+        )
+        before = (baseline or {}).get(name)
+        if before and before["p50_ms"]:
+            change = (r["p50_ms"] / before["p50_ms"] - 1) * 100
+            line += f"  ({change:+.1f}% p50 vs baseline)"
+        print(line)
+
+
+# ── Run ──────────────────────────────────────────────────────
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        help="use CSVs from generate_dataset instead of generating",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", type=Path, default=Path("bench.json"))
+    parser.add_argument(
+        "--compare", type=Path, help="an earlier --output to diff against"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        data_dir: Path = args.data_dir or tmp_dir / "data"
+        scale: Scale = SCALES[args.scale]
+        if args.data_dir is None:
+            start = time.perf_counter()
+            generate(data_dir, scale, seed=args.seed)
+            print(
+                f"Generated {args.scale} dataset in "
+                f"{time.perf_counter() - start:.1f}s"
+            )
+        db_path = tmp_dir / "bench.db"
+        engine = get_engine(f"sqlite:///{db_path}")
+        start = time.perf_counter()
+        loaded = seed_database(engine, data_dir)
+        optimize_database(engine, analyze=True)
+        seed_s = time.perf_counter() - start
+        rows = sum(loaded.values())
+        print(f"Seeded {rows:,} rows in {seed_s:.1f}s")
+
+        cases = _pick_cases(engine)
+        with Session(engine) as session:
+            results = _bench_repositories(session, cases, args.repeat)
+            results |= asyncio.run(
+                _bench_tools(session, cases, args.repeat, tmp_dir / "logs")
+            )
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": datetime.now(UTC).isoformat(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "scale": args.scale if args.data_dir is None else None,
+                "data_dir": str(args.data_dir) if args.data_dir else None,
+                "rows": loaded,
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "cases": {
+                    k: v for k, v in cases.items() if isinstance(v, str)
+                },
+            },
+            "seed_database": {
+                "seconds": seed_s,
+                "rows_per_s": rows / seed_s if seed_s else 0.0,
+                "db_bytes": db_path.stat().st_size,
+            },
+            "results": results,
+        }
+        engine.dispose()
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+    _print_results(results, baseline)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
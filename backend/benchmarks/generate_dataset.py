@@ -0,0 +1,315 @@
+"""Deterministic synthetic dataset in the shape of backend/data.
+
+Writes users.csv, products.csv, orders.csv and messages.csv with
+production-like skew: orders per company follow a Zipf curve, so a
+few accounts own a large share of all orders, and conversation lengths
+are Pareto-distributed, so a handful of orders carry long threads.
+The first company is always Chase_Construction, the largest account.
+
+The same seed and scale always produce byte-identical files. Rows are
+streamed to disk, so memory stays small even at 20M messages.
+
+Run:  uv run python -m benchmarks.generate_dataset --scale prod --out /tmp/ops-prod
+"""
+
+import argparse
+import csv
+import datetime
+import itertools
+import random
+import uuid
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+CHUNK = 10_000
+# Orders per company fall off as 1 / rank**ZIPF_S
+ZIPF_S = 1.1
+# Conversation weights ~ Pareto(alpha); lower means longer long tail
+PARETO_ALPHA = 1.3
+EPOCH = datetime.date(2024, 1, 1)
+DAYS = 730
+
+SYLLABLES = ["ka", "lor", "ven", "tri", "sol", "mar", "dex", "qui", "bo", "ran"]
+TRADES = ["Construction", "Builders", "Roofing", "Demolition", "Paving"]
+ACCESS = [
+    "Front driveway",
+    "Back alley",
+    "Side gate",
+    "Loading dock",
+    "Call on arrival",
+]
+# (status, weight)
+STATUSES = [
+    ("Active", 30),
+    ("Completed", 45),
+    ("Delivered", 15),
+    ("Issue Reported", 10),
+]
+PRODUCTS = [
+    ("30 Yard Dumpster", "DUMP-30", "Large construction debris container.", 4.0),
+    ("Portable Toilet (Standard)", "PT-STD", "Standard site restroom.", 0.0),
+    ("20 Yard Dumpster", "DUMP-20", "Medium renovation container.", 3.0),
+    ("10 Yard Dumpster", "DUMP-10", "Small cleanout container.", 2.0),
+    ("40 Yard Dumpster", "DUMP-40", "Bulk demolition container.", 6.0),
+    ("Portable Toilet (Deluxe)", "PT-DLX", "Flushing site restroom.", 0.0),
+    ("Temporary Fencing (50 ft)", "FENCE-50", "Chain-link panels.", 0.0),
+    ("Hand Wash Station", "HWS-1", "Two-sink wash station.", 0.0),
+]
+MESSAGES = {
+    "positive": [
+        "Thanks for the quick swap.",
+        "Delivery was right on time, great job.",
+        "Crew was very helpful today.",
+    ],
+    "neutral": [
+        "Could you please confirm the pickup date?",
+        "What is the max fill line on this container?",
+        "Can we move the drop-off to the side gate?",
+        "Please send the invoice to accounting.",
+    ],
+    "negative": [
+        "The container still hasn't been picked up.",
+        "Driver blocked the driveway again.",
+        "We were charged twice for the same haul.",
+        "Nobody showed up for the scheduled service.",
+    ],
+}
+# Sentiment mix per order status: (positive, neutral, negative)
+SENTIMENT_MIX = {
+    "Issue Reported": (5, 35, 60),
+    "Active": (20, 60, 20),
+}
+DEFAULT_MIX = (30, 55, 15)
+
+
+@dataclass(frozen=True)
+class Scale:
+    companies: int
+    orders: int
+    messages: int
+
+
+SCALES = {
+    "tiny": Scale(companies=50, orders=1_000, messages=10_000),
+    "small": Scale(companies=500, orders=20_000, messages=200_000),
+    "medium": Scale(companies=2_000, orders=200_000, messages=2_000_000),
+    "prod": Scale(companies=10_000, orders=1_000_000, messages=20_000_000),
+}
+
+
+Row = tuple[object, ...]
+
+
+def _uuid(kind: int, seed: int, index: int) -> str:
+    """A stable id per (table, seed, row), with no state to keep."""
+    return str(uuid.UUID(int=(kind << 120) | (seed << 64) | index))
+
+
+def _company_name(index: int) -> tuple[str, str]:
+    if index == 0:
+        return "Chase", "Construction"
+    digits = f"{index:04d}"
+    first = "".join(SYLLABLES[int(d)] for d in digits).title()
+    return first, TRADES[index % len(TRADES)]
+
+
+def _user_row(seed: int, index: int) -> Row:
+    first, trade = _company_name(index)
+    return (
+        _uuid(1, seed, index),
+        f"ops{index}@example.com",
+        first,
+        "Admin",
+        f"{first}_{trade}",
+        "True",
+        f"{EPOCH.isoformat()}T08:00:00",
+    )
+
+
+def order_code(index: int) -> str:
+    return f"ORD-{100_000 + index}"
+
+
+def _write(path: Path, header: list[str], rows: Iterable[Row]) -> int:
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for chunk in itertools.batched(rows, CHUNK):
+            writer.writerows(chunk)
+            written += len(chunk)
+    return written
+
+
+def generate(
+    out_dir: Path, scale: Scale, *, seed: int = 42
+) -> dict[str, int]:
+    """Write the four CSVs into out_dir; returns rows written per file."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    written: dict[str, int] = {}
+
+    written["users.csv"] = _write(
+        out_dir / "users.csv",
+        [
+            "id",
+            "email",
+            "first_name",
+            "last_name",
+            "username",
+            "is_active",
+            "date_joined",
+        ],
+        (_user_row(seed, i) for i in range(scale.companies)),
+    )
+
+    product_ids = [_uuid(2, seed, i) for i in range(len(PRODUCTS))]
+    written["products.csv"] = _write(
+        out_dir / "products.csv",
+        [
+            "id",
+            "name",
+            "main_product_code",
+            "description",
+            "included_tonnage_quantity",
+        ],
+        (
+            (product_ids[i], name, code, description, tonnage)
+            for i, (name, code, description, tonnage) in enumerate(PRODUCTS)
+        ),
+    )
+
+    company_weights = list(
+        itertools.accumulate(
+            1 / (rank + 1) ** ZIPF_S for rank in range(scale.companies)
+        )
+    )
+    statuses, status_weights = zip(*STATUSES, strict=True)
+    # Per order, kept compactly for the message pass
+    order_day = array("H")
+    order_user = array("I")
+    order_status = array("B")
+
+    def order_rows() -> Iterator[Row]:
+        companies = range(scale.companies)
+        for start in range(0, scale.orders, CHUNK):
+            size = min(CHUNK, scale.orders - start)
+            owners = rng.choices(companies, cum_weights=company_weights, k=size)
+            for offset, owner in enumerate(owners):
+                i = start + offset
+                day = rng.randrange(DAYS)
+                status = rng.choices(range(len(statuses)), status_weights)[0]
+                order_day.append(day)
+                order_user.append(owner)
+                order_status.append(status)
+                start_date = EPOCH + datetime.timedelta(days=day)
+                end_date = start_date + datetime.timedelta(
+                    days=rng.choice((7, 14, 30))
+                )
+                yield (
+                    _uuid(3, seed, i),
+                    _uuid(1, seed, owner),
+                    _uuid(4, seed, i),
+                    order_code(i),
+                    start_date.isoformat(),
+                    end_date.isoformat(),
+                    statuses[status],
+                    rng.choice(product_ids),
+                    rng.choice(ACCESS),
+                    "False",
+                )
+
+    written["orders.csv"] = _write(
+        out_dir / "orders.csv",
+        [
+            "id",
+            "user_id",
+            "conversation_id",
+            "code",
+            "start_date",
+            "end_date",
+            "status",
+            "waste_type_id",
+            "access_details",
+            "is_deleted",
+        ],
+        order_rows(),
+    )
+
+    conversation_weights = list(
+        itertools.accumulate(
+            rng.paretovariate(PARETO_ALPHA) for _ in range(scale.orders)
+        )
+    )
+    labels = list(MESSAGES)
+
+    def message_rows() -> Iterator[Row]:
+        orders = range(scale.orders)
+        for start in range(0, scale.messages, CHUNK):
+            size = min(CHUNK, scale.messages - start)
+            picked = rng.choices(
+                orders, cum_weights=conversation_weights, k=size
+            )
+            for offset, order in enumerate(picked):
+                i = start + offset
+                mix = SENTIMENT_MIX.get(
+                    statuses[order_status[order]], DEFAULT_MIX
+                )
+                label = rng.choices(labels, mix)[0]
+                sent = datetime.datetime.combine(
+                    EPOCH, datetime.time(8)
+                ) + datetime.timedelta(
+                    days=order_day[order], minutes=rng.randrange(30 * 24 * 60)
+                )
+                yield (
+                    _uuid(5, seed, i),
+                    _uuid(4, seed, order),
+                    _uuid(1, seed, order_user[order]),
+                    rng.choice(MESSAGES[label]),
+                    label,
+                    sent.isoformat(),
+                    "True" if rng.random() < 0.01 else "False",
+                )
+
+    written["messages.csv"] = _write(
+        out_dir / "messages.csv",
+        [
+            "id",
+            "conversation_id",
+            "user_id",
+            "message",
+            "sentiment_label",
+            "created_on",
+            "is_deleted",
+        ],
+        message_rows(),
+    )
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic ops dataset."
+    )
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--companies", type=int)
+    parser.add_argument("--orders", type=int)
+    parser.add_argument("--messages", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    preset = SCALES[args.scale]
+    scale = Scale(
+        companies=args.companies or preset.companies,
+        orders=args.orders or preset.orders,
+        messages=args.messages or preset.messages,
+    )
+    for name, rows in generate(args.out, scale, seed=args.seed).items():
+        print(f"{name:<14} {rows:>12,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""Offline load test for /api/chat, driven by a scripted stub model.
+
+Boots the real app (same settings, seeding, admission and coalescing,
+on a database seeded into a temp dir) under uvicorn in a background
+thread, with the model swapped for a FunctionModel that makes the tool
+calls a real run would, after a configurable artificial latency, and
+streams its answer in chunks.
+N concurrent SSE clients then post queries, and the run reports
+requests/s, time to first event, time to complete and the server
+event loop's lag. No API key or network access is needed.
+
+Queries are synthesized from order codes and companies in the seeded
+database, or replayed from agent.log files in either log format.
+
+Run:  uv run python -m benchmarks.load_test --clients 50 --requests 2000
+      uv run python -m benchmarks.load_test --replay logs/agent.log --clients 20
+"""
+
+import argparse
+import ast
+import asyncio
+import itertools
+import json
+import logging
+import random
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from pydantic_ai.messages import ModelMessage, ModelResponse, UserPromptPart
+from pydantic_ai.models.function import (
+    AgentInfo,
+    DeltaToolCall,
+    DeltaToolCalls,
+    FunctionModel,
+)
+from sqlalchemy import Engine, select
+from sqlalchemy.orm import Session
+
+from ops_agent.agent.agent import create_agent
+from ops_agent.api.routes import router
+from ops_agent.config import settings
+from ops_agent.main import lifespan
+from ops_agent.models.order import Order
+from ops_agent.models.user import User
+
+CODE_RE = re.compile(r"\bORD-\d+\b", re.IGNORECASE)
+# The query=%r field of a text-format request line
+TEXT_QUERY_RE = re.compile(r"""query=('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+SENTIMENT_WORDS = ("feel", "sentiment", "happy", "upset", "complain")
+SAMPLE_CODES = 500
+ANSWER_CHUNKS = 4
+LAG_INTERVAL_S = 0.01
+# Mix of real question shapes; the first is answered by the fast path
+TEMPLATES = (
+    "What's the status of {code}?",
+    "How is everything going with {code}?",
+    "How's the customer feeling about {code}?",
+    "Compare {code} and {other}, which one needs attention?",
+    "What active orders does {company} have?",
+)
+
+
+# ── Queries ──────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class LoadCases:
+    codes: list[str]
+    companies: list[str]
+
+
+def _sample_cases(engine: Engine, rng: random.Random) -> LoadCases:
+    with Session(engine) as session:
+        codes = list(session.scalars(select(Order.code).order_by(Order.code)))
+        usernames = session.scalars(select(User.username).order_by(User.id))
+        companies = [name.replace("_", " ") for name in usernames]
+    return LoadCases(
+        codes=rng.sample(codes, min(SAMPLE_CODES, len(codes))),
+        companies=companies,
+    )
+
+
+def synthetic_queries(cases: LoadCases, rng: random.Random) -> Iterator[str]:
+    while True:
+        yield rng.choice(TEMPLATES).format(
+            code=rng.choice(cases.codes),
+            other=rng.choice(cases.codes),
+            company=rng.choice(cases.companies),
+        )
+
+
+def harvest_queries(paths: list[Path]) -> list[str]:
+    """Queries of the request records in agent.log files, in order."""
+    queries: list[str] = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("{"):
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("event") == "request" and entry.get("query"):
+                        queries.append(entry["query"])
+                elif match := TEXT_QUERY_RE.search(line):
+                    queries.append(ast.literal_eval(match[1]))
+    return queries
+
+
+# ── Stub model ───────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class StubTiming:
+    latency_s: float
+    jitter_s: float
+    chunk_delay_s: float
+
+
+class StubModel:
+    """Scripted stream function: one tool call, then a chunked answer.
+
+    The tool follows from the query the way the real model picks it:
+    several codes are batched, one code gets an overview (or its
+    sentiment), anything else lists a company's active orders.
+    """
+
+    def __init__(
+        self, cases: LoadCases, timing: StubTiming, rng: random.Random
+    ) -> None:
+        self._cases = cases
+        self._timing = timing
+        self._rng = rng
+
+    def plan(self, query: str) -> tuple[str, dict[str, Any]]:
+        codes = list(dict.fromkeys(c.upper() for c in CODE_RE.findall(query)))
+        lowered = query.lower()
+        if len(codes) > 1:
+            return "lookup_orders", {"codes": codes}
+        if codes and any(w in lowered for w in SENTIMENT_WORDS):
+            return "get_order_sentiment", {"order_code": codes[0]}
+        if codes:
+            return "get_order_overview", {"order_code": codes[0]}
+        company = next(
+            (c for c in self._cases.companies if c.lower() in lowered), None
+        )
+        if company is None:
+            # A stable stand-in, so a replayed query always costs the same
+            index = zlib.crc32(query.encode()) % len(self._cases.companies)
+            company = self._cases.companies[index]
+        return "find_active_orders", {"company_name": company}
+
+    async def stream(
+        self, messages: list[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[DeltaToolCalls]:
+        timing = self._timing
+        await asyncio.sleep(
+            max(0.0, timing.latency_s + self._rng.uniform(-1, 1) * timing.jitter_s)
+        )
+        query = next(
+            part.content
+            for message in messages
+            for part in message.parts
+            if isinstance(part, UserPromptPart) and isinstance(part.content, str)
+        )
+        if not any(isinstance(m, ModelResponse) for m in messages):
+            name, args = self.plan(query)
+            yield {
+                0: DeltaToolCall(
+                    name=name, json_args=json.dumps(args), tool_call_id="call"
+                )
+            }
+            return
+        codes = list(dict.fromkeys(c.upper() for c in CODE_RE.findall(query)))
+        answer = json.dumps(
+            {
+                "message": "Here is what I found for your question. "
+                "Everything below comes from the order records.",
+                "order_codes": codes,
+            }
+        )
+        step = -(-len(answer) // ANSWER_CHUNKS)
+        for i in range(0, len(answer), step):
+            if i:
+                await asyncio.sleep(timing.chunk_delay_s)
+            yield {
+                0: DeltaToolCall(
+                    name="final_response" if i == 0 else None,
+                    json_args=answer[i : i + step],
+                    tool_call_id="answer" if i == 0 else None,
+                )
+            }
+
+
+def build_app(timing: StubTiming, seed: int) -> FastAPI:
+    """The production app, with the stub model installed at startup."""
+
+    @asynccontextmanager
+    async def stub_lifespan(app: FastAPI) -> AsyncIterator[None]:
+        async with lifespan(app):
+            rng = random.Random(seed)
+            cases = _sample_cases(app.state.engine, rng)
+            stub = StubModel(cases, timing, rng)
+            app.state.agent = create_agent(
+                model=FunctionModel(stream_function=stub.stream),
+                prompt_cache_ttl=None,
+            )
+            app.state.load_cases = cases
+            yield
+
+    app = FastAPI(lifespan=stub_lifespan)
+    app.include_router(router)
+    return app
+
+
+# ── Server ───────────────────────────────────────────────────
+
+
+async def _probe_lag(samples: list[float]) -> None:
+    """How late the loop wakes a sleeper: time requests waited to run."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL_S)
+        samples.append(time.perf_counter() - start - LAG_INTERVAL_S)
+
+
+def _start_server(
+    app: FastAPI, lag: list[float]
+) -> tuple[uvicorn.Server, threading.Thread, int]:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    )
+
+    async def serve() -> None:
+        probe = asyncio.create_task(_probe_lag(lag))
+        try:
+            await server.serve()
+        finally:
+            probe.cancel()
+
+    thread = threading.Thread(
+        target=asyncio.run, args=(serve(),), name="load-test-server", daemon=True
+    )
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("server failed to start")
+        time.sleep(0.05)
+    port: int = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, port
+
+
+# ── Clients ──────────────────────────────────────────────────
+
+
+@dataclass
+class Sample:
+    outcome: str  # complete, error, rejected (429) or failed
+    first_event_s: float | None
+    total_s: float
+
+
+async def _send(client: httpx.AsyncClient, query: str) -> Sample:
+    start = time.perf_counter()
+    first: float | None = None
+    outcome = "failed"
+    try:
+        async with client.stream(
+            "POST", "/api/chat", json={"message": query}
+        ) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                outcome = "rejected" if resp.status_code == 429 else "failed"
+            else:
+                async for line in resp.aiter_lines():
+                    if not line.startswith("event:"):
+                        continue
+                    if first is None:
+                        first = time.perf_counter() - start
+                    event = line.removeprefix("event:").strip()
+                    if event in ("complete", "error"):
+                        outcome = event
+    except httpx.HTTPError:
+        outcome = "failed"
+    return Sample(outcome, first, time.perf_counter() - start)
+
+
+async def _drive(
+    port: int,
+    queries: Iterator[str],
+    clients: int,
+    requests: int,
+    duration_s: float | None,
+) -> tuple[list[Sample], float]:
+    samples: list[Sample] = []
+    start = time.perf_counter()
+    deadline = start + duration_s if duration_s else None
+    issued = itertools.count()
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while True:
+            if deadline is None:
+                if next(issued) >= requests:
+                    return
+            elif time.perf_counter() >= deadline:
+                return
+            samples.append(await _send(client, next(queries)))
+
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}",
+        timeout=None,
+        limits=httpx.Limits(max_connections=clients),
+    ) as client, asyncio.TaskGroup() as group:
+        for _ in range(clients):
+            group.create_task(worker(client))
+    return samples, time.perf_counter() - start
+
+
+# ── Report ───────────────────────────────────────────────────
+
+
+def _percentiles(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _report(
+    samples: list[Sample], elapsed_s: float, lag: list[float]
+) -> dict[str, Any]:
+    outcomes = Counter(s.outcome for s in samples)
+    return {
+        "requests": len(samples),
+        "elapsed_s": elapsed_s,
+        "requests_per_s": outcomes["complete"] / elapsed_s,
+        "outcomes": dict(outcomes),
+        "first_event": _percentiles(
+            [s.first_event_s for s in samples if s.first_event_s is not None]
+        ),
+        "complete": _percentiles(
+            [s.total_s for s in samples if s.outcome == "complete"]
+        ),
+        "loop_lag": _percentiles(lag),
+    }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    outcomes = ", ".join(f"{k}={v}" for k, v in sorted(report["outcomes"].items()))
+    print(
+        f"\n{report['requests']} requests in {report['elapsed_s']:.1f}s: "
+        f"{report['requests_per_s']:.1f} completed/s ({outcomes})"
+    )
+    for key, label in (
+        ("first_event", "time to first event"),
+        ("complete", "time to complete"),
+        ("loop_lag", "event loop lag"),
+    ):
+        p = report[key]
+        if p is None:
+            print(f"  {label:<20} (no samples)")
+            continue
+        print(
+            f"  {label:<20} p50={p['p50_ms']:8.1f}ms p95={p['p95_ms']:8.1f}ms "
+            f"p99={p['p99_ms']:8.1f}ms max={p['max_ms']:8.1f}ms"
+        )
+
+
+# ── Run ──────────────────────────────────────────────────────
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--duration", type=float, help="run for this many seconds instead"
+    )
+    parser.add_argument(
+        "--replay", type=Path, nargs="+", help="agent.log files to replay"
+    )
+    parser.add_argument("--model-latency-ms", type=float, default=400)
+    parser.add_argument("--jitter-ms", type=float, default=150)
+    parser.add_argument("--chunk-delay-ms", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--log-dir",
+        type=Path,
+        help="where the server writes agent.log (default: a temp dir)",
+    )
+    parser.add_argument("--output", type=Path, help="also write JSON here")
+    args = parser.parse_args()
+    # Per-request log lines would drown the report
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+    replayed = harvest_queries(args.replay) if args.replay else None
+    if args.replay and not replayed:
+        raise SystemExit("no request records found to replay")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep load-test runs out of the real agent.log and database
+        settings.log_dir = args.log_dir or Path(tmp)
+        settings.database_url = f"sqlite:///{Path(tmp) / 'ops.db'}"
+        timing = StubTiming(
+            latency_s=args.model_latency_ms / 1000,
+            jitter_s=args.jitter_ms / 1000,
+            chunk_delay_s=args.chunk_delay_ms / 1000,
+        )
+        app = build_app(timing, args.seed)
+        lag: list[float] = []
+        server, thread, port = _start_server(app, lag)
+        try:
+            if replayed:
+                queries = itertools.cycle(replayed)
+                print(f"Replaying {len(replayed)} logged queries")
+            else:
+                cases: LoadCases = app.state.load_cases
+                queries = synthetic_queries(cases, random.Random(args.seed))
+            lag.clear()
+            samples, elapsed = asyncio.run(
+                _drive(port, queries, args.clients, args.requests, args.duration)
+            )
+            report = _report(samples, elapsed, list(lag))
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    _print_report(report)
+    if args.output:
+        report["meta"] = {
+            "clients": args.clients,
+            "replay": [str(p) for p in args.replay or []],
+            "model_latency_ms": args.model_latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "chunk_delay_ms": args.chunk_delay_ms,
+            "admission": settings.admission.model_dump(),
+            "coalesce_chat": settings.coalesce_chat,
+            "fast_path_enabled": settings.fast_path_enabled,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
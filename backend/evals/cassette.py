@@ -0,0 +1,184 @@
+"""Record/replay cassettes for model calls.
+
+CassetteModel wraps a model. In record mode every request goes to the
+wrapped model and its response is saved; in replay mode the saved
+response is served and the wrapped model is never called, so a run
+needs no network and answers identically each time.
+
+Streamed requests share the same recordings; replay serves each part
+whole. Requests are keyed by a hash of the messages and tool definitions,
+with timestamps and run ids stripped. Each recording is its own JSON
+file, so re-recordings diff cleanly and concurrent cases never write
+the same file.
+"""
+
+import hashlib
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from pydantic_ai import RunContext
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelResponse,
+    ModelResponseStreamEvent,
+)
+from pydantic_ai.models import (
+    Model,
+    ModelRequestParameters,
+    StreamedResponse,
+)
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+CASSETTE_DIR = Path(__file__).parent / "cassettes"
+# Differ on every run without changing what the model is asked
+VOLATILE_KEYS = frozenset({"timestamp", "run_id"})
+
+CassetteMode = Literal["record", "replay"]
+
+
+class CassetteMissError(Exception):
+    """Replay met a request that was never recorded."""
+
+
+def _strip(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip(v) for v in value]
+    return value
+
+
+def request_key(
+    messages: list[ModelMessage], params: ModelRequestParameters
+) -> str:
+    payload = {
+        "messages": _strip(
+            ModelMessagesTypeAdapter.dump_python(messages, mode="json")
+        ),
+        "tools": [
+            asdict(tool)
+            for tool in (*params.function_tools, *params.output_tools)
+        ],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+@dataclass
+class _ReplayedStream(StreamedResponse):
+    """A recorded response served as a stream, one whole part at a time."""
+
+    _response: ModelResponse = field(kw_only=True)
+
+    async def _get_event_iterator(self) -> AsyncIterator[ModelResponseStreamEvent]:
+        self._usage = self._response.usage
+        self.provider_response_id = self._response.provider_response_id
+        self.provider_details = self._response.provider_details
+        self.finish_reason = self._response.finish_reason
+        for i, part in enumerate(self._response.parts):
+            yield self._parts_manager.handle_part(vendor_part_id=i, part=part)
+
+    @property
+    def model_name(self) -> str:
+        return self._response.model_name or "cassette"
+
+    @property
+    def provider_name(self) -> str | None:
+        return self._response.provider_name
+
+    @property
+    def provider_url(self) -> str | None:
+        return self._response.provider_url
+
+    @property
+    def timestamp(self) -> datetime:
+        return self._response.timestamp
+
+
+class CassetteModel(WrapperModel):
+    def __init__(
+        self,
+        wrapped: Model,
+        mode: CassetteMode,
+        directory: Path = CASSETTE_DIR,
+    ) -> None:
+        super().__init__(wrapped)
+        self.mode = mode
+        self.directory = directory
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key[:16]}.json"
+
+    def _load(self, key: str) -> ModelResponse:
+        path = self._path(key)
+        if not path.exists():
+            raise CassetteMissError(
+                f"No recording for request {key[:16]} in "
+                f"{self.directory}; re-record with --mode record"
+            )
+        recorded = json.loads(path.read_text(encoding="utf-8"))
+        response = ModelMessagesTypeAdapter.validate_python(
+            [recorded["response"]]
+        )[0]
+        assert isinstance(response, ModelResponse)
+        return response
+
+    def _save(self, key: str, response: ModelResponse) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        recorded = {
+            "key": key,
+            "response": ModelMessagesTypeAdapter.dump_python(
+                [response], mode="json"
+            )[0],
+        }
+        self._path(key).write_text(
+            json.dumps(recorded, indent=2) + "\n", encoding="utf-8"
+        )
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        key = request_key(messages, model_request_parameters)
+        if self.mode == "replay":
+            return self._load(key)
+        response = await super().request(
+            messages, model_settings, model_request_parameters
+        )
+        self._save(key, response)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+        run_context: RunContext[Any] | None = None,
+    ) -> AsyncIterator[StreamedResponse]:
+        """Streamed requests share recordings with request().
+
+        Replay yields each recorded part whole rather than in the
+        original deltas; recording saves the response once the stream
+        is read to its end.
+        """
+        key = request_key(messages, model_request_parameters)
+        if self.mode == "replay":
+            yield _ReplayedStream(
+                model_request_parameters, _response=self._load(key)
+            )
+            return
+        async with super().request_stream(
+            messages, model_settings, model_request_parameters, run_context
+        ) as stream:
+            yield stream
+        self._save(key, stream.get())
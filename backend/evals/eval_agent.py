@@ -1,21 +1,31 @@
 """Pydantic Evals — agent-level evaluation suite.
 
 Tests the full pipeline: prompt → LLM → tool selection → response.
-Requires ANTHROPIC_API_KEY. Makes real API calls.
+Live and record modes need ANTHROPIC_API_KEY and make real API calls;
+record also saves each model response to evals/cassettes, and replay
+serves those offline, skipping with a message when none have been
+recorded. Cases run concurrently, each with its own session.
 
 Run:  uv run --extra dev python -m evals.eval_agent
+      uv run --extra dev python -m evals.eval_agent --mode record
+      uv run --extra dev python -m evals.eval_agent --mode replay
 """
 
+import argparse
+import sys
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from pathlib import Path
 
+from pydantic_ai import Agent
 from pydantic_evals import Case, Dataset
 from pydantic_evals.evaluators import (
     Evaluator,
     EvaluatorContext,
 )
 
-from ops_agent.agent.agent import create_agent
+from evals.cassette import CASSETTE_DIR, CassetteMode, CassetteModel
+from ops_agent.agent.agent import create_agent, default_model
 from ops_agent.agent.deps import AgentDeps
 from ops_agent.agent.schemas import AgentResponse
 from ops_agent.logger import AgentLogger
@@ -119,24 +129,40 @@ class NoToolData(Evaluator[str, AgentResponse]):
 
 _engine = get_engine("sqlite://")
 seed_database(_engine, DATA_DIR)
-_session = get_session_factory(_engine)()
-_deps = AgentDeps(
-    order_repo=SqlOrderRepository(_session),
-    message_repo=SqlMessageRepository(_session),
-    product_repo=SqlProductRepository(_session),
-    logger=AgentLogger(Path("/tmp/eval-logs")),
-    request_id="eval-agent",
-)
-_agent = create_agent()
+_session_factory = get_session_factory(_engine)
+_logger = AgentLogger(Path("/tmp/eval-logs"))
+
+
+def build_agent(mode: str) -> Agent[AgentDeps, AgentResponse]:
+    """The live agent, or one whose model calls go through cassettes."""
+    if mode == "live":
+        return create_agent()
+    # Replay never reaches the API; the key only satisfies the client
+    model = default_model(api_key="offline-replay" if mode == "replay" else None)
+    cassette_mode: CassetteMode = "replay" if mode == "replay" else "record"
+    return create_agent(model=CassetteModel(model, cassette_mode))
 
 
 # ── Task function ────────────────────────────────────────────
 
 
-async def run_agent(query: str) -> AgentResponse:
-    """Run the full agent pipeline with a real LLM."""
-    result = await _agent.run(query, deps=_deps)
-    return result.output
+def make_task(
+    agent: Agent[AgentDeps, AgentResponse],
+) -> Callable[[str], Awaitable[AgentResponse]]:
+    async def run_agent(query: str) -> AgentResponse:
+        """Run the full agent pipeline, in a session of its own."""
+        with _session_factory() as session:
+            deps = AgentDeps(
+                order_repo=SqlOrderRepository(session),
+                message_repo=SqlMessageRepository(session),
+                product_repo=SqlProductRepository(session),
+                logger=_logger,
+                request_id="eval-agent",
+            )
+            result = await agent.run(query, deps=deps)
+        return result.output
+
+    return run_agent
 
 
 # ── Dataset ──────────────────────────────────────────────────
@@ -212,5 +238,21 @@ dataset: Dataset[str, AgentResponse] = Dataset(
 # ── Run ──────────────────────────────────────────────────────
 
 if __name__ == "__main__":
-    report = dataset.evaluate_sync(run_agent)
+    parser = argparse.ArgumentParser(description="Agent eval suite.")
+    parser.add_argument(
+        "--mode", choices=["live", "record", "replay"], default="live"
+    )
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+    if args.mode == "replay" and not any(CASSETTE_DIR.glob("*.json")):
+        print(
+            f"Skipping replay: no cassettes in {CASSETTE_DIR}. "
+            "Record them first with --mode record (needs ANTHROPIC_API_KEY).",
+            file=sys.stderr,
+        )
+        sys.exit(0)
+    report = dataset.evaluate_sync(
+        make_task(build_agent(args.mode)),
+        max_concurrency=args.concurrency,
+    )
     report.print(include_input=True, include_output=True)
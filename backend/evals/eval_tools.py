@@ -19,8 +19,14 @@ from sqlalchemy.orm import Session
 from ops_agent.agent.deps import AgentDeps
 from ops_agent.agent.tools import (
     OrderNotFoundError,
-    _get_order_info,
-    _get_product_info,
+    fetch_company_orders,
+    fetch_order_info,
+    fetch_order_overview,
+    fetch_order_sentiment,
+    format_order_info,
+    format_order_overview,
+    format_order_page,
+    format_sentiment,
 )
 from ops_agent.logger import AgentLogger
 from ops_agent.models.base import get_engine, get_session_factory
@@ -31,6 +37,7 @@ from ops_agent.repositories.order_repo import SqlOrderRepository
 from ops_agent.repositories.product_repo import (
     SqlProductRepository,
 )
+from ops_agent.repositories.protocols import OrderFilter
 from ops_agent.services.data_service import seed_database
 
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -129,84 +136,45 @@ async def run_tool(inputs: ToolInput) -> str:
     """Execute a single tool call and return its string output."""
     if inputs.tool == "lookup_order":
         try:
-            order = _get_order_info(
-                _deps.order_repo, inputs.args["order_code"]
+            info = await fetch_order_info(
+                _deps, inputs.args["order_code"]
             )
         except OrderNotFoundError as e:
             return str(e)
-        product_name, tonnage = _get_product_info(
-            _deps.product_repo, order.waste_type_id
-        )
-        return (
-            f"Order {order.code}: status={order.status}, "
-            f"customer="
-            f"{order.user.username.replace('_', ' ')}, "
-            f"product={product_name}, "
-            f"included_tonnage={tonnage}, "
-            f"access_details={order.access_details or 'None'}, "
-            f"start_date={order.start_date}, "
-            f"end_date={order.end_date}"
-        )
+        return format_order_info(info)
 
     if inputs.tool == "find_active_orders":
-        orders = _deps.order_repo.find_active_by_company(
-            inputs.args["company_name"]
+        page = await fetch_company_orders(
+            _deps,
+            inputs.args["company_name"],
+            OrderFilter(status="Active"),
         )
-        if not orders:
+        if not page.orders:
             return (
                 f"No active orders found for "
                 f"'{inputs.args['company_name']}'"
             )
-        lines = []
-        for order in orders:
-            product_name, _ = _get_product_info(
-                _deps.product_repo, order.waste_type_id
-            )
-            lines.append(
-                f"Order {order.code}: status={order.status}, "
-                f"product={product_name}, "
-                f"access_details="
-                f"{order.access_details or 'None'}"
-            )
-        return "\n".join(lines)
+        return format_order_page(page)
 
     if inputs.tool == "get_order_sentiment":
         try:
-            order = _get_order_info(
-                _deps.order_repo, inputs.args["order_code"]
+            sentiment = await fetch_order_sentiment(
+                _deps, inputs.args["order_code"]
             )
         except OrderNotFoundError as e:
             return str(e)
-        messages = _deps.message_repo.get_by_conversation(
-            order.conversation_id
-        )
-        if not messages:
+        if sentiment is None:
             return "No messages found for this order"
-        counts: dict[str, int] = {
-            "positive": 0,
-            "neutral": 0,
-            "negative": 0,
-        }
-        flagged: list[str] = []
-        for msg in messages:
-            sentiment = (
-                msg.sentiment_label
-                if msg.sentiment_label in counts
-                else "neutral"
+        return format_sentiment(sentiment)
+
+    if inputs.tool == "get_order_overview":
+        try:
+            overview = await fetch_order_overview(
+                _deps, inputs.args["order_code"]
             )
-            counts[sentiment] += 1
-            if sentiment == "negative":
-                flagged.append(msg.message)
-        overall = max(counts, key=lambda k: counts[k])
-        return (
-            f"Order {inputs.args['order_code']}: "
-            f"{len(messages)} messages, "
-            f"overall={overall}, "
-            f"positive={counts['positive']}, "
-            f"neutral={counts['neutral']}, "
-            f"negative={counts['negative']}, "
-            f"flagged_negative_messages={flagged}"
-        )
+        except OrderNotFoundError as e:
+            return str(e)
+        return format_order_overview(overview)
 
     return f"Unknown tool: {inputs.tool}"
 
@@ -309,6 +277,24 @@ dataset: Dataset[ToolInput, str] = Dataset(
             ],
             metadata={"capability": "data_linking"},
         ),
+        # ── Overview ─────────────────────────────────────
+        Case(
+            name="overview_ord_9910",
+            inputs=ToolInput(
+                tool="get_order_overview",
+                args={"order_code": "ORD-9910"},
+            ),
+            evaluators=[
+                ContainsAll(substrings=["ORD-9910", "access_details"]),
+                SentimentCounts(
+                    positive=2,
+                    neutral=3,
+                    negative=3,
+                    total=8,
+                ),
+            ],
+            metadata={"capability": "order_context"},
+        ),
         # ── Boundary / Off-topic ─────────────────────────
         Case(
             name="unknown_tool",
@@ -1,8 +1,14 @@
-from pydantic_ai import Agent
+from collections.abc import Callable
+from typing import Literal
+
+from pydantic_ai import Agent, RunContext, ToolOutput
+from pydantic_ai.exceptions import ModelAPIError
 from pydantic_ai.models import Model
+from pydantic_ai.models.anthropic import AnthropicModelSettings
 
 from ops_agent.agent.deps import AgentDeps
 from ops_agent.agent.schemas import AgentResponse
+from ops_agent.metrics import MODEL_FALLBACKS
 
 SYSTEM_PROMPT = """\
 You are Optimus the operations agent for an industrial \
@@ -28,23 +34,31 @@ screenshot and share with a manager
 ## Tools
 - lookup_order(order_code): Get a single order by its \
 short code (e.g. "ORD-5353")
-- find_active_orders(company_name): Find all active \
-orders for a company (e.g. "Chase Construction")
+- lookup_orders(codes): Get several orders in one call \
+— use it whenever the user lists or compares two or \
+more codes
+- find_active_orders(company_name, product_name?, \
+start_from?, start_to?, cursor?): Find active orders \
+for a company (e.g. "Chase Construction"), one page at \
+a time, optionally narrowed by product or start-date \
+window
 - get_order_sentiment(order_code): Get sentiment \
 breakdown from customer messages on an order
+- get_order_overview(order_code): Get an order's \
+details and its sentiment breakdown together
 
 ## Output Format
-You MUST return a JSON object matching this schema:
+Finish by calling the final_response output tool with:
 - message: A short summary or insight (1-2 sentences). \
 Do NOT repeat data that appears in the structured \
 fields — focus on context or actionable observations.
-- orders: List of order details (for single lookups)
-- order_summaries: List of order summaries (for \
-company searches)
-- sentiment: Sentiment analysis result
+- order_codes: The codes of the orders your answer \
+covers, from the tool results. Their details, \
+summaries and sentiment are attached to the response \
+automatically — never write that data out yourself.
 
-Only populate the fields relevant to the query. Set \
-unused fields to null.
+Use an empty order_codes list when no order data \
+applies (not found, off-topic, declined).
 
 ## Guidelines
 - Always include access details (gate codes, delivery \
@@ -54,10 +68,14 @@ when available
 - Always look up data — never guess at order details
 - When a user asks generally about an order (e.g., \
 "How is everything going with…", "What's happening \
-with…", "Give me the full picture on…"), look up \
-both the order details AND sentiment to give a \
-complete picture
+with…", "Give me the full picture on…"), call \
+get_order_overview once — it returns the order \
+details AND sentiment together
 - Keep the message field concise and scannable
+- Company searches return one page plus the total. When \
+more pages exist, say how many of the total are shown \
+and offer to narrow or continue; only fetch the next \
+page (with the returned cursor) when the user asks
 - When an order is not found, say so in the message
 - Never mention tool names, function names, or \
 internal implementation details in your responses — \
@@ -85,18 +103,7 @@ Tool call: lookup_order("ORD-5353")
 Output:
 {
   "message": "Here are the details for ORD-5353.",
-  "orders": [{
-    "code": "ORD-5353",
-    "status": "Completed",
-    "customer": "Omaha Builders",
-    "product_name": "30 Yard Dumpster",
-    "included_tonnage": 4.0,
-    "access_details": "Front driveway",
-    "start_date": "2025-12-31",
-    "end_date": "2026-01-07"
-  }],
-  "order_summaries": null,
-  "sentiment": null
+  "order_codes": ["ORD-5353"]
 }
 
 ## Example 2: Company Search
@@ -107,14 +114,7 @@ Tool call: find_active_orders("Chase Construction")
 Output:
 {
   "message": "Found 1 active order for Chase Construction.",
-  "orders": null,
-  "order_summaries": [{
-    "code": "ORD-1592",
-    "status": "Active",
-    "access_details": "Gate code 4321",
-    "product_name": "20 Yard Dumpster"
-  }],
-  "sentiment": null
+  "order_codes": ["ORD-1592"]
 }
 
 ## Example 3: Sentiment Analysis
@@ -126,41 +126,83 @@ Output:
 {
   "message": "Sentiment is leaning negative — key \
 concerns are service timing and missed pickups.",
-  "orders": null,
-  "order_summaries": null,
-  "sentiment": {
-    "order_code": "ORD-9910",
-    "overall_sentiment": "negative",
-    "message_count": 8,
-    "positive": 2,
-    "neutral": 3,
-    "negative": 3,
-    "flagged_messages": [
-      "The pickup was late again",
-      "Still waiting on the replacement",
-      "This is unacceptable service"
-    ]
-  }
+  "order_codes": ["ORD-9910"]
 }\
 """
 
 
+def final_response(
+    ctx: RunContext[AgentDeps],
+    message: str,
+    # Optional so a partly streamed answer still validates
+    order_codes: list[str] | None = None,
+) -> AgentResponse:
+    """Send the answer: a short message plus the codes of the orders \
+it covers, whose data is attached from the tool results."""
+    return ctx.deps.records.assemble(message, order_codes or [])
+
+
+def _count_fallbacks(last: Model) -> Callable[[Exception], bool]:
+    """FallbackModel's default condition, counted when it moves on.
+
+    A failure of the last model has nothing to fall back to, so it is
+    not counted.
+    """
+
+    def fallback_on(exc: Exception) -> bool:
+        if not isinstance(exc, ModelAPIError):
+            return False
+        if exc.model_name != last.model_name:
+            MODEL_FALLBACKS.inc(error=type(exc).__name__)
+        return True
+
+    return fallback_on
+
+
+def default_model(*, api_key: str | None = None) -> Model:
+    """Sonnet, falling back to Haiku on API errors.
+
+    api_key overrides ANTHROPIC_API_KEY from the environment.
+    """
+    from pydantic_ai.models.anthropic import AnthropicModel
+    from pydantic_ai.models.fallback import FallbackModel
+    from pydantic_ai.providers.anthropic import AnthropicProvider
+
+    provider = (
+        AnthropicProvider(api_key=api_key) if api_key else "anthropic"
+    )
+    primary = AnthropicModel("claude-sonnet-4-5-20250929", provider=provider)
+    fallback = AnthropicModel("claude-haiku-4-5-20251001", provider=provider)
+    return FallbackModel(
+        primary, fallback, fallback_on=_count_fallbacks(fallback)
+    )
+
+
 def create_agent(
     model: Model | str | None = None,
+    *,
+    prompt_cache_ttl: Literal["5m", "1h"] | None = "5m",
 ) -> Agent[AgentDeps, AgentResponse]:
-    if model is None:
-        from pydantic_ai.models.anthropic import AnthropicModel
-        from pydantic_ai.models.fallback import FallbackModel
+    """Build the ops agent.
 
-        primary = AnthropicModel("claude-sonnet-4-5-20250929")
-        fallback = AnthropicModel("claude-haiku-4-5-20251001")
-        model = FallbackModel(primary, fallback)
+    prompt_cache_ttl marks the static instructions and tool schemas
+    as cacheable on Anthropic models; None sends them uncached.
+    Other providers ignore the markers.
+    """
+    if model is None:
+        model = default_model()
 
     agent: Agent[AgentDeps, AgentResponse] = Agent(
         model,
         instructions=SYSTEM_PROMPT,
-        output_type=AgentResponse,
+        output_type=ToolOutput(final_response, name="final_response"),
         deps_type=AgentDeps,
+        model_settings=AnthropicModelSettings(
+            anthropic_cache_instructions=prompt_cache_ttl,
+            anthropic_cache_tool_definitions=prompt_cache_ttl,
+        )
+        if prompt_cache_ttl
+        else None,
     )
 
     from ops_agent.agent.tools import register_tools
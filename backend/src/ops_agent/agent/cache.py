@@ -0,0 +1,90 @@
+"""Cross-request cache for tool results.
+
+Entries are keyed by tool name, normalized arguments and the data
+version of every table the tool reads, so a reseed makes older entries
+unreachable without any explicit invalidation. Size is bounded with LRU
+eviction and entries also expire after a TTL.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from ops_agent.services.data_versions import DataVersions
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+
+
+class ToolCache:
+    def __init__(
+        self,
+        versions: DataVersions,
+        *,
+        max_entries: int = 1024,
+        ttl_s: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._versions = versions
+        self._max_entries = max_entries
+        self._ttl_s = ttl_s
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _key(
+        self, tool: str, args: tuple[Hashable, ...], tables: tuple[str, ...]
+    ) -> Hashable:
+        return (tool, args, self._versions.token(*tables))
+
+    async def get_or_load[T](
+        self,
+        tool: str,
+        args: tuple[Hashable, ...],
+        tables: tuple[str, ...],
+        load: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Return the cached result, calling load() on a miss.
+
+        Exceptions from load() propagate and are not cached.
+        """
+        key = self._key(tool, args, tables)
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        value = await load()
+        self._entries[key] = _Entry(value, self._clock() + self._ttl_s)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl_s": self._ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
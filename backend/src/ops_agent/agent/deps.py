@@ -1,7 +1,12 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+from ops_agent.agent.cache import ToolCache
+from ops_agent.agent.records import ToolRecords
 from ops_agent.logger import AgentLogger
 from ops_agent.repositories.protocols import (
+    AsyncMessageRepository,
+    AsyncOrderRepository,
+    AsyncProductRepository,
     MessageRepository,
     OrderRepository,
     ProductRepository,
@@ -10,8 +15,10 @@ from ops_agent.repositories.protocols import (
 
 @dataclass
 class AgentDeps:
-    order_repo: OrderRepository
-    message_repo: MessageRepository
-    product_repo: ProductRepository
+    order_repo: OrderRepository | AsyncOrderRepository
+    message_repo: MessageRepository | AsyncMessageRepository
+    product_repo: ProductRepository | AsyncProductRepository
     logger: AgentLogger
     request_id: str
+    tool_cache: ToolCache | None = None
+    records: ToolRecords = field(default_factory=ToolRecords)
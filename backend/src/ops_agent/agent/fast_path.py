@@ -0,0 +1,101 @@
+"""Deterministic answers for single-order queries that need no LLM.
+
+Only whole-message matches against a short list of phrasings are
+routed here; anything else (extra clauses, several codes, company
+names) falls through to the agent.
+"""
+
+import re
+from dataclasses import dataclass
+
+from ops_agent.agent.deps import AgentDeps
+from ops_agent.agent.schemas import AgentResponse
+from ops_agent.agent.tools import (
+    OrderNotFoundError,
+    fetch_order_info,
+    fetch_order_sentiment,
+)
+
+FAST_PATH_MODEL = "fast-path"
+
+_CODE = r"(?P<code>ORD-\d+)"
+_END = r"\s*[?.!]*\s*$"
+
+LOOKUP_PATTERNS: list[re.Pattern[str]] = [
+    re.compile(rf"^\s*{_CODE}{_END}", re.IGNORECASE),
+    re.compile(
+        rf"^\s*(?:what(?:'s| is) (?:the )?)?status (?:of|for|on) "
+        rf"(?:order )?{_CODE}{_END}",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        rf"^\s*(?:please )?(?:look ?up|find|show(?: me)?|get|check) "
+        rf"(?:order )?{_CODE}{_END}",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        rf"^\s*(?:order )?details (?:of|for|on) (?:order )?{_CODE}{_END}",
+        re.IGNORECASE,
+    ),
+]
+
+SENTIMENT_PATTERNS: list[re.Pattern[str]] = [
+    re.compile(
+        rf"^\s*(?:what(?:'s| is) the )?sentiment (?:of|for|on) "
+        rf"(?:order )?{_CODE}{_END}",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        rf"^\s*how(?:'s| is) the customer feeling about "
+        rf"(?:order )?{_CODE}{_END}",
+        re.IGNORECASE,
+    ),
+]
+
+
+@dataclass(frozen=True)
+class FastPathIntent:
+    tool: str
+    order_code: str
+
+
+def match_fast_path(query: str) -> FastPathIntent | None:
+    """Return the intent for a high-confidence single-order query."""
+    for tool, patterns in (
+        ("lookup_order", LOOKUP_PATTERNS),
+        ("get_order_sentiment", SENTIMENT_PATTERNS),
+    ):
+        for pattern in patterns:
+            match = pattern.match(query)
+            if match:
+                return FastPathIntent(tool, match["code"].upper())
+    return None
+
+
+async def run_fast_path(
+    intent: FastPathIntent, deps: AgentDeps
+) -> AgentResponse:
+    """Answer an intent with the same data the agent's tools return."""
+    code = intent.order_code
+    try:
+        if intent.tool == "lookup_order":
+            info = await fetch_order_info(deps, code)
+            return AgentResponse(
+                message=f"Here are the details for {code}.",
+                orders=[info],
+            )
+        sentiment = await fetch_order_sentiment(deps, code)
+    except OrderNotFoundError as e:
+        return AgentResponse(message=f"{e}.")
+    if sentiment is None:
+        return AgentResponse(
+            message=f"There are no customer messages on {code} yet."
+        )
+    return AgentResponse(
+        message=(
+            f"Sentiment on {code} is {sentiment.overall_sentiment} "
+            f"across {sentiment.message_count} messages, "
+            f"with {sentiment.negative} flagged as negative."
+        ),
+        sentiment=sentiment,
+    )
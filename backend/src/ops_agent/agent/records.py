@@ -0,0 +1,57 @@
+"""Typed tool results gathered during one agent run.
+
+Tools record what they fetched here, keyed by order code. The model
+then names the codes its answer covers and the structured fields of
+AgentResponse are filled from these records, so the model never has to
+re-emit the data as JSON.
+"""
+
+from dataclasses import dataclass, field
+
+from ops_agent.agent.schemas import AgentResponse
+from ops_agent.schemas import OrderInfo, OrderSummaryInfo, SentimentInfo
+
+
+@dataclass
+class ToolRecords:
+    orders: dict[str, OrderInfo] = field(default_factory=dict[str, OrderInfo])
+    summaries: dict[str, OrderSummaryInfo] = field(
+        default_factory=dict[str, OrderSummaryInfo]
+    )
+    sentiments: dict[str, SentimentInfo] = field(
+        default_factory=dict[str, SentimentInfo]
+    )
+
+    def add_order(self, info: OrderInfo) -> None:
+        self.orders[info.code.upper()] = info
+
+    def add_summaries(self, summaries: list[OrderSummaryInfo]) -> None:
+        for summary in summaries:
+            self.summaries[summary.code.upper()] = summary
+
+    def add_sentiment(self, info: SentimentInfo) -> None:
+        self.sentiments[info.order_code.upper()] = info
+
+    def assemble(
+        self, message: str, order_codes: list[str]
+    ) -> AgentResponse:
+        """Build the response from the records of the named orders.
+
+        Codes without a record are ignored; fields with nothing to show
+        stay None.
+        """
+        codes = list(dict.fromkeys(code.upper() for code in order_codes))
+        orders = [self.orders[c] for c in codes if c in self.orders]
+        summaries = [
+            self.summaries[c] for c in codes if c in self.summaries
+        ]
+        sentiments = [
+            self.sentiments[c] for c in codes if c in self.sentiments
+        ]
+        return AgentResponse(
+            message=message,
+            orders=orders or None,
+            order_summaries=summaries or None,
+            # The response carries one sentiment; the first named wins
+            sentiment=sentiments[0] if sentiments else None,
+        )
@@ -1,15 +1,50 @@
+import base64
+import binascii
+import datetime
 import functools
+import inspect
+import json
+import time
+from collections.abc import Awaitable, Callable, Hashable
 from typing import Any
 
 from pydantic_ai import Agent, RunContext
 
 from ops_agent.agent.deps import AgentDeps
 from ops_agent.agent.schemas import AgentResponse
+from ops_agent.metrics import TOOL_DURATION, TOOL_ERRORS, TOOL_QUERIES
+from ops_agent.models.company_index import company_match_query
 from ops_agent.models.order import Order
+from ops_agent.models.product import Product
+from ops_agent.models.query_recorder import QueryStats, record_queries
 from ops_agent.repositories.protocols import (
+    AsyncOrderRepository,
+    OrderFilter,
+    OrderKey,
     OrderRepository,
-    ProductRepository,
 )
+from ops_agent.schemas import (
+    OrderBatch,
+    OrderInfo,
+    OrderOverview,
+    OrderSummaryInfo,
+    OrderSummaryPage,
+    SentimentInfo,
+)
+
+# Most recent negative messages quoted back per sentiment lookup
+FLAGGED_MESSAGE_LIMIT = 10
+
+# Orders returned per company listing page
+ORDER_PAGE_SIZE = 25
+
+# Most codes accepted by one batch lookup
+MAX_LOOKUP_CODES = 50
+
+# Tables each cached tool reads; their data versions are part of its key
+ORDER_TABLES = ("orders", "users", "products")
+SENTIMENT_TABLES = ("orders", "messages")
+OVERVIEW_TABLES = ("orders", "users", "products", "messages")
 
 
 class OrderNotFoundError(Exception):
@@ -17,31 +52,328 @@ class OrderNotFoundError(Exception):
         super().__init__(f"No order found with code {code}")
 
 
-def _get_order_info(
-    order_repo: OrderRepository, order_code: str
+class ToolInputError(ValueError):
+    """An argument the model supplied that the tool cannot use."""
+
+
+async def _resolve[T](result: T | Awaitable[T]) -> T:
+    """Await a repository result when it comes from an async backend."""
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+async def _get_order_info(
+    order_repo: OrderRepository | AsyncOrderRepository, order_code: str
 ) -> Order:
     """Retrieve an order by code, raising OrderNotFoundError if missing."""
-    order = order_repo.get_by_code(order_code)
+    order = await _resolve(order_repo.get_by_code(order_code))
     if not order:
         raise OrderNotFoundError(order_code)
     return order
 
 
 def _get_product_info(
-    product_repo: ProductRepository,
-    waste_type_id: str | None,
+    product: Product | None,
 ) -> tuple[str, float | None]:
-    """Resolve product name and tonnage from waste_type_id.
+    """Resolve product name and tonnage from an order's loaded product.
 
-    Returns ("Unknown", None) when the product cannot be found.
+    Returns ("Unknown", None) when the order has no product.
     """
-    if waste_type_id:
-        product = product_repo.get_by_id(waste_type_id)
-        if product:
-            return product.name, product.included_tonnage_quantity
+    if product:
+        return product.name, product.included_tonnage_quantity
     return "Unknown", None
 
 
+def _customer_name(order: Order) -> str:
+    return order.user.username.replace("_", " ")
+
+
+async def _cached[T](
+    deps: AgentDeps,
+    tool: str,
+    args: tuple[Hashable, ...],
+    tables: tuple[str, ...],
+    load: Callable[[], Awaitable[T]],
+) -> T:
+    if deps.tool_cache is None:
+        return await load()
+    return await deps.tool_cache.get_or_load(tool, args, tables, load)
+
+
+async def fetch_order_info(deps: AgentDeps, order_code: str) -> OrderInfo:
+    """Load the full detail record for one order."""
+    return await _cached(
+        deps,
+        "lookup_order",
+        (order_code,),
+        ORDER_TABLES,
+        lambda: _load_order_info(deps, order_code),
+    )
+
+
+async def _load_order_info(deps: AgentDeps, order_code: str) -> OrderInfo:
+    order = await _get_order_info(deps.order_repo, order_code)
+    return _to_order_info(order)
+
+
+async def fetch_orders(deps: AgentDeps, codes: list[str]) -> OrderBatch:
+    """Load detail records for several orders with one query."""
+    if len(codes) > MAX_LOOKUP_CODES:
+        raise ToolInputError(
+            f"At most {MAX_LOOKUP_CODES} codes per lookup, got {len(codes)}"
+        )
+    unique = list(dict.fromkeys(codes))
+    return await _cached(
+        deps,
+        "lookup_orders",
+        tuple(unique),
+        ORDER_TABLES,
+        lambda: _load_orders(deps, unique),
+    )
+
+
+async def _load_orders(deps: AgentDeps, codes: list[str]) -> OrderBatch:
+    found = await _resolve(deps.order_repo.get_many_by_code(codes))
+    return OrderBatch(
+        orders=[_to_order_info(found[c]) for c in codes if c in found],
+        not_found=[c for c in codes if c not in found],
+    )
+
+
+def _to_order_info(order: Order) -> OrderInfo:
+    product_name, tonnage = _get_product_info(order.product)
+    return OrderInfo(
+        code=order.code,
+        status=order.status,
+        customer=_customer_name(order),
+        product_name=product_name,
+        included_tonnage=tonnage,
+        access_details=order.access_details or "",
+        start_date=order.start_date,
+        end_date=order.end_date,
+    )
+
+
+def encode_cursor(key: OrderKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> OrderKey:
+    try:
+        start_date, code = json.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ToolInputError(f"Invalid cursor {cursor!r}") from e
+    return str(start_date), str(code)
+
+
+def _check_date(name: str, value: str | None) -> None:
+    if value is None:
+        return
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError as e:
+        raise ToolInputError(
+            f"{name} must be a YYYY-MM-DD date, got {value!r}"
+        ) from e
+
+
+async def fetch_company_orders(
+    deps: AgentDeps,
+    company_name: str,
+    order_filter: OrderFilter,
+    *,
+    cursor: str | None = None,
+    limit: int = ORDER_PAGE_SIZE,
+) -> OrderSummaryPage:
+    """Load one page of a company's orders, oldest start date first."""
+    _check_date("start_from", order_filter.start_from)
+    _check_date("start_to", order_filter.start_to)
+    after = decode_cursor(cursor) if cursor else None
+    # Search only sees the name's tokens, case-folded
+    query = company_match_query(company_name)
+    return await _cached(
+        deps,
+        "find_company_orders",
+        (
+            query.casefold() if query else None,
+            order_filter,
+            after,
+            limit,
+        ),
+        ORDER_TABLES,
+        lambda: _load_company_orders(
+            deps, company_name, order_filter, after, limit
+        ),
+    )
+
+
+async def _load_company_orders(
+    deps: AgentDeps,
+    company_name: str,
+    order_filter: OrderFilter,
+    after: OrderKey | None,
+    limit: int,
+) -> OrderSummaryPage:
+    page = await _resolve(
+        deps.order_repo.find_by_company(
+            company_name, order_filter, limit=limit, after=after
+        )
+    )
+    summaries: list[OrderSummaryInfo] = []
+    for order in page.orders:
+        product_name, _ = _get_product_info(order.product)
+        summaries.append(
+            OrderSummaryInfo(
+                code=order.code,
+                status=order.status,
+                customer=_customer_name(order),
+                access_details=order.access_details or "",
+                product_name=product_name,
+            )
+        )
+    return OrderSummaryPage(
+        orders=summaries,
+        total=page.total,
+        next_cursor=(
+            encode_cursor(page.next_key) if page.next_key else None
+        ),
+    )
+
+
+async def fetch_order_sentiment(
+    deps: AgentDeps, order_code: str
+) -> SentimentInfo | None:
+    """Tally message sentiment for an order; None when it has no messages."""
+    return await _cached(
+        deps,
+        "get_order_sentiment",
+        (order_code,),
+        SENTIMENT_TABLES,
+        lambda: _load_order_sentiment(deps, order_code),
+    )
+
+
+async def _load_order_sentiment(
+    deps: AgentDeps, order_code: str
+) -> SentimentInfo | None:
+    order = await _get_order_info(deps.order_repo, order_code)
+    return await _sentiment_for(deps, order, order_code)
+
+
+async def _sentiment_for(
+    deps: AgentDeps, order: Order, order_code: str
+) -> SentimentInfo | None:
+    tally = await _resolve(
+        deps.message_repo.get_sentiment_tally(
+            order.conversation_id, FLAGGED_MESSAGE_LIMIT
+        )
+    )
+    if not tally.counts:
+        return None
+    counts: dict[str, int] = {
+        "positive": 0,
+        "neutral": 0,
+        "negative": 0,
+    }
+    for label, count in tally.counts.items():
+        sentiment = label if label in counts else "neutral"
+        counts[sentiment] += count
+    return SentimentInfo(
+        order_code=order_code,
+        overall_sentiment=max(counts, key=lambda k: counts[k]),
+        message_count=sum(counts.values()),
+        positive=counts["positive"],
+        neutral=counts["neutral"],
+        negative=counts["negative"],
+        # Oldest first, as the conversation reads
+        flagged_messages=tally.flagged[::-1],
+    )
+
+
+async def fetch_order_overview(
+    deps: AgentDeps, order_code: str
+) -> OrderOverview:
+    """Load an order's details and sentiment, resolving the order once."""
+    return await _cached(
+        deps,
+        "get_order_overview",
+        (order_code,),
+        OVERVIEW_TABLES,
+        lambda: _load_order_overview(deps, order_code),
+    )
+
+
+async def _load_order_overview(
+    deps: AgentDeps, order_code: str
+) -> OrderOverview:
+    # The product arrives with the order; only the tally is left to fetch
+    order = await _get_order_info(deps.order_repo, order_code)
+    return OrderOverview(
+        order=_to_order_info(order),
+        sentiment=await _sentiment_for(deps, order, order_code),
+    )
+
+
+def format_order_info(info: OrderInfo) -> str:
+    return (
+        f"Order {info.code}: status={info.status}, "
+        f"customer={info.customer}, "
+        f"product={info.product_name}, "
+        f"included_tonnage={info.included_tonnage}, "
+        f"access_details={info.access_details or 'None'}, "
+        f"start_date={info.start_date}, "
+        f"end_date={info.end_date}"
+    )
+
+
+def format_order_batch(batch: OrderBatch) -> str:
+    lines = [format_order_info(info) for info in batch.orders]
+    if batch.not_found:
+        lines.append(f"No order found with codes: {', '.join(batch.not_found)}")
+    return "\n".join(lines)
+
+
+def format_order_summary(info: OrderSummaryInfo) -> str:
+    return (
+        f"Order {info.code}: status={info.status}, "
+        f"customer={info.customer}, "
+        f"product={info.product_name}, "
+        f"access_details={info.access_details or 'None'}"
+    )
+
+
+def format_order_page(page: OrderSummaryPage) -> str:
+    lines = [format_order_summary(s) for s in page.orders]
+    lines.append(f"Showing {len(page.orders)} of {page.total} orders")
+    if page.next_cursor:
+        lines.append(
+            f"More orders available: pass cursor=\"{page.next_cursor}\" "
+            "for the next page"
+        )
+    return "\n".join(lines)
+
+
+def format_sentiment(info: SentimentInfo) -> str:
+    return (
+        f"Order {info.order_code}: {info.message_count} messages, "
+        f"overall={info.overall_sentiment}, "
+        f"positive={info.positive}, "
+        f"neutral={info.neutral}, "
+        f"negative={info.negative}, "
+        f"flagged_negative_messages={info.flagged_messages}"
+    )
+
+
+def format_order_overview(overview: OrderOverview) -> str:
+    sentiment = (
+        format_sentiment(overview.sentiment)
+        if overview.sentiment
+        else "No messages found for this order"
+    )
+    return f"{format_order_info(overview.order)}\n{sentiment}"
+
+
 def handle_tool_errors(func: Any) -> Any:
     """Cross-cutting error handler for all agent tools."""
 
@@ -49,17 +381,26 @@ def handle_tool_errors(func: Any) -> Any:
     async def wrapper(
         ctx: RunContext[AgentDeps], *args: Any, **kwargs: Any
     ) -> Any:
+        tool = func.__name__
+        start = time.perf_counter()
+        queries = QueryStats()
         try:
-            return await func(ctx, *args, **kwargs)
-        except OrderNotFoundError as e:
+            with record_queries() as queries:
+                return await func(ctx, *args, **kwargs)
+        except (OrderNotFoundError, ToolInputError) as e:
+            TOOL_ERRORS.inc(tool=tool, kind="input")
             return str(e)
         except Exception as e:
+            TOOL_ERRORS.inc(tool=tool, kind="internal")
             ctx.deps.logger.log_error(
                 request_id=ctx.deps.request_id,
-                tool_name=func.__name__,
+                tool_name=tool,
                 error=str(e),
             )
             return f"Sorry, I encountered an error: {type(e).__name__}"
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - start, tool=tool)
+            TOOL_QUERIES.observe(queries.count, tool=tool)
 
     return wrapper
 
@@ -75,48 +416,54 @@ def register_tools(
     ) -> str:
         """Look up an order by short code (e.g., ORD-1234). \
 Returns status, access details, product info, and customer."""
-        order = _get_order_info(
-            ctx.deps.order_repo, order_code
-        )
-        product_name, tonnage = _get_product_info(
-            ctx.deps.product_repo, order.waste_type_id
-        )
-        return (
-            f"Order {order.code}: status={order.status}, "
-            f"customer={order.user.username.replace('_', ' ')}, "
-            f"product={product_name}, "
-            f"included_tonnage={tonnage}, "
-            f"access_details={order.access_details or 'None'}, "
-            f"start_date={order.start_date}, "
-            f"end_date={order.end_date}"
-        )
+        info = await fetch_order_info(ctx.deps, order_code)
+        ctx.deps.records.add_order(info)
+        return format_order_info(info)
+
+    @agent.tool
+    @handle_tool_errors
+    async def lookup_orders(
+        ctx: RunContext[AgentDeps],
+        codes: list[str],
+    ) -> str:
+        """Look up several orders at once by short code \
+(e.g., ["ORD-1592", "ORD-5353"]). Returns each order's details \
+and lists any codes that were not found."""
+        batch = await fetch_orders(ctx.deps, codes)
+        for info in batch.orders:
+            ctx.deps.records.add_order(info)
+        return format_order_batch(batch)
 
     @agent.tool
     @handle_tool_errors
     async def find_active_orders(
         ctx: RunContext[AgentDeps],
         company_name: str,
+        product_name: str | None = None,
+        start_from: str | None = None,
+        start_to: str | None = None,
+        cursor: str | None = None,
     ) -> str:
-        """Find all active orders for a company \
-(e.g., 'Chase Construction')."""
-        orders = ctx.deps.order_repo.find_active_by_company(
-            company_name
+        """Find active orders for a company \
+(e.g., 'Chase Construction'), a page at a time by start date. \
+Optionally filter by product name and a start-date window \
+(YYYY-MM-DD, inclusive). Pass the returned cursor only when \
+more orders are needed."""
+        page = await fetch_company_orders(
+            ctx.deps,
+            company_name,
+            OrderFilter(
+                status="Active",
+                product_name=product_name,
+                start_from=start_from,
+                start_to=start_to,
+            ),
+            cursor=cursor,
         )
-        if not orders:
+        if not page.orders:
             return f"No active orders found for '{company_name}'"
-        lines: list[str] = []
-        for order in orders:
-            product_name, _ = _get_product_info(
-                ctx.deps.product_repo, order.waste_type_id
-            )
-            lines.append(
-                f"Order {order.code}: status={order.status}, "
-                f"customer={order.user.username.replace('_', ' ')}, "
-                f"product={product_name}, "
-                f"access_details="
-                f"{order.access_details or 'None'}"
-            )
-        return "\n".join(lines)
+        ctx.deps.records.add_summaries(page.orders)
+        return format_order_page(page)
 
     @agent.tool
     @handle_tool_errors
@@ -126,35 +473,22 @@ Returns status, access details, product info, and customer."""
     ) -> str:
         """Analyze customer sentiment for messages on an order. \
 Returns sentiment breakdown and flagged negative messages."""
-        order = _get_order_info(
-            ctx.deps.order_repo, order_code
-        )
-        messages = ctx.deps.message_repo.get_by_conversation(
-            order.conversation_id
-        )
-        if not messages:
+        info = await fetch_order_sentiment(ctx.deps, order_code)
+        if info is None:
             return "No messages found for this order"
-        counts: dict[str, int] = {
-            "positive": 0,
-            "neutral": 0,
-            "negative": 0,
-        }
-        flagged: list[str] = []
-        for message in messages:
-            sentiment = (
-                message.sentiment_label
-                if message.sentiment_label in counts
-                else "neutral"
-            )
-            counts[sentiment] += 1
-            if sentiment == "negative":
-                flagged.append(message.message)
-        overall = max(counts, key=lambda k: counts[k])
-        return (
-            f"Order {order_code}: {len(messages)} messages, "
-            f"overall={overall}, "
-            f"positive={counts['positive']}, "
-            f"neutral={counts['neutral']}, "
-            f"negative={counts['negative']}, "
-            f"flagged_negative_messages={flagged}"
-        )
+        ctx.deps.records.add_sentiment(info)
+        return format_sentiment(info)
+
+    @agent.tool
+    @handle_tool_errors
+    async def get_order_overview(
+        ctx: RunContext[AgentDeps],
+        order_code: str,
+    ) -> str:
+        """Get the full picture on an order in one call: details \
+(status, access, product, customer) plus customer sentiment."""
+        overview = await fetch_order_overview(ctx.deps, order_code)
+        ctx.deps.records.add_order(overview.order)
+        if overview.sentiment is not None:
+            ctx.deps.records.add_sentiment(overview.sentiment)
+        return format_order_overview(overview)
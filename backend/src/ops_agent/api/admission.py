@@ -0,0 +1,186 @@
+"""Admission control for chat runs.
+
+At most max_in_flight runs hold a slot at once; up to max_queue more
+wait in FIFO order for at most max_wait_s. A request arriving to a
+full queue is rejected straight away with a Retry-After estimate.
+Freed slots are handed directly to the head of the queue, so a new
+arrival can never overtake a waiter.
+"""
+
+import asyncio
+import math
+import statistics
+import time
+from collections import deque
+from collections.abc import AsyncGenerator
+
+from ops_agent.config import AdmissionLimits
+
+# Recent admission waits kept for the wait-time percentiles
+WAIT_SAMPLES = 1000
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after_s: int) -> None:
+        super().__init__("Admission queue is full")
+        self.retry_after_s = retry_after_s
+
+
+class QueueTimeoutError(Exception):
+    def __init__(self) -> None:
+        super().__init__("Timed out waiting for a free slot")
+
+
+class Ticket:
+    """One request's claim on a slot, from arrival until release."""
+
+    def __init__(
+        self, control: "AdmissionControl", waiter: asyncio.Future[None] | None
+    ) -> None:
+        self._control = control
+        self._waiter = waiter
+        self._arrived = time.monotonic()
+        self._admitted_at: float | None = None
+        self._released = False
+        if waiter is None:
+            self._on_admitted()
+
+    @property
+    def queued(self) -> bool:
+        return self._waiter is not None and not self._waiter.done()
+
+    @property
+    def wait_s(self) -> float:
+        """Time spent queued, or so far if still waiting."""
+        end = self._admitted_at or time.monotonic()
+        return end - self._arrived
+
+    def position(self) -> int:
+        """1-based place in the queue; 0 once admitted."""
+        if not self.queued:
+            return 0
+        assert self._waiter is not None
+        return self._control._waiters.index(self._waiter) + 1
+
+    async def wait(self) -> AsyncGenerator[int]:
+        """Yield the queue position whenever it changes until admitted.
+
+        Raises QueueTimeoutError once the queue-time budget is spent.
+        """
+        deadline = self._arrived + self._control.limits.max_wait_s
+        last = 0
+        while self.queued:
+            position = self.position()
+            if position != last:
+                last = position
+                yield position
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._control.timed_out += 1
+                self.release()
+                raise QueueTimeoutError()
+            assert self._waiter is not None
+            # Wake on admission or on any movement in the queue
+            await asyncio.wait(
+                {self._waiter, self._control._queue_moved()},
+                timeout=remaining,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        self._on_admitted()
+
+    def _on_admitted(self) -> None:
+        if self._admitted_at is None:
+            self._admitted_at = time.monotonic()
+            self._control._record_wait(self._admitted_at - self._arrived)
+
+    def release(self) -> None:
+        """Give back the slot, or leave the queue if never admitted."""
+        if self._released:
+            return
+        self._released = True
+        if self.queued:
+            assert self._waiter is not None
+            self._control._waiters.remove(self._waiter)
+            self._waiter.cancel()
+            self._control._notify_moved()
+            return
+        held_s = time.monotonic() - (self._admitted_at or self._arrived)
+        self._control._release_slot(held_s)
+
+
+class AdmissionControl:
+    def __init__(self, limits: AdmissionLimits) -> None:
+        self.limits = limits
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._waits_s: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._moved: asyncio.Future[None] | None = None
+        # Smoothed slot hold time, for Retry-After estimates
+        self._run_s = 1.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def reserve(self) -> Ticket:
+        """Take a slot or a queue place; raises QueueFullError if neither."""
+        if self._in_flight < self.limits.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return Ticket(self, None)
+        if len(self._waiters) >= self.limits.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self._retry_after_s())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        return Ticket(self, waiter)
+
+    def _release_slot(self, held_s: float) -> None:
+        self._run_s += 0.2 * (held_s - self._run_s)
+        # Hand the slot straight to the longest waiter
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._notify_moved()
+                return
+        self._in_flight -= 1
+
+    def _queue_moved(self) -> asyncio.Future[None]:
+        """A future resolved the next time the queue shifts."""
+        if self._moved is None or self._moved.done():
+            self._moved = asyncio.get_running_loop().create_future()
+        return self._moved
+
+    def _notify_moved(self) -> None:
+        if self._moved is not None and not self._moved.done():
+            self._moved.set_result(None)
+
+    def _record_wait(self, wait_s: float) -> None:
+        self.admitted += 1
+        self._waits_s.append(wait_s)
+
+    def _retry_after_s(self) -> int:
+        backlog = len(self._waiters) + 1
+        return max(
+            1, math.ceil(self._run_s * backlog / self.limits.max_in_flight)
+        )
+
+    def stats(self) -> dict[str, int | float]:
+        waits_ms = sorted(w * 1000 for w in self._waits_s)
+        p95 = (
+            statistics.quantiles(waits_ms, n=20)[-1]
+            if len(waits_ms) >= 2
+            else (waits_ms[0] if waits_ms else 0.0)
+        )
+        return {
+            "max_in_flight": self.limits.max_in_flight,
+            "max_queue": self.limits.max_queue,
+            "max_wait_s": self.limits.max_wait_s,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_ms_p50": statistics.median(waits_ms) if waits_ms else 0.0,
+            "wait_ms_p95": p95,
+            "wait_ms_max": waits_ms[-1] if waits_ms else 0.0,
+        }
@@ -0,0 +1,142 @@
+"""Single-flight coalescing of identical concurrent chat runs.
+
+The first request for a query leads: its run executes in a task owned
+by a Flight, which keeps every event the run produces. Identical
+requests arriving while it runs attach as followers, replay the events
+so far and then follow live, so N people asking the same question cost
+one agent run. The key carries the data versions, so a reseed starts a
+fresh run. The run is cancelled only once every subscriber has left.
+"""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, Callable
+from typing import Any
+
+import anyio
+
+from ops_agent.services.data_versions import DataVersions
+
+Event = dict[str, str]
+
+# Every table a chat run can read
+CHAT_TABLES = ("messages", "orders", "products", "users")
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace; case is kept since order codes match exactly."""
+    return " ".join(query.split())
+
+
+class Flight[S]:
+    """One run and the events it has produced so far."""
+
+    def __init__(
+        self,
+        state: S,
+        leader_id: str,
+        events: AsyncGenerator[Event],
+        on_done: Callable[[], None] | None = None,
+    ) -> None:
+        self.state = state
+        self.leader_id = leader_id
+        self._events: list[Event] = []
+        self._done = False
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._on_done = on_done
+        self._task = asyncio.create_task(self._pump(events))
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    async def _pump(self, events: AsyncGenerator[Event]) -> None:
+        try:
+            async with contextlib.aclosing(events):
+                async for event in events:
+                    self._events.append(event)
+                    self._wake()
+        finally:
+            self._done = True
+            self._wake()
+            if self._on_done is not None:
+                self._on_done()
+
+    def _wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncGenerator[Event]:
+        """Replay the events so far, then follow the run to its end."""
+        self._subscribers += 1
+        try:
+            seen = 0
+            while True:
+                while seen < len(self._events):
+                    yield self._events[seen]
+                    seen += 1
+                if self._done:
+                    return
+                await self._changed.wait()
+        finally:
+            self._subscribers -= 1
+            if self._subscribers == 0 and not self._done:
+                self._task.cancel()
+                # Let the run unwind (and close its session) before the
+                # last subscriber's own cancellation completes
+                with anyio.CancelScope(shield=True):
+                    await asyncio.wait({self._task})
+
+
+class SingleFlight:
+    def __init__(self, versions: DataVersions) -> None:
+        self._versions = versions
+        self._flights: dict[tuple[str, str], Flight[Any]] = {}
+        self.led = 0
+        self.joined = 0
+
+    def key(self, query: str) -> tuple[str, str]:
+        return (
+            normalize_query(query),
+            self._versions.token(*CHAT_TABLES),
+        )
+
+    def find(self, key: tuple[str, str]) -> Flight[Any] | None:
+        flight = self._flights.get(key)
+        if flight is None or flight.done:
+            return None
+        return flight
+
+    def follow[S](self, flight: Flight[S]) -> AsyncGenerator[Event]:
+        """Subscribe to a run that another request leads."""
+        self.joined += 1
+        return flight.subscribe()
+
+    def lead[S](
+        self,
+        key: tuple[str, str],
+        state: S,
+        leader_id: str,
+        events: AsyncGenerator[Event],
+        on_done: Callable[[], None] | None = None,
+    ) -> Flight[S]:
+        """Start a run that later identical queries can join."""
+
+        def finished() -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if on_done is not None:
+                on_done()
+
+        flight = Flight(state, leader_id, events, finished)
+        self._flights[key] = flight
+        self.led += 1
+        return flight
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "led": self.led,
+            "joined": self.joined,
+        }
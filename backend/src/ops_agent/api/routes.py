@@ -1,33 +1,101 @@
 import contextlib
+import hashlib
 import json
 import time
 import uuid
-from collections.abc import AsyncIterator
-from typing import Any
+from collections.abc import AsyncGenerator, AsyncIterator
+from dataclasses import dataclass, field
+from typing import Annotated, Any, cast
 
-from fastapi import APIRouter, Request
-from pydantic_ai import CallToolsNode, ToolCallPart
+import anyio
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic_ai import (
+    Agent,
+    CallToolsNode,
+    ModelRequestNode,
+    ToolCallPart,
+)
+from pydantic_ai.usage import RunUsage
 from pydantic_graph.nodes import End
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
+from starlette.responses import PlainTextResponse
 
+from ops_agent.agent.cache import ToolCache
 from ops_agent.agent.deps import AgentDeps
+from ops_agent.agent.fast_path import (
+    FAST_PATH_MODEL,
+    FastPathIntent,
+    match_fast_path,
+    run_fast_path,
+)
 from ops_agent.agent.schemas import AgentResponse
+from ops_agent.agent.tools import (
+    ORDER_PAGE_SIZE,
+    ORDER_TABLES,
+    SENTIMENT_TABLES,
+    OrderNotFoundError,
+    ToolInputError,
+    fetch_company_orders,
+    fetch_order_info,
+    fetch_order_sentiment,
+)
+from ops_agent.api.admission import (
+    AdmissionControl,
+    QueueFullError,
+    QueueTimeoutError,
+    Ticket,
+)
+from ops_agent.api.coalescing import Flight, SingleFlight
 from ops_agent.api.schemas import ChatRequest, ChatResponse
+from ops_agent.config import settings
 from ops_agent.logger import AgentLogger
-from ops_agent.repositories.message_repo import SqlMessageRepository
-from ops_agent.repositories.order_repo import SqlOrderRepository
-from ops_agent.repositories.product_repo import SqlProductRepository
+from ops_agent.metrics import (
+    ADMISSION_WAIT,
+    CHAT_DURATION,
+    CHAT_FIRST_EVENT,
+    CHAT_QUERIES,
+    MODEL_REQUEST,
+    TOKENS,
+    registry,
+)
+from ops_agent.models.base import read_storage_settings
+from ops_agent.models.query_recorder import QueryStats, record_queries
+from ops_agent.repositories.message_repo import (
+    AsyncSqlMessageRepository,
+    SqlMessageRepository,
+)
+from ops_agent.repositories.order_repo import (
+    AsyncSqlOrderRepository,
+    SqlOrderRepository,
+)
+from ops_agent.repositories.product_repo import (
+    AsyncSqlProductRepository,
+    SqlProductRepository,
+)
+from ops_agent.repositories.protocols import OrderFilter
+from ops_agent.schemas import OrderInfo, OrderSummaryPage, SentimentInfo
+from ops_agent.services.data_versions import DataVersions, data_versions
 
 router = APIRouter(prefix="/api")
 
+# Minimum gap between partial-answer events while the model streams
+PARTIAL_DEBOUNCE_S = 0.1
+
 TOOL_STATUS_TEMPLATES: dict[str, str] = {
     "lookup_order": "Looking up order {order_code}...",
+    "lookup_orders": "Looking up orders {codes}...",
     "find_active_orders": (
         "Searching active orders for {company_name}..."
     ),
     "get_order_sentiment": (
         "Analyzing sentiment for {order_code}..."
     ),
+    "get_order_overview": (
+        "Pulling the full picture for {order_code}..."
+    ),
 }
 
 
@@ -43,12 +111,29 @@ def _tool_status_message(
     elif isinstance(args, str):
         with contextlib.suppress(json.JSONDecodeError, TypeError):
             fmt_args = json.loads(args)
+    # List arguments read as "ORD-1, ORD-2"
+    fmt_args = {
+        k: ", ".join(map(str, v)) if isinstance(v, list) else v
+        for k, v in fmt_args.items()
+    }
     try:
         return template.format(**fmt_args)
     except KeyError:
         return f"Running {tool_name}..."
 
 
+def _queued_event(position: int) -> dict[str, str]:
+    return {
+        "event": "queued",
+        "data": json.dumps(
+            {
+                "message": f"Waiting for a free slot (#{position} in line)...",
+                "position": position,
+            }
+        ),
+    }
+
+
 def _sse_event(
     phase: str,
     message: str | None = None,
@@ -62,69 +147,199 @@ def _sse_event(
     return {"event": phase, "data": json.dumps(payload)}
 
 
-@router.post("/chat")
-async def chat(body: ChatRequest, request: Request) -> EventSourceResponse:
-    request_id = str(uuid.uuid4())
-    start_time = time.monotonic()
-
-    session_factory = request.app.state.session_factory
-    agent = request.app.state.agent
-    agent_logger: AgentLogger = request.app.state.agent_logger
-
-    async def event_stream() -> AsyncIterator[dict[str, str]]:
-        session = session_factory()
+@contextlib.asynccontextmanager
+async def _agent_deps(
+    session_factory: sessionmaker[Session] | async_sessionmaker[AsyncSession],
+    agent_logger: AgentLogger,
+    request_id: str,
+    tool_cache: ToolCache | None = None,
+) -> AsyncIterator[AgentDeps]:
+    """Open a session and wire repositories matching its sync/async flavour."""
+    session = session_factory()
+    if isinstance(session, AsyncSession):
+        try:
+            yield AgentDeps(
+                order_repo=AsyncSqlOrderRepository(session),
+                message_repo=AsyncSqlMessageRepository(session),
+                product_repo=AsyncSqlProductRepository(session),
+                logger=agent_logger,
+                request_id=request_id,
+                tool_cache=tool_cache,
+            )
+        finally:
+            # Runs on client disconnect too; finish closing even though
+            # the surrounding scope is already cancelled
+            with anyio.CancelScope(shield=True):
+                await session.close()
+    else:
         try:
-            deps = AgentDeps(
+            yield AgentDeps(
                 order_repo=SqlOrderRepository(session),
                 message_repo=SqlMessageRepository(session),
                 product_repo=SqlProductRepository(session),
                 logger=agent_logger,
                 request_id=request_id,
+                tool_cache=tool_cache,
             )
+        finally:
+            session.close()
+
+
+@dataclass
+class _RunState:
+    """What a chat run produced, filled in as its events stream."""
+
+    model_name: str = "unknown"
+    tools_called: list[str] = field(default_factory=list[str])
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    output: AgentResponse | None = None
+    # Wall time spent in each phase of the run
+    phases_ms: dict[str, int] = field(default_factory=dict[str, int])
+    queries: QueryStats = field(default_factory=QueryStats)
+
+
+def _add_phase(state: _RunState, phase: str, since: float) -> None:
+    elapsed = int((time.monotonic() - since) * 1000)
+    state.phases_ms[phase] = state.phases_ms.get(phase, 0) + elapsed
+
+
+def _record_usage(state: _RunState, usage: RunUsage) -> None:
+    state.input_tokens = usage.input_tokens
+    state.output_tokens = usage.output_tokens
+    state.cache_read_tokens = usage.cache_read_tokens
+    state.cache_write_tokens = usage.cache_write_tokens
+
+
+@contextlib.asynccontextmanager
+async def _record_run(state: _RunState) -> AsyncIterator[None]:
+    """Track the run's queries; count its tokens once it ends."""
+    try:
+        with record_queries() as state.queries:
+            yield
+    finally:
+        CHAT_QUERIES.observe(state.queries.count)
+        state.phases_ms["db"] = state.queries.duration_ms
+        TOKENS.inc(state.input_tokens, kind="input")
+        TOKENS.inc(state.output_tokens, kind="output")
+        TOKENS.inc(state.cache_read_tokens, kind="cache_read")
+        TOKENS.inc(state.cache_write_tokens, kind="cache_write")
+
+
+async def _agent_events(
+    agent: Agent[AgentDeps, AgentResponse],
+    query: str,
+    deps: AgentDeps,
+    state: _RunState,
+) -> AsyncGenerator[dict[str, str]]:
+    async with agent.iter(query, deps=deps) as agent_run:
+        ran_tools = False
+        step_start = time.monotonic()
+        async for node in agent_run:
+            # Advancing past a CallToolsNode is what executes the tools
+            if ran_tools:
+                _add_phase(state, "tools", step_start)
+                ran_tools = False
+            if isinstance(node, ModelRequestNode):
+                # Stream the answer as the model writes it; requests
+                # that only call tools yield nothing here
+                model_start = time.monotonic()
+                async with (
+                    node.stream(agent_run.ctx) as request_stream,
+                    # Typed as an iterator, but is an async generator
+                    contextlib.aclosing(
+                        cast(
+                            AsyncGenerator[AgentResponse],
+                            request_stream.stream_output(
+                                debounce_by=PARTIAL_DEBOUNCE_S
+                            ),
+                        )
+                    ) as partials,
+                ):
+                    last = ""
+                    async for partial in partials:
+                        snapshot = partial.model_dump_json()
+                        if snapshot != last:
+                            last = snapshot
+                            yield {"event": "partial", "data": snapshot}
+                MODEL_REQUEST.observe(
+                    time.monotonic() - model_start,
+                    model=request_stream.response.model_name or "unknown",
+                )
+                _add_phase(state, "model", model_start)
+            elif isinstance(node, CallToolsNode):
+                ran_tools = True
+                if node.model_response.model_name:
+                    state.model_name = node.model_response.model_name
+                for part in node.model_response.parts:
+                    if isinstance(part, ToolCallPart):
+                        state.tools_called.append(part.tool_name)
+                        msg = _tool_status_message(
+                            part.tool_name, part.args
+                        )
+                        yield _sse_event("tool_call", msg)
+            elif isinstance(node, End):
+                pass
+            # Kept current so a cancelled run can report what it used
+            _record_usage(state, agent_run.usage())
+            step_start = time.monotonic()
+
+    agent_result = agent_run.result
+    assert agent_result is not None
+    state.output = agent_result.output
+    _record_usage(state, agent_result.usage())
+
 
+async def _fast_path_events(
+    intent: FastPathIntent, deps: AgentDeps, state: _RunState
+) -> AsyncGenerator[dict[str, str]]:
+    state.model_name = FAST_PATH_MODEL
+    state.tools_called.append(intent.tool)
+    yield _sse_event(
+        "tool_call",
+        _tool_status_message(
+            intent.tool, {"order_code": intent.order_code}
+        ),
+    )
+    started = time.monotonic()
+    state.output = await run_fast_path(intent, deps)
+    _add_phase(state, "tools", started)
+
+
+async def _run_events(
+    agent: Agent[AgentDeps, AgentResponse],
+    query: str,
+    session_factory: sessionmaker[Session] | async_sessionmaker[AsyncSession],
+    agent_logger: AgentLogger,
+    request_id: str,
+    tool_cache: ToolCache | None,
+    state: _RunState,
+) -> AsyncGenerator[dict[str, str]]:
+    """One chat run from the thinking event to complete or error."""
+    async with (
+        _record_run(state),
+        _agent_deps(
+            session_factory, agent_logger, request_id, tool_cache
+        ) as deps,
+    ):
+        try:
             yield _sse_event("thinking", "Processing your request...")
 
-            model_name = "unknown"
-            tools_called: list[str] = []
-
-            async with agent.iter(
-                body.message, deps=deps
-            ) as agent_run:
-                async for node in agent_run:
-                    if isinstance(node, CallToolsNode):
-                        if node.model_response.model_name:
-                            model_name = node.model_response.model_name
-                        for part in node.model_response.parts:
-                            if isinstance(part, ToolCallPart):
-                                tools_called.append(
-                                    part.tool_name
-                                )
-                                msg = _tool_status_message(
-                                    part.tool_name, part.args
-                                )
-                                yield _sse_event(
-                                    "tool_call", msg
-                                )
-                    elif isinstance(node, End):
-                        pass
-
-            agent_result = agent_run.result
-            output: AgentResponse = agent_result.output
-
-            usage = agent_result.usage()
-            duration_ms = int(
-                (time.monotonic() - start_time) * 1000
+            intent = (
+                match_fast_path(query) if settings.fast_path_enabled else None
             )
-
-            agent_logger.log_request(
-                request_id=request_id,
-                query=body.message,
-                model=model_name,
-                input_tokens=usage.request_tokens or 0,
-                output_tokens=usage.response_tokens or 0,
-                tools_called=tools_called,
-                duration_ms=duration_ms,
+            events = (
+                _fast_path_events(intent, deps, state)
+                if intent is not None
+                else _agent_events(agent, query, deps, state)
             )
+            async with contextlib.aclosing(events):
+                async for event in events:
+                    yield event
+            output = state.output
+            assert output is not None
 
             response = ChatResponse(
                 message=output.message,
@@ -148,7 +363,293 @@ async def chat(body: ChatRequest, request: Request) -> EventSourceResponse:
                 "error",
                 error="Something went wrong. Please try again.",
             )
+
+
+@router.post("/chat")
+async def chat(body: ChatRequest, request: Request) -> EventSourceResponse:
+    request_id = str(uuid.uuid4())
+    start_time = time.monotonic()
+
+    session_factory = request.app.state.session_factory
+    agent = request.app.state.agent
+    agent_logger: AgentLogger = request.app.state.agent_logger
+    tool_cache: ToolCache | None = getattr(
+        request.app.state, "tool_cache", None
+    )
+    admission: AdmissionControl | None = getattr(
+        request.app.state, "admission", None
+    )
+    coalescer: SingleFlight | None = getattr(
+        request.app.state, "coalescer", None
+    )
+    key = coalescer.key(body.message) if coalescer else None
+    # An identical run already in flight is joined without a slot
+    flight: Flight[_RunState] | None = (
+        coalescer.find(key) if coalescer and key else None
+    )
+    ticket: Ticket | None = None
+    if flight is None and admission is not None:
+        try:
+            ticket = admission.reserve()
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests in flight. Please retry shortly.",
+                headers={"Retry-After": str(e.retry_after_s)},
+            ) from e
+
+    def start_run() -> Flight[_RunState]:
+        state = _RunState()
+        events = _run_events(
+            agent,
+            body.message,
+            session_factory,
+            agent_logger,
+            request_id,
+            tool_cache,
+            state,
+        )
+        # The run owns the slot from here and frees it when it ends,
+        # even if this request disconnects while others still follow
+        on_done = ticket.release if ticket else None
+        if coalescer is not None and key is not None:
+            return coalescer.lead(key, state, request_id, events, on_done)
+        return Flight(state, request_id, events, on_done)
+
+    def log_run(run: Flight[_RunState], outcome: str) -> None:
+        state = run.state
+        leader = run.leader_id == request_id
+        agent_logger.log_request(
+            request_id=request_id,
+            query=body.message,
+            model=state.model_name,
+            # Token spend is reported once, by the request that led
+            input_tokens=state.input_tokens if leader else 0,
+            output_tokens=state.output_tokens if leader else 0,
+            cache_read_tokens=state.cache_read_tokens if leader else 0,
+            cache_write_tokens=state.cache_write_tokens if leader else 0,
+            tools_called=state.tools_called,
+            duration_ms=int((time.monotonic() - start_time) * 1000),
+            outcome=outcome,
+            coalesced_with=None if leader else run.leader_id,
+            queries=state.queries.count,
+            phases_ms={
+                "queue": int(ticket.wait_s * 1000) if ticket else 0,
+                **state.phases_ms,
+            },
+        )
+
+    async def subscriber_events() -> AsyncGenerator[dict[str, str]]:
+        nonlocal flight
+        outcome: str | None = "cancelled"
+        try:
+            if flight is None:
+                if ticket is not None:
+                    try:
+                        async with contextlib.aclosing(ticket.wait()) as queue:
+                            async for position in queue:
+                                yield _queued_event(position)
+                    except QueueTimeoutError:
+                        yield _sse_event(
+                            "error",
+                            error="The service is busy. Please try again.",
+                        )
+                        return
+                    ADMISSION_WAIT.observe(ticket.wait_s)
+                # Someone may have started the same run while we queued
+                flight = coalescer.find(key) if coalescer and key else None
+                if flight is not None and ticket is not None:
+                    ticket.release()
+                if flight is None:
+                    flight = start_run()
+            run_events = (
+                coalescer.follow(flight)
+                if coalescer is not None and flight.leader_id != request_id
+                else flight.subscribe()
+            )
+            async with contextlib.aclosing(run_events):
+                async for event in run_events:
+                    if event["event"] == "complete":
+                        outcome = "completed"
+                    elif event["event"] == "error":
+                        # Already logged by the run itself
+                        outcome = None
+                    yield event
         finally:
-            session.close()
+            if flight is not None:
+                if outcome is not None:
+                    log_run(flight, outcome)
+            elif ticket is not None:
+                ticket.release()
+
+    async def event_stream() -> AsyncIterator[dict[str, str]]:
+        first_sent = False
+        outcome = "cancelled"
+        try:
+            async with contextlib.aclosing(subscriber_events()) as events:
+                async for event in events:
+                    if not first_sent:
+                        first_sent = True
+                        CHAT_FIRST_EVENT.observe(
+                            time.monotonic() - start_time
+                        )
+                    if event["event"] == "complete":
+                        outcome = "completed"
+                    elif event["event"] == "error":
+                        outcome = "error"
+                    yield event
+        finally:
+            CHAT_DURATION.observe(
+                time.monotonic() - start_time, outcome=outcome
+            )
+
+    def release_unstarted() -> None:
+        # Frees the slot if the stream is torn down before it starts
+        if ticket is not None and flight is None:
+            ticket.release()
+
+    return EventSourceResponse(
+        event_stream(),
+        sep="\n",
+        background=BackgroundTask(release_unstarted),
+    )
+
+
+def _etag(request: Request, tables: tuple[str, ...]) -> str:
+    """Strong ETag for this URL at the current data versions."""
+    versions: DataVersions = getattr(
+        request.app.state, "data_versions", data_versions
+    )
+    identity = (
+        f"{request.url.path}?{request.url.query}"
+        f"|{versions.token(*tables)}"
+    )
+    return f'"{hashlib.sha256(identity.encode()).hexdigest()[:32]}"'
+
+
+def _not_modified(request: Request, etag: str, *, found: bool = False) -> bool:
+    """Whether If-None-Match matches; found says the resource exists.
+
+    A listed tag can be checked before any query, since it was only
+    issued for a resource that existed at these data versions. "*"
+    matches only once the resource has been loaded.
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return found
+    # GET compares weakly, so a W/ prefix still matches
+    tags = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in tags
+
+
+@contextlib.asynccontextmanager
+async def _read_deps(request: Request) -> AsyncIterator[AgentDeps]:
+    """Deps for a REST read, mapping tool errors to HTTP errors."""
+    async with _agent_deps(
+        request.app.state.session_factory,
+        request.app.state.agent_logger,
+        str(uuid.uuid4()),
+        getattr(request.app.state, "tool_cache", None),
+    ) as deps:
+        try:
+            yield deps
+        except OrderNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except ToolInputError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.get("/orders/{code}", response_model=OrderInfo)
+async def get_order(
+    code: str, request: Request, response: Response
+) -> OrderInfo | Response:
+    etag = _etag(request, ORDER_TABLES)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    async with _read_deps(request) as deps:
+        info = await fetch_order_info(deps, code)
+    if _not_modified(request, etag, found=True):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return info
+
+
+@router.get("/companies/{name}/orders", response_model=OrderSummaryPage)
+async def get_company_orders(
+    name: str,
+    request: Request,
+    response: Response,
+    status: str | None = None,
+    product_name: str | None = None,
+    start_from: str | None = None,
+    start_to: str | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = ORDER_PAGE_SIZE,
+) -> OrderSummaryPage | Response:
+    """One page of a company's orders, oldest start date first."""
+    etag = _etag(request, ORDER_TABLES)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    order_filter = OrderFilter(
+        status=status,
+        product_name=product_name,
+        start_from=start_from,
+        start_to=start_to,
+    )
+    async with _read_deps(request) as deps:
+        page = await fetch_company_orders(
+            deps, name, order_filter, cursor=cursor, limit=limit
+        )
+    if _not_modified(request, etag, found=True):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return page
+
+
+@router.get("/orders/{code}/sentiment", response_model=SentimentInfo)
+async def get_order_sentiment(
+    code: str, request: Request, response: Response
+) -> SentimentInfo | Response:
+    etag = _etag(request, SENTIMENT_TABLES)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    async with _read_deps(request) as deps:
+        info = await fetch_order_sentiment(deps, code)
+    if info is None:
+        raise HTTPException(
+            status_code=404, detail=f"No messages found for order {code}"
+        )
+    if _not_modified(request, etag, found=True):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return info
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Latency histograms and counters in the Prometheus text format."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
 
-    return EventSourceResponse(event_stream(), sep="\n")
+@router.get("/stats")
+def stats(request: Request) -> dict[str, Any]:
+    """Operational counters and the storage settings in effect."""
+    tool_cache: ToolCache | None = getattr(
+        request.app.state, "tool_cache", None
+    )
+    admission: AdmissionControl | None = getattr(
+        request.app.state, "admission", None
+    )
+    coalescer: SingleFlight | None = getattr(
+        request.app.state, "coalescer", None
+    )
+    return {
+        "storage": read_storage_settings(request.app.state.engine),
+        "tool_cache": tool_cache.stats() if tool_cache else None,
+        "admission": admission.stats() if admission else None,
+        "coalescing": coalescer.stats() if coalescer else None,
+    }
@@ -1,22 +1,88 @@
 from pathlib import Path
+from typing import Literal
 
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
 # Anchor to backend/ directory: config.py → ops_agent/ → src/ → backend/
 BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
 
 
+class SqliteProfile(BaseModel):
+    """Connection PRAGMAs and pool sizing for SQLite engines.
+
+    Set from the environment as SQLITE__<FIELD>, e.g. SQLITE__MMAP_SIZE.
+    """
+
+    journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST"] = "WAL"
+    synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -64_000  # negative values are KiB
+    temp_store: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    busy_timeout_ms: int = 5_000
+    # File databases only; in-memory URLs share one connection
+    pool_size: int = 5
+    max_overflow: int = 10
+    optimize_interval_s: float = 3600.0
+
+
+class AdmissionLimits(BaseModel):
+    """Concurrency limits for /api/chat.
+
+    Set from the environment as ADMISSION__<FIELD>.
+    """
+
+    max_in_flight: int = 8
+    max_queue: int = 32
+    max_wait_s: float = 30.0
+
+
+class AgentLogOptions(BaseModel):
+    """Format, rotation and batching of agent.log.
+
+    Set from the environment as AGENT_LOG__<FIELD>.
+    """
+
+    format: Literal["text", "json"] = "text"
+    max_bytes: int = 10 * 1024 * 1024
+    # A TimedRotatingFileHandler "when" (e.g. "midnight") rotates by
+    # time instead of size
+    rotate_when: str | None = None
+    backup_count: int = 5
+    # A batch is written and flushed at this size or after the interval
+    batch_size: int = 100
+    flush_interval_s: float = 0.5
+
+
 class Settings(BaseSettings):
     anthropic_api_key: str = ""
     database_url: str = f"sqlite:///{BACKEND_DIR / 'data' / 'ops.db'}"
     log_level: str = "INFO"
     data_dir: Path = BACKEND_DIR / "data"
     log_dir: Path = BACKEND_DIR / "logs"
+    agent_log: AgentLogOptions = AgentLogOptions()
     static_dir: Path = BACKEND_DIR / "static"
+    # Serve /api/chat from aiosqlite-backed repositories
+    async_repositories: bool = False
+    # Answer plain "status of ORD-1234"-style queries without the LLM
+    fast_path_enabled: bool = True
+    # Anthropic prompt-cache TTL for instructions and tool schemas
+    anthropic_prompt_cache: Literal["off", "5m", "1h"] = "5m"
+    # Cross-request tool result cache; 0 entries disables it
+    tool_cache_max_entries: int = 1024
+    tool_cache_ttl_s: float = 300.0
+    # How often to re-read data versions, catching reseeds by other
+    # processes; also bounds how long a stale ETag or cache entry lives
+    data_versions_refresh_s: float = 1.0
+    sqlite: SqliteProfile = SqliteProfile()
+    admission: AdmissionLimits = AdmissionLimits()
+    # Identical concurrent chat queries share one run
+    coalesce_chat: bool = True
 
     model_config = {
         "env_file": (str(BACKEND_DIR.parent / ".env"), ".env"),
         "env_file_encoding": "utf-8",
+        "env_nested_delimiter": "__",
     }
 
 
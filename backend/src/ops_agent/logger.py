@@ -1,24 +1,182 @@
+"""Agent request/error log, written off the event loop.
+
+Callers only enqueue records. A background thread drains the queue in
+batches into a rotating agent.log and flushes once per batch, so a slow
+disk never stalls a request. The file is either the classic key=value
+text or JSON lines carrying full ids and per-phase timings.
+"""
+
+import json
 import logging
+import queue
+import threading
+import time
+from datetime import UTC, datetime
+from logging.handlers import (
+    QueueHandler,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
 from pathlib import Path
+from typing import Any
+
+from ops_agent.config import AgentLogOptions
 
 LOG_FORMAT = "%(asctime)s - [%(name)s] - %(message)s"
 LOG_DATEFMT = "%Y-%m-%dT%H:%M:%S"
 
+_STOP = object()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, then the event fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname.lower(),
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            entry.update(fields)
+        else:
+            entry["message"] = record.getMessage()
+        return json.dumps(entry, default=str)
+
+
+class _BatchFlush:
+    """File handler mixin that skips per-record flushes while deferred."""
+
+    deferred = False
+
+    def flush(self) -> None:
+        if not self.deferred:
+            super().flush()  # type: ignore[misc]
+
+
+class _SizeRotatingHandler(_BatchFlush, RotatingFileHandler):
+    pass
+
+
+class _TimeRotatingHandler(_BatchFlush, TimedRotatingFileHandler):
+    pass
+
+
+class _BatchWriter:
+    """Drains queued records into a handler from a daemon thread.
+
+    A batch closes at batch_size records or flush_interval_s after its
+    first record, whichever comes first, and is flushed once.
+    """
+
+    def __init__(
+        self,
+        records: "queue.SimpleQueue[Any]",
+        handler: _SizeRotatingHandler | _TimeRotatingHandler,
+        batch_size: int,
+        flush_interval_s: float,
+    ) -> None:
+        self._records = records
+        self._handler = handler
+        self._batch_size = max(1, batch_size)
+        self._flush_interval_s = flush_interval_s
+        self._thread = threading.Thread(
+            target=self._run, name="agent-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            record = self._records.get()
+            if record is _STOP:
+                break
+            batch = [record]
+            deadline = time.monotonic() + self._flush_interval_s
+            while len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    record = self._records.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, batch: list[logging.LogRecord]) -> None:
+        self._handler.deferred = True
+        try:
+            for record in batch:
+                self._handler.handle(record)
+        finally:
+            self._handler.deferred = False
+        self._handler.flush()
+
+    def stop(self) -> None:
+        """Write everything queued so far, then end the thread."""
+        self._records.put(_STOP)
+        self._thread.join()
+        self._handler.close()
+
 
 class AgentLogger:
     """Structured logger for agent interactions."""
 
-    def __init__(self, log_dir: Path = Path("logs")) -> None:
+    def __init__(
+        self,
+        log_dir: Path = Path("logs"),
+        options: AgentLogOptions | None = None,
+        *,
+        name: str = "ops_agent",
+    ) -> None:
         log_dir.mkdir(exist_ok=True)
-        self._logger = logging.getLogger("ops_agent")
+        options = options or AgentLogOptions()
+        self._logger = logging.getLogger(name)
+        self._writer: _BatchWriter | None = None
+        self._queue_handler: QueueHandler | None = None
         if not self._logger.handlers:
-            handler = logging.FileHandler(log_dir / "agent.log")
-            handler.setFormatter(
-                logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT)
-            )
-            self._logger.addHandler(handler)
+            self._start_writer(log_dir / "agent.log", options)
         self._logger.setLevel(logging.INFO)
 
+    def _start_writer(self, path: Path, options: AgentLogOptions) -> None:
+        handler: _SizeRotatingHandler | _TimeRotatingHandler
+        if options.rotate_when:
+            handler = _TimeRotatingHandler(
+                path,
+                when=options.rotate_when,
+                backupCount=options.backup_count,
+                encoding="utf-8",
+            )
+        else:
+            handler = _SizeRotatingHandler(
+                path,
+                maxBytes=options.max_bytes,
+                backupCount=options.backup_count,
+                encoding="utf-8",
+            )
+        handler.setFormatter(
+            JsonLinesFormatter()
+            if options.format == "json"
+            else logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT)
+        )
+        records: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._writer = _BatchWriter(
+            records, handler, options.batch_size, options.flush_interval_s
+        )
+        self._queue_handler = QueueHandler(records)
+        self._logger.addHandler(self._queue_handler)
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer this logger started."""
+        if self._writer is None or self._queue_handler is None:
+            return
+        self._logger.removeHandler(self._queue_handler)
+        self._writer.stop()
+        self._writer = None
+        self._queue_handler = None
+
     def log_request(
         self,
         *,
@@ -29,19 +187,56 @@ class AgentLogger:
         output_tokens: int,
         tools_called: list[str],
         duration_ms: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        outcome: str = "completed",
+        coalesced_with: str | None = None,
+        phases_ms: dict[str, int] | None = None,
+        queries: int | None = None,
     ) -> None:
+        """coalesced_with names the request whose run this one joined;
+        queries is the number of SQL statements the run executed."""
+        fields: dict[str, Any] = {
+            "event": "request",
+            "request_id": request_id,
+            "outcome": outcome,
+            "query": query,
+            "model": model,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_read_tokens": cache_read_tokens,
+            "cache_write_tokens": cache_write_tokens,
+            "tools": tools_called,
+            "duration_ms": duration_ms,
+            "phases_ms": phases_ms or {},
+            "coalesced_with": coalesced_with,
+            "queries": queries,
+        }
         tools = ", ".join(tools_called)
         total = input_tokens + output_tokens
-        self._logger.info(
-            "request_id=%s query=%r model=%s "
-            "tokens=%d tools=[%s] duration=%dms",
+        fmt = (
+            "request_id=%s outcome=%s query=%r model=%s "
+            "tokens=%d cache_read=%d cache_write=%d "
+            "tools=[%s] duration=%dms"
+        )
+        args: list[object] = [
             request_id[:8],
+            outcome,
             query,
             model,
             total,
+            cache_read_tokens,
+            cache_write_tokens,
             tools,
             duration_ms,
-        )
+        ]
+        if coalesced_with is not None:
+            fmt += " coalesced_with=%s"
+            args.append(coalesced_with[:8])
+        if queries is not None:
+            fmt += " queries=%d"
+            args.append(queries)
+        self._logger.info(fmt, *args, extra={"fields": fields})
 
     def log_error(
         self, *, request_id: str, tool_name: str, error: str
@@ -51,4 +246,12 @@ class AgentLogger:
             request_id[:8],
             tool_name,
             error,
+            extra={
+                "fields": {
+                    "event": "error",
+                    "request_id": request_id,
+                    "tool": tool_name,
+                    "error": error,
+                }
+            },
         )
@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 import logging
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
@@ -7,31 +9,95 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from ops_agent.agent.agent import create_agent
+from ops_agent.agent.cache import ToolCache
+from ops_agent.api.admission import AdmissionControl
+from ops_agent.api.coalescing import SingleFlight
 from ops_agent.api.routes import router
 from ops_agent.config import settings
 from ops_agent.logger import AgentLogger
-from ops_agent.models.base import get_engine, get_session_factory
+from ops_agent.models.base import (
+    Engine,
+    get_async_engine,
+    get_async_session_factory,
+    get_engine,
+    get_session_factory,
+    optimize_database,
+)
 from ops_agent.services.data_service import seed_database
+from ops_agent.services.data_versions import data_versions
 
 logging.basicConfig(level=getattr(logging, settings.log_level))
 logger = logging.getLogger(__name__)
 
 
+async def _optimize_periodically(engine: Engine, interval_s: float) -> None:
+    """Keep planner statistics fresh as the data grows."""
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await asyncio.to_thread(optimize_database, engine)
+        except Exception:
+            logger.exception("PRAGMA optimize failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     logger.info("Starting ops-agent...")
 
-    engine = get_engine(settings.database_url)
-    seed_database(engine, settings.data_dir)
+    engine = get_engine(settings.database_url, settings.sqlite)
+    if seed_database(engine, settings.data_dir):
+        optimize_database(engine, analyze=True)
+    data_versions.load(engine)
+    optimizer = asyncio.create_task(
+        _optimize_periodically(engine, settings.sqlite.optimize_interval_s)
+    )
+    version_refresher = asyncio.create_task(
+        data_versions.refresh_periodically(
+            engine, settings.data_versions_refresh_s
+        )
+    )
 
-    app.state.session_factory = get_session_factory(engine)
-    app.state.agent = create_agent()
-    app.state.agent_logger = AgentLogger(settings.log_dir)
+    app.state.engine = engine
+    app.state.data_versions = data_versions
+    async_engine = None
+    if settings.async_repositories:
+        async_engine = get_async_engine(
+            settings.database_url, settings.sqlite
+        )
+        app.state.session_factory = get_async_session_factory(async_engine)
+    else:
+        app.state.session_factory = get_session_factory(engine)
+    app.state.tool_cache = (
+        ToolCache(
+            data_versions,
+            max_entries=settings.tool_cache_max_entries,
+            ttl_s=settings.tool_cache_ttl_s,
+        )
+        if settings.tool_cache_max_entries > 0
+        else None
+    )
+    prompt_cache = settings.anthropic_prompt_cache
+    app.state.agent = create_agent(
+        prompt_cache_ttl=None if prompt_cache == "off" else prompt_cache
+    )
+    agent_logger = AgentLogger(settings.log_dir, settings.agent_log)
+    app.state.agent_logger = agent_logger
+    app.state.admission = AdmissionControl(settings.admission)
+    app.state.coalescer = (
+        SingleFlight(data_versions) if settings.coalesce_chat else None
+    )
 
     logger.info("ops-agent ready")
     yield
 
+    for task in (optimizer, version_refresher):
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    if async_engine is not None:
+        await async_engine.dispose()
     engine.dispose()
+    agent_logger.close()
     logger.info("ops-agent shut down")
 
 
@@ -0,0 +1,268 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+Histograms and counters are keyed by label values and guarded by a
+lock, since repository queries may be timed from worker threads.
+GET /api/metrics serves render().
+"""
+
+import abc
+import functools
+import inspect
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+# Seconds; spans a cached lookup up to a slow multi-step agent run
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _label_text(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Labels) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, "
+                f"got {tuple(labels)}"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    @abc.abstractmethod
+    def _samples(self) -> list[str]: ...
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Labels) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_label_text(self.labelnames, key)} {_number(v)}"
+            for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Labels,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+        # Per label set: non-cumulative bucket counts, sum
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = next(i for i, b in enumerate(self.buckets) if value <= b)
+        with self._lock:
+            counts, total = self._series.setdefault(
+                key, ([0] * len(self.buckets), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._series.items()
+            )
+        lines: list[str] = []
+        names = (*self.labelnames, "le")
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                labels = _label_text(names, (*key, _number(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(
+        self, name: str, help: str, labelnames: Labels = ()
+    ) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics[name] = metric
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+CHAT_DURATION = registry.histogram(
+    "ops_agent_chat_duration_seconds",
+    "End-to-end /api/chat time, from arrival to the stream ending.",
+    ("outcome",),
+)
+CHAT_FIRST_EVENT = registry.histogram(
+    "ops_agent_chat_first_event_seconds",
+    "Time from arrival to the first SSE event sent.",
+)
+ADMISSION_WAIT = registry.histogram(
+    "ops_agent_admission_wait_seconds",
+    "Time chat requests spent queued for a run slot.",
+)
+MODEL_REQUEST = registry.histogram(
+    "ops_agent_model_request_seconds",
+    "Latency of one streamed model request.",
+    ("model",),
+)
+TOOL_DURATION = registry.histogram(
+    "ops_agent_tool_duration_seconds",
+    "Agent tool execution time.",
+    ("tool",),
+)
+QUERY_DURATION = registry.histogram(
+    "ops_agent_repository_query_seconds",
+    "Repository method latency.",
+    ("query",),
+)
+# Statement counts, to spot a change that adds per-row queries
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TOOL_QUERIES = registry.histogram(
+    "ops_agent_tool_queries",
+    "SQL statements run by one tool call.",
+    ("tool",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+CHAT_QUERIES = registry.histogram(
+    "ops_agent_chat_queries",
+    "SQL statements run by one chat run.",
+    buckets=QUERY_COUNT_BUCKETS,
+)
+TOKENS = registry.counter(
+    "ops_agent_tokens_total",
+    "Model tokens by kind: input, output, cache_read, cache_write.",
+    ("kind",),
+)
+MODEL_FALLBACKS = registry.counter(
+    "ops_agent_model_fallbacks_total",
+    "Model failures that moved FallbackModel to its next model.",
+    ("error",),
+)
+TOOL_ERRORS = registry.counter(
+    "ops_agent_tool_errors_total",
+    "Tool calls that failed, as input (reported to the model) or internal.",
+    ("tool", "kind"),
+)
+
+
+def timed_query[F: Callable[..., Any]](func: F) -> F:
+    """Record a repository method's latency under its qualified name."""
+    query = func.__qualname__
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                QUERY_DURATION.observe(
+                    time.perf_counter() - start, query=query
+                )
+
+        return async_wrapper  # type: ignore[return-value]
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            QUERY_DURATION.observe(time.perf_counter() - start, query=query)
+
+    return wrapper  # type: ignore[return-value]
@@ -1,15 +1,27 @@
-from ops_agent.models.base import Base, get_engine, get_session_factory
+from ops_agent.models.base import (
+    Base,
+    get_async_engine,
+    get_async_session_factory,
+    get_engine,
+    get_session_factory,
+)
+from ops_agent.models.data_version import DataVersion
 from ops_agent.models.message import Message
 from ops_agent.models.order import Order
 from ops_agent.models.product import Product
+from ops_agent.models.seed_manifest import SeedManifest
 from ops_agent.models.user import User
 
 __all__ = [
     "Base",
+    "DataVersion",
     "Message",
     "Order",
     "Product",
+    "SeedManifest",
     "User",
+    "get_async_engine",
+    "get_async_session_factory",
     "get_engine",
     "get_session_factory",
 ]
@@ -1,17 +1,149 @@
-from sqlalchemy import Engine, create_engine
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event, make_url, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ops_agent.config import SqliteProfile
+from ops_agent.models.query_recorder import install_query_recorder
+
+# Async drivers substituted for the sync URL schemes we accept
+ASYNC_DRIVERS: dict[str, str] = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+# PRAGMAs reported by read_storage_settings
+STORAGE_PRAGMAS = [
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "temp_store",
+    "busy_timeout",
+]
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_engine(database_url: str) -> Engine:
-    connect_args = {}
-    if database_url.startswith("sqlite"):
-        connect_args["check_same_thread"] = False
-    return create_engine(database_url, connect_args=connect_args)
+def _is_memory_url(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.database in (None, "", ":memory:") or (
+        url.query.get("mode") == "memory"
+    )
+
+
+def _profile_pragmas(profile: SqliteProfile, memory: bool) -> dict[str, Any]:
+    pragmas: dict[str, Any] = {
+        "synchronous": profile.synchronous,
+        "cache_size": profile.cache_size,
+        "temp_store": profile.temp_store,
+        "busy_timeout": profile.busy_timeout_ms,
+    }
+    # WAL and mmap only apply to files
+    if not memory:
+        pragmas["journal_mode"] = profile.journal_mode
+        pragmas["mmap_size"] = profile.mmap_size
+    return pragmas
+
+
+def _engine_kwargs(
+    database_url: str, profile: SqliteProfile
+) -> dict[str, Any]:
+    if _is_memory_url(database_url):
+        # One shared connection, so every thread sees the same database
+        return {"poolclass": StaticPool}
+    return {
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+    }
+
+
+def _apply_profile(
+    engine: Engine, database_url: str, profile: SqliteProfile
+) -> None:
+    pragmas = _profile_pragmas(profile, _is_memory_url(database_url))
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, _record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def get_engine(
+    database_url: str, profile: SqliteProfile | None = None
+) -> Engine:
+    if not database_url.startswith("sqlite"):
+        engine = create_engine(database_url)
+        install_query_recorder(engine)
+        return engine
+    profile = profile or SqliteProfile()
+    engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},
+        **_engine_kwargs(database_url, profile),
+    )
+    _apply_profile(engine, database_url, profile)
+    install_query_recorder(engine)
+    return engine
 
 
 def get_session_factory(engine: Engine) -> sessionmaker[Session]:
     return sessionmaker(bind=engine)
+
+
+def to_async_url(database_url: str) -> str:
+    """Rewrite a sync database URL to use its async driver."""
+    scheme, sep, rest = database_url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_async_engine(
+    database_url: str, profile: SqliteProfile | None = None
+) -> AsyncEngine:
+    async_url = to_async_url(database_url)
+    if not database_url.startswith("sqlite"):
+        engine = create_async_engine(async_url)
+        install_query_recorder(engine.sync_engine)
+        return engine
+    profile = profile or SqliteProfile()
+    engine = create_async_engine(
+        async_url, **_engine_kwargs(database_url, profile)
+    )
+    _apply_profile(engine.sync_engine, database_url, profile)
+    install_query_recorder(engine.sync_engine)
+    return engine
+
+
+def get_async_session_factory(
+    engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=engine)
+
+
+def optimize_database(engine: Engine, *, analyze: bool = False) -> None:
+    """Refresh planner statistics; analyze=True forces a full ANALYZE."""
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE" if analyze else "PRAGMA optimize"))
+        conn.commit()
+
+
+def read_storage_settings(engine: Engine) -> dict[str, Any]:
+    """Report the PRAGMAs and pool a live connection is actually using."""
+    storage: dict[str, Any] = {"pool": engine.pool.status()}
+    with engine.connect() as conn:
+        for pragma in STORAGE_PRAGMAS:
+            storage[pragma] = conn.execute(
+                text(f"PRAGMA {pragma}")
+            ).scalar()
+    return storage
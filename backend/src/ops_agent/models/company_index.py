@@ -0,0 +1,86 @@
+"""SQLite FTS5 index over customer names for company search.
+
+Holds its own copy of ``users.username``, ``first_name`` and
+``last_name`` keyed by ``users.id``; triggers keep it in step with every
+write to ``users``. The unicode61 tokenizer splits on ``_`` and folds
+case and diacritics, so "chase construction" finds ``Chase_Construction``.
+"""
+
+import re
+
+from sqlalchemy import Connection, Select, column, literal_column, select, table, text
+
+COMPANY_INDEX_TABLE = "users_fts"
+
+_index = table(COMPANY_INDEX_TABLE, column("user_id"))
+
+_DDL = [
+    f"""CREATE VIRTUAL TABLE {COMPANY_INDEX_TABLE} USING fts5(
+        user_id UNINDEXED, username, first_name, last_name,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {COMPANY_INDEX_TABLE}_ai AFTER INSERT ON users BEGIN
+        INSERT INTO {COMPANY_INDEX_TABLE}
+            (user_id, username, first_name, last_name)
+        VALUES (new.id, new.username, new.first_name, new.last_name);
+    END""",
+    f"""CREATE TRIGGER {COMPANY_INDEX_TABLE}_ad AFTER DELETE ON users BEGIN
+        DELETE FROM {COMPANY_INDEX_TABLE} WHERE user_id = old.id;
+    END""",
+    f"""CREATE TRIGGER {COMPANY_INDEX_TABLE}_au AFTER UPDATE ON users BEGIN
+        DELETE FROM {COMPANY_INDEX_TABLE} WHERE user_id = old.id;
+        INSERT INTO {COMPANY_INDEX_TABLE}
+            (user_id, username, first_name, last_name)
+        VALUES (new.id, new.username, new.first_name, new.last_name);
+    END""",
+]
+
+_BACKFILL = f"""INSERT INTO {COMPANY_INDEX_TABLE}
+    (user_id, username, first_name, last_name)
+SELECT id, username, first_name, last_name FROM users"""
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def create_company_index(conn: Connection) -> None:
+    """Create the index and its triggers, backfilling existing users."""
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+        {"name": COMPANY_INDEX_TABLE},
+    ).first()
+    if exists:
+        return
+    for ddl in _DDL:
+        conn.execute(text(ddl))
+    conn.execute(text(_BACKFILL))
+
+
+def company_match_query(company_name: str) -> str | None:
+    """Turn free text into an FTS5 query: every token, prefix-matched.
+
+    Returns None when the name has no searchable tokens.
+    """
+    tokens = _TOKEN_RE.findall(company_name)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def company_user_ids(company_name: str) -> Select[tuple[str]] | None:
+    """Select ids of users whose username matches every token of the query.
+
+    First and last names are contact names ("Chase Admin"), not the
+    company, so the match is restricted to the username column.
+    """
+    query = company_match_query(company_name)
+    if query is None:
+        return None
+    return (
+        select(_index.c.user_id)
+        .select_from(_index)
+        .where(
+            literal_column(COMPANY_INDEX_TABLE).match(
+                f"{{username}} : ({query})"
+            )
+        )
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ops_agent.models.base import Base
+
+
+class DataVersion(Base):
+    """Monotonic per-table counter, bumped whenever a table's rows change."""
+
+    __tablename__ = "data_versions"
+
+    table_name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
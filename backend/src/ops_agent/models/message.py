@@ -15,4 +15,12 @@ class Message(Base):
     created_on: Mapped[str] = mapped_column(String, nullable=False)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
 
-    __table_args__ = (Index("ix_messages_conversation_id", "conversation_id"),)
+    __table_args__ = (
+        Index("ix_messages_conversation_id", "conversation_id"),
+        Index(
+            "ix_messages_conversation_sentiment_created",
+            "conversation_id",
+            "sentiment_label",
+            "created_on",
+        ),
+    )
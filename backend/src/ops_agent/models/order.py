@@ -2,6 +2,7 @@ from sqlalchemy import Boolean, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ops_agent.models.base import Base
+from ops_agent.models.product import Product
 from ops_agent.models.user import User
 
 
@@ -15,14 +16,24 @@ class Order(Base):
     start_date: Mapped[str] = mapped_column(String, nullable=False)
     end_date: Mapped[str] = mapped_column(String, nullable=False)
     status: Mapped[str] = mapped_column(String, nullable=False)
-    waste_type_id: Mapped[str] = mapped_column(String, nullable=True)
+    waste_type_id: Mapped[str] = mapped_column(
+        ForeignKey("products.id"), nullable=True
+    )
     access_details: Mapped[str] = mapped_column(String, default="")
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
 
     user: Mapped[User] = relationship(back_populates="orders")
+    product: Mapped[Product | None] = relationship()
 
     __table_args__ = (
         Index("ix_orders_code", "code"),
-        Index("ix_orders_user_id", "user_id"),
+        # Also serves (start_date, code) keyset paging within a company
+        Index(
+            "ix_orders_user_status_start",
+            "user_id",
+            "status",
+            "start_date",
+            "code",
+        ),
         Index("ix_orders_status", "status"),
     )
@@ -0,0 +1,86 @@
+"""Count the SQL statements run inside a scope, and their time.
+
+Engines from get_engine/get_async_engine report every statement to the
+scopes active in the current context. Scopes nest: a statement run in
+a tool call counts towards the tool's scope and the request's. Outside
+any scope the listeners cost one context-variable lookup.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration_s: float = 0.0
+    # Kept only when asked for, for failure messages in tests
+    statements: list[str] | None = None
+    parent: "QueryStats | None" = field(default=None, repr=False)
+
+    @property
+    def duration_ms(self) -> int:
+        return int(self.duration_s * 1000)
+
+
+_current: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def record_queries(*, keep_statements: bool = False) -> Iterator[QueryStats]:
+    """Collect statements run in this context until the block exits."""
+    stats = QueryStats(
+        statements=[] if keep_statements else None, parent=_current.get()
+    )
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    if _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    while stats is not None:
+        stats.count += 1
+        stats.duration_s += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+        stats = stats.parent
+
+
+def install_query_recorder(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
@@ -0,0 +1,17 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ops_agent.models.base import Base
+
+
+class SeedManifest(Base):
+    """Fingerprint of each CSV as of its last successful load."""
+
+    __tablename__ = "seed_manifest"
+
+    csv_name: Mapped[str] = mapped_column(String, primary_key=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    mtime_ns: Mapped[int] = mapped_column(Integer, nullable=False)
+    sha256: Mapped[str] = mapped_column(String, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    loaded_at: Mapped[str] = mapped_column(String, nullable=False)
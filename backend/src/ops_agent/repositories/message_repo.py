@@ -1,17 +1,88 @@
-from sqlalchemy import select
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from ops_agent.metrics import timed_query
 from ops_agent.models.message import Message
+from ops_agent.repositories.protocols import SentimentTally
+
+
+def _by_conversation_stmt(conversation_id: str) -> Select[tuple[Message]]:
+    return (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_on)
+    )
+
+
+def _label_counts_stmt(conversation_id: str) -> Select[tuple[str, int]]:
+    return (
+        select(Message.sentiment_label, func.count())
+        .where(
+            Message.conversation_id == conversation_id,
+            Message.is_deleted.is_not(True),
+        )
+        .group_by(Message.sentiment_label)
+    )
+
+
+def _flagged_stmt(conversation_id: str, limit: int) -> Select[tuple[str]]:
+    return (
+        select(Message.message)
+        .where(
+            Message.conversation_id == conversation_id,
+            Message.sentiment_label == "negative",
+            Message.is_deleted.is_not(True),
+        )
+        .order_by(Message.created_on.desc())
+        .limit(limit)
+    )
 
 
 class SqlMessageRepository:
     def __init__(self, session: Session) -> None:
         self._session = session
 
+    @timed_query
     def get_by_conversation(self, conversation_id: str) -> list[Message]:
-        stmt = (
-            select(Message)
-            .where(Message.conversation_id == conversation_id)
-            .order_by(Message.created_on)
-        )
+        stmt = _by_conversation_stmt(conversation_id)
         return list(self._session.scalars(stmt).all())
+
+    @timed_query
+    def get_sentiment_tally(
+        self, conversation_id: str, flagged_limit: int
+    ) -> SentimentTally:
+        counts = self._session.execute(_label_counts_stmt(conversation_id))
+        flagged = self._session.scalars(
+            _flagged_stmt(conversation_id, flagged_limit)
+        )
+        return SentimentTally(
+            counts={label: count for label, count in counts},
+            flagged=list(flagged),
+        )
+
+
+class AsyncSqlMessageRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    @timed_query
+    async def get_by_conversation(self, conversation_id: str) -> list[Message]:
+        stmt = _by_conversation_stmt(conversation_id)
+        result = await self._session.scalars(stmt)
+        return list(result.all())
+
+    @timed_query
+    async def get_sentiment_tally(
+        self, conversation_id: str, flagged_limit: int
+    ) -> SentimentTally:
+        counts = await self._session.execute(
+            _label_counts_stmt(conversation_id)
+        )
+        flagged = await self._session.scalars(
+            _flagged_stmt(conversation_id, flagged_limit)
+        )
+        return SentimentTally(
+            counts={label: count for label, count in counts},
+            flagged=list(flagged),
+        )
@@ -1,32 +1,184 @@
-from sqlalchemy import select
+from collections.abc import Iterable
+
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    false,
+    func,
+    select,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
+from ops_agent.metrics import timed_query
+from ops_agent.models.company_index import company_user_ids
 from ops_agent.models.order import Order
-from ops_agent.models.user import User
+from ops_agent.models.product import Product
+from ops_agent.repositories.protocols import OrderFilter, OrderKey, OrderPage
+
+
+def _by_code_stmt(code: str) -> Select[tuple[Order]]:
+    return (
+        select(Order)
+        .options(joinedload(Order.user), joinedload(Order.product))
+        .where(Order.code == code)
+    )
+
+
+def _many_by_code_stmt(codes: Iterable[str]) -> Select[tuple[Order]]:
+    return (
+        select(Order)
+        .options(joinedload(Order.user), joinedload(Order.product))
+        .where(Order.code.in_(set(codes)))
+    )
+
+
+def _by_code(orders: Iterable[Order]) -> dict[str, Order]:
+    found: dict[str, Order] = {}
+    for order in orders:
+        found.setdefault(order.code, order)
+    return found
+
+
+def _company_conditions(
+    company_name: str, order_filter: OrderFilter
+) -> list[ColumnElement[bool]]:
+    # Resolve the company through the FTS index, not a LIKE scan
+    user_ids = company_user_ids(company_name)
+    if user_ids is None:
+        return [false()]
+    conditions: list[ColumnElement[bool]] = [Order.user_id.in_(user_ids)]
+    if order_filter.status is not None:
+        conditions.append(Order.status == order_filter.status)
+    if order_filter.product_name is not None:
+        conditions.append(
+            Order.waste_type_id.in_(
+                select(Product.id).where(
+                    Product.name.icontains(
+                        order_filter.product_name, autoescape=True
+                    )
+                )
+            )
+        )
+    if order_filter.start_from is not None:
+        conditions.append(Order.start_date >= order_filter.start_from)
+    if order_filter.start_to is not None:
+        conditions.append(Order.start_date <= order_filter.start_to)
+    return conditions
+
+
+def _active_by_company_stmt(company_name: str) -> Select[tuple[Order]]:
+    return (
+        select(Order)
+        .options(joinedload(Order.user), joinedload(Order.product))
+        .where(
+            *_company_conditions(company_name, OrderFilter(status="Active"))
+        )
+    )
+
+
+def _page_stmt(
+    conditions: list[ColumnElement[bool]],
+    limit: int,
+    after: OrderKey | None,
+) -> Select[tuple[Order]]:
+    stmt = (
+        select(Order)
+        .options(joinedload(Order.user), joinedload(Order.product))
+        .where(*conditions)
+        .order_by(Order.start_date, Order.code)
+        # One extra row tells us whether another page exists
+        .limit(limit + 1)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(Order.start_date, Order.code) > after)
+    return stmt
+
+
+def _count_stmt(conditions: list[ColumnElement[bool]]) -> Select[tuple[int]]:
+    return select(func.count()).select_from(Order).where(*conditions)
+
+
+def _to_page(rows: list[Order], total: int, limit: int) -> OrderPage:
+    if len(rows) <= limit:
+        return OrderPage(orders=rows, total=total, next_key=None)
+    last = rows[limit - 1]
+    return OrderPage(
+        orders=rows[:limit],
+        total=total,
+        next_key=(last.start_date, last.code),
+    )
 
 
 class SqlOrderRepository:
     def __init__(self, session: Session) -> None:
         self._session = session
 
+    @timed_query
     def get_by_code(self, code: str) -> Order | None:
-        stmt = (
-            select(Order)
-            .options(joinedload(Order.user))
-            .where(Order.code == code)
-        )
-        return self._session.scalars(stmt).first()
+        return self._session.scalars(_by_code_stmt(code)).first()
 
+    @timed_query
+    def get_many_by_code(self, codes: Iterable[str]) -> dict[str, Order]:
+        """Fetch several orders in one query, keyed by code."""
+        stmt = _many_by_code_stmt(codes)
+        return _by_code(self._session.scalars(stmt).unique())
+
+    @timed_query
     def find_active_by_company(self, company_name: str) -> list[Order]:
-        # Convert "Chase Construction" → "%Chase_Construction%" for LIKE
-        like_pattern = f"%{company_name.replace(' ', '_')}%"
-        stmt = (
-            select(Order)
-            .join(User)
-            .options(joinedload(Order.user))
-            .where(
-                User.username.ilike(like_pattern),
-                Order.status == "Active",
-            )
-        )
+        stmt = _active_by_company_stmt(company_name)
         return list(self._session.scalars(stmt).unique().all())
+
+    @timed_query
+    def find_by_company(
+        self,
+        company_name: str,
+        order_filter: OrderFilter,
+        *,
+        limit: int,
+        after: OrderKey | None = None,
+    ) -> OrderPage:
+        conditions = _company_conditions(company_name, order_filter)
+        rows = self._session.scalars(_page_stmt(conditions, limit, after))
+        total = self._session.scalar(_count_stmt(conditions)) or 0
+        return _to_page(list(rows.unique().all()), total, limit)
+
+
+class AsyncSqlOrderRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    @timed_query
+    async def get_by_code(self, code: str) -> Order | None:
+        result = await self._session.scalars(_by_code_stmt(code))
+        return result.first()
+
+    @timed_query
+    async def get_many_by_code(
+        self, codes: Iterable[str]
+    ) -> dict[str, Order]:
+        result = await self._session.scalars(_many_by_code_stmt(codes))
+        return _by_code(result.unique())
+
+    @timed_query
+    async def find_active_by_company(self, company_name: str) -> list[Order]:
+        stmt = _active_by_company_stmt(company_name)
+        result = await self._session.scalars(stmt)
+        return list(result.unique().all())
+
+    @timed_query
+    async def find_by_company(
+        self,
+        company_name: str,
+        order_filter: OrderFilter,
+        *,
+        limit: int,
+        after: OrderKey | None = None,
+    ) -> OrderPage:
+        conditions = _company_conditions(company_name, order_filter)
+        rows = await self._session.scalars(
+            _page_stmt(conditions, limit, after)
+        )
+        total = await self._session.scalar(_count_stmt(conditions)) or 0
+        return _to_page(list(rows.unique().all()), total, limit)
@@ -1,11 +1,42 @@
+from collections.abc import Iterable
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from ops_agent.metrics import timed_query
 from ops_agent.models.product import Product
 
 
+def _many_stmt(product_ids: Iterable[str]) -> Select[tuple[Product]]:
+    return select(Product).where(Product.id.in_(set(product_ids)))
+
+
 class SqlProductRepository:
     def __init__(self, session: Session) -> None:
         self._session = session
 
+    @timed_query
     def get_by_id(self, product_id: str) -> Product | None:
         return self._session.get(Product, product_id)
+
+    @timed_query
+    def get_many(self, product_ids: Iterable[str]) -> dict[str, Product]:
+        """Fetch several products in one query, keyed by id."""
+        products = self._session.scalars(_many_stmt(product_ids))
+        return {p.id: p for p in products}
+
+
+class AsyncSqlProductRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    @timed_query
+    async def get_by_id(self, product_id: str) -> Product | None:
+        return await self._session.get(Product, product_id)
+
+    @timed_query
+    async def get_many(self, product_ids: Iterable[str]) -> dict[str, Product]:
+        """Fetch several products in one query, keyed by id."""
+        products = await self._session.scalars(_many_stmt(product_ids))
+        return {p.id: p for p in products}
@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import Protocol
 
 from ops_agent.models.message import Message
@@ -5,14 +7,88 @@ from ops_agent.models.order import Order
 from ops_agent.models.product import Product
 
 
+@dataclass(frozen=True)
+class SentimentTally:
+    """Message counts per sentiment label plus recent negative texts."""
+
+    counts: dict[str, int]
+    flagged: list[str]  # newest first
+
+
+@dataclass(frozen=True)
+class OrderFilter:
+    """Optional narrowing for company order listings; None matches any."""
+
+    status: str | None = None
+    product_name: str | None = None  # case-insensitive substring
+    start_from: str | None = None  # ISO date, inclusive
+    start_to: str | None = None  # ISO date, inclusive
+
+
+# Keyset position in (start_date, code) order
+OrderKey = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class OrderPage:
+    """One page of a company's orders in (start_date, code) order."""
+
+    orders: list[Order]
+    total: int  # matches across all pages
+    next_key: OrderKey | None  # resume after this key; None on the last page
+
+
 class OrderRepository(Protocol):
     def get_by_code(self, code: str) -> Order | None: ...
+    def get_many_by_code(self, codes: Iterable[str]) -> dict[str, Order]: ...
     def find_active_by_company(self, company_name: str) -> list[Order]: ...
+    def find_by_company(
+        self,
+        company_name: str,
+        order_filter: OrderFilter,
+        *,
+        limit: int,
+        after: OrderKey | None = None,
+    ) -> OrderPage: ...
 
 
 class MessageRepository(Protocol):
     def get_by_conversation(self, conversation_id: str) -> list[Message]: ...
+    def get_sentiment_tally(
+        self, conversation_id: str, flagged_limit: int
+    ) -> SentimentTally: ...
 
 
 class ProductRepository(Protocol):
     def get_by_id(self, product_id: str) -> Product | None: ...
+    def get_many(self, product_ids: Iterable[str]) -> dict[str, Product]: ...
+
+
+class AsyncOrderRepository(Protocol):
+    async def get_by_code(self, code: str) -> Order | None: ...
+    async def get_many_by_code(
+        self, codes: Iterable[str]
+    ) -> dict[str, Order]: ...
+    async def find_active_by_company(self, company_name: str) -> list[Order]: ...
+    async def find_by_company(
+        self,
+        company_name: str,
+        order_filter: OrderFilter,
+        *,
+        limit: int,
+        after: OrderKey | None = None,
+    ) -> OrderPage: ...
+
+
+class AsyncMessageRepository(Protocol):
+    async def get_by_conversation(self, conversation_id: str) -> list[Message]: ...
+    async def get_sentiment_tally(
+        self, conversation_id: str, flagged_limit: int
+    ) -> SentimentTally: ...
+
+
+class AsyncProductRepository(Protocol):
+    async def get_by_id(self, product_id: str) -> Product | None: ...
+    async def get_many(
+        self, product_ids: Iterable[str]
+    ) -> dict[str, Product]: ...
@@ -12,6 +12,11 @@ class OrderInfo(BaseModel):
     end_date: str
 
 
+class OrderBatch(BaseModel):
+    orders: list[OrderInfo]  # in the order the codes were asked for
+    not_found: list[str]
+
+
 class OrderSummaryInfo(BaseModel):
     code: str
     status: str
@@ -20,6 +25,12 @@ class OrderSummaryInfo(BaseModel):
     product_name: str
 
 
+class OrderSummaryPage(BaseModel):
+    orders: list[OrderSummaryInfo]
+    total: int
+    next_cursor: str | None
+
+
 class SentimentInfo(BaseModel):
     order_code: str
     overall_sentiment: str
@@ -28,3 +39,8 @@ class SentimentInfo(BaseModel):
     neutral: int
     negative: int
     flagged_messages: list[str]
+
+
+class OrderOverview(BaseModel):
+    order: OrderInfo
+    sentiment: SentimentInfo | None
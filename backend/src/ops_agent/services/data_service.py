@@ -1,21 +1,43 @@
-"""Smart CSV → SQLite seed loader.
+"""Streaming CSV → SQLite seed loader.
 
-First run: bulk-inserts all CSV rows.
-Subsequent runs: diffs CSV IDs vs DB IDs and inserts only new rows.
+Each CSV is read in fixed-size chunks and upserted with executemany, so
+memory stays flat however large the file is. A manifest of every CSV's
+size, mtime and SHA-256 is kept in the DB: unchanged files are skipped
+on a size/mtime match without being opened, and only files whose
+content changed are reloaded. Loading never deletes rows unless
+--prune is given, which removes those a reloaded CSV no longer has.
+
+Run:  uv run python -m ops_agent.services.data_service [--force] [--prune]
 """
 
+import argparse
 import csv
+import hashlib
+import itertools
 import logging
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
 from pathlib import Path
 
-from sqlalchemy import select, text
+from sqlalchemy import Connection, Table, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from ops_agent.models.base import Base, Engine
+from ops_agent.config import settings
+from ops_agent.models.base import (
+    Base,
+    Engine,
+    get_engine,
+    optimize_database,
+)
+from ops_agent.models.company_index import create_company_index
 from ops_agent.models.message import Message
 from ops_agent.models.order import Order
 from ops_agent.models.product import Product
+from ops_agent.models.seed_manifest import SeedManifest
 from ops_agent.models.user import User
+from ops_agent.services.data_versions import data_versions
 
 logger = logging.getLogger(__name__)
 
@@ -28,58 +50,244 @@ CSV_MODEL_MAP: list[tuple[str, type[Base]]] = [
 
 TRUTHY_STRINGS = {"true", "1", "yes"}
 
+# Replaced by wider composite indexes; dropped from older databases
+RETIRED_INDEXES = ("ix_orders_user_id",)
+
+CHUNK_SIZE = 5_000
+# Temp table of the ids a reload has read
+SEEN_IDS = "seed_seen_ids"
+HASH_BLOCK_SIZE = 1 << 20
+
+Coercer = Callable[[str], object]
+
 
 def _parse_bool(value: str) -> bool:
     return value.strip().lower() in TRUTHY_STRINGS
 
 
-def _row_to_model(model_cls: type[Base], row: dict[str, str]) -> Base:
-    """Convert a CSV row dict into an ORM instance, coercing types."""
-    kwargs: dict[str, object] = {}
-    for col in model_cls.__table__.columns:
-        raw = row.get(col.name)
-        if raw is None or raw == "":
-            kwargs[col.name] = None
-            continue
+def _column_coercers(table: Table) -> list[tuple[str, Coercer]]:
+    """Pick a CSV string → Python converter for each column, once per table."""
+    coercers: list[tuple[str, Coercer]] = []
+    for col in table.columns:
         col_type = str(col.type)
         if col_type == "BOOLEAN":
-            kwargs[col.name] = _parse_bool(raw)
+            coercers.append((col.name, _parse_bool))
         elif col_type == "FLOAT":
-            kwargs[col.name] = float(raw)
+            coercers.append((col.name, float))
         else:
-            kwargs[col.name] = raw
-    return model_cls(**kwargs)
+            coercers.append((col.name, str))
+    return coercers
 
 
-def seed_database(engine: Engine, data_dir: Path) -> None:
-    """Load CSV data into SQLite. Only inserts rows not already in DB."""
-    Base.metadata.create_all(engine)
+def _read_chunks(
+    csv_path: Path, coercers: list[tuple[str, Coercer]], chunk_size: int
+) -> Iterator[list[dict[str, object]]]:
+    """Yield coerced row dicts from a CSV, chunk_size rows at a time."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for batch in itertools.batched(csv.DictReader(f), chunk_size):
+            chunk: list[dict[str, object]] = []
+            for row in batch:
+                values: dict[str, object] = {}
+                for name, coerce in coercers:
+                    raw = row.get(name)
+                    values[name] = None if raw is None or raw == "" else coerce(raw)
+                chunk.append(values)
+            yield chunk
 
-    with Session(engine) as session:
-        for csv_name, model_cls in CSV_MODEL_MAP:
-            csv_path = data_dir / csv_name
-            if not csv_path.exists():
-                logger.warning("CSV not found: %s", csv_path)
-                continue
-
-            existing_ids = set(
-                session.scalars(
-                    select(text("id")).select_from(model_cls.__table__)
-                ).all()
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _sync_indexes(conn: Connection) -> None:
+    """Create indexes added since the database was first built.
+
+    create_all skips existing tables along with their indexes, so a
+    database seeded by an earlier version gets new ones only here.
+    """
+    existing = set(
+        conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+    )
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+                # Give the planner statistics for it straight away
+                conn.execute(text(f"ANALYZE {index.name}"))
+    for name in RETIRED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def _load_table(
+    conn: Connection,
+    csv_path: Path,
+    table: Table,
+    chunk_size: int,
+    *,
+    prune: bool = False,
+) -> int:
+    """Stream one CSV into its table, replacing rows with matching ids.
+
+    prune also deletes rows whose id is not in the CSV, in the caller's
+    transaction. Returns the number of CSV rows read.
+    """
+    [pk] = table.primary_key
+    if prune:
+        # Ids seen so far, kept in SQLite so memory stays flat. The DDL
+        # runs outside the transaction, so clear what a failed load left
+        conn.execute(
+            text(
+                f"CREATE TEMP TABLE IF NOT EXISTS {SEEN_IDS} "
+                "(id TEXT PRIMARY KEY)"
             )
+        )
+        conn.execute(text(f"DELETE FROM {SEEN_IDS}"))
+    record_ids = text(f"INSERT OR IGNORE INTO {SEEN_IDS} (id) VALUES (:id)")
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key],
+        set_={
+            c.name: stmt.excluded[c.name]
+            for c in table.columns
+            if not c.primary_key
+        },
+    )
+    coercers = _column_coercers(table)
+    read = 0
+    deleted = 0
+    start = time.perf_counter()
+    for chunk in _read_chunks(csv_path, coercers, chunk_size):
+        conn.execute(stmt, chunk)
+        if prune:
+            conn.execute(record_ids, [{"id": row[pk.name]} for row in chunk])
+        read += len(chunk)
+    if prune:
+        deleted = conn.execute(
+            text(
+                f"DELETE FROM {table.name} "
+                f"WHERE {pk.name} NOT IN (SELECT id FROM {SEEN_IDS})"
+            )
+        ).rowcount
+        conn.execute(text(f"DELETE FROM {SEEN_IDS}"))
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Loaded %s: %d rows, %d removed in %.2fs (%.0f rows/s)",
+        table.name,
+        read,
+        deleted,
+        elapsed,
+        read / elapsed if elapsed else 0.0,
+    )
+    return read
+
 
-            with open(csv_path, newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                new_rows = []
-                for row in reader:
-                    if row["id"] not in existing_ids:
-                        new_rows.append(_row_to_model(model_cls, row))
-
-            if new_rows:
-                session.add_all(new_rows)
-                session.commit()
-                logger.info(
-                    "Seeded %d new rows into %s", len(new_rows), model_cls.__tablename__
+def seed_database(
+    engine: Engine,
+    data_dir: Path,
+    *,
+    chunk_size: int = CHUNK_SIZE,
+    force: bool = False,
+    prune: bool = False,
+) -> dict[str, int]:
+    """Load changed CSVs into SQLite, skipping files the manifest matches.
+
+    force reloads every CSV regardless of the manifest; prune deletes
+    rows a reloaded CSV no longer has. Returns the number of rows loaded
+    per reloaded table.
+    """
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        create_company_index(conn)
+        _sync_indexes(conn)
+    with Session(engine) as session:
+        manifest = {
+            entry.csv_name: entry
+            for entry in session.scalars(select(SeedManifest))
+        }
+
+    loaded: dict[str, int] = {}
+    for csv_name, model_cls in CSV_MODEL_MAP:
+        csv_path = data_dir / csv_name
+        if not csv_path.exists():
+            logger.warning("CSV not found: %s", csv_path)
+            continue
+        table = model_cls.__table__
+        assert isinstance(table, Table)
+
+        stat = csv_path.stat()
+        entry = manifest.get(csv_name)
+        if (
+            not force
+            and entry is not None
+            and entry.size == stat.st_size
+            and entry.mtime_ns == stat.st_mtime_ns
+        ):
+            logger.info("Table %s already up to date", table.name)
+            continue
+
+        sha256 = _file_sha256(csv_path)
+        content_changed = (
+            force or entry is None or entry.sha256 != sha256
+        )
+        with engine.begin() as conn:
+            row_count = entry.row_count if entry is not None else 0
+            if content_changed:
+                row_count = _load_table(
+                    conn, csv_path, table, chunk_size, prune=prune
                 )
+                loaded[table.name] = row_count
+                data_versions.bump(conn, table.name)
             else:
-                logger.info("Table %s already up to date", model_cls.__tablename__)
+                logger.info("Table %s already up to date", table.name)
+            record = {
+                "csv_name": csv_name,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+                "row_count": row_count,
+                "loaded_at": datetime.now(UTC).isoformat(),
+            }
+            conn.execute(
+                sqlite_insert(SeedManifest)
+                .values(record)
+                .on_conflict_do_update(
+                    index_elements=["csv_name"], set_=record
+                )
+            )
+    if loaded:
+        # Only now are the bumped versions' rows visible to readers
+        data_versions.load(engine)
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Seed the ops database from the CSV data directory."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="reload every CSV, ignoring the manifest",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="delete rows a reloaded CSV no longer contains",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, settings.log_level))
+    engine = get_engine(settings.database_url, settings.sqlite)
+    if seed_database(
+        engine, settings.data_dir, force=args.force, prune=args.prune
+    ):
+        optimize_database(engine, analyze=True)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""In-process view of the persisted per-table data versions.
+
+Readers (the tool cache, ETags) consult the in-memory copy, so checking
+freshness never costs a query. Writers bump a table inside their own
+transaction and reload once it commits, so no reader sees a version
+whose rows are not yet visible. The server also re-reads the table on
+a short interval, which picks up reseeds made by other processes.
+"""
+
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import Connection, Engine, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ops_agent.models.data_version import DataVersion
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersions:
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self, engine: Engine) -> None:
+        """Replace the in-memory versions with those persisted in the DB."""
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(DataVersion.table_name, DataVersion.version)
+            ).all()
+        with self._lock:
+            self._versions = {name: version for name, version in rows}
+
+    async def refresh_periodically(self, engine: Engine, interval_s: float) -> None:
+        """Reload every interval_s seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await asyncio.to_thread(self.load, engine)
+            except Exception:
+                logger.exception("Reloading data versions failed")
+
+    def bump(self, conn: Connection, table_name: str) -> int:
+        """Advance a table's version as part of the caller's transaction.
+
+        The in-memory copy is untouched; call load() after the commit.
+        """
+        stmt = sqlite_insert(DataVersion).values(
+            table_name=table_name, version=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"version": DataVersion.version + 1},
+        ).returning(DataVersion.version)
+        return conn.execute(stmt).scalar_one()
+
+    def get(self, table_name: str) -> int:
+        return self._versions.get(table_name, 0)
+
+    def token(self, *table_names: str) -> str:
+        """A string that changes whenever any of the tables change."""
+        return ",".join(
+            f"{name}:{self.get(name)}" for name in sorted(table_names)
+        )
+
+
+data_versions = DataVersions()
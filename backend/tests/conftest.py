@@ -1,12 +1,32 @@
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
 from pathlib import Path
 
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ops_agent.models.base import get_engine, get_session_factory
-from ops_agent.repositories.message_repo import SqlMessageRepository
-from ops_agent.repositories.order_repo import SqlOrderRepository
-from ops_agent.repositories.product_repo import SqlProductRepository
+from ops_agent.agent.deps import AgentDeps
+from ops_agent.logger import AgentLogger
+from ops_agent.models.base import (
+    get_async_engine,
+    get_async_session_factory,
+    get_engine,
+    get_session_factory,
+)
+from ops_agent.models.query_recorder import QueryStats, record_queries
+from ops_agent.repositories.message_repo import (
+    AsyncSqlMessageRepository,
+    SqlMessageRepository,
+)
+from ops_agent.repositories.order_repo import (
+    AsyncSqlOrderRepository,
+    SqlOrderRepository,
+)
+from ops_agent.repositories.product_repo import (
+    AsyncSqlProductRepository,
+    SqlProductRepository,
+)
 from ops_agent.services.data_service import seed_database
 
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -41,3 +61,68 @@ def message_repo(db_session: Session) -> SqlMessageRepository:
 @pytest.fixture()
 def product_repo(db_session: Session) -> SqlProductRepository:
     return SqlProductRepository(db_session)
+
+
+@pytest.fixture()
+def deps(db_session: Session) -> AgentDeps:
+    return AgentDeps(
+        order_repo=SqlOrderRepository(db_session),
+        message_repo=SqlMessageRepository(db_session),
+        product_repo=SqlProductRepository(db_session),
+        logger=AgentLogger(Path("/tmp/test-logs")),
+        request_id="test-request",
+    )
+
+
+@pytest.fixture(scope="session")
+def db_file_url(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """Seeded on-disk DB, shared by sync seeding and async readers."""
+    url = f"sqlite:///{tmp_path_factory.mktemp('db') / 'ops.db'}"
+    engine = get_engine(url)
+    seed_database(engine, DATA_DIR)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture()
+async def async_session(db_file_url: str):
+    engine = get_async_engine(db_file_url)
+    session = get_async_session_factory(engine)()
+    yield session
+    await session.close()
+    await engine.dispose()
+
+
+@pytest.fixture()
+def async_order_repo(async_session: AsyncSession) -> AsyncSqlOrderRepository:
+    return AsyncSqlOrderRepository(async_session)
+
+
+@pytest.fixture()
+def async_message_repo(
+    async_session: AsyncSession,
+) -> AsyncSqlMessageRepository:
+    return AsyncSqlMessageRepository(async_session)
+
+
+@pytest.fixture()
+def async_product_repo(
+    async_session: AsyncSession,
+) -> AsyncSqlProductRepository:
+    return AsyncSqlProductRepository(async_session)
+
+
+@pytest.fixture()
+def query_budget() -> Callable[[int], AbstractContextManager[QueryStats]]:
+    """Fail if the block runs more than max_queries SQL statements."""
+
+    @contextmanager
+    def budget(max_queries: int) -> Iterator[QueryStats]:
+        with record_queries(keep_statements=True) as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"{stats.count} queries, budget {max_queries}:\n"
+            + "\n".join(stats.statements or [])
+        )
+
+    return budget
@@ -0,0 +1,84 @@
+"""Admission control tests — slots, FIFO queue, rejection and timeouts."""
+
+import asyncio
+
+import pytest
+
+from ops_agent.api.admission import (
+    AdmissionControl,
+    QueueFullError,
+    QueueTimeoutError,
+    Ticket,
+)
+from ops_agent.config import AdmissionLimits
+
+
+async def _drain(ticket: Ticket) -> list[int]:
+    return [position async for position in ticket.wait()]
+
+
+async def test_admits_up_to_limit_then_queues_then_rejects():
+    control = AdmissionControl(AdmissionLimits(max_in_flight=2, max_queue=1))
+    first, second = control.reserve(), control.reserve()
+    assert not first.queued and not second.queued
+    third = control.reserve()
+    assert third.queued and third.position() == 1
+    with pytest.raises(QueueFullError) as exc:
+        control.reserve()
+    assert exc.value.retry_after_s >= 1
+    stats = control.stats()
+    assert stats["in_flight"] == 2
+    assert stats["queued"] == 1
+    assert stats["rejected"] == 1
+
+
+async def test_released_slot_goes_to_queue_head_in_order():
+    control = AdmissionControl(AdmissionLimits(max_in_flight=1, max_queue=5))
+    holder = control.reserve()
+    a, b = control.reserve(), control.reserve()
+    assert (a.position(), b.position()) == (1, 2)
+    waiting_a = asyncio.create_task(_drain(a))
+    waiting_b = asyncio.create_task(_drain(b))
+    await asyncio.sleep(0)
+
+    holder.release()
+    assert await waiting_a == [1]
+    assert not waiting_b.done() and b.position() == 1
+    # A newcomer queues behind b instead of taking the freed slot
+    c = control.reserve()
+    assert c.queued and c.position() == 2
+
+    a.release()
+    assert await waiting_b == [2, 1]
+    for ticket in (b, c):
+        ticket.release()
+    stats = control.stats()
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 0
+    assert stats["admitted"] == 3
+
+
+async def test_wait_times_out_and_leaves_queue():
+    control = AdmissionControl(
+        AdmissionLimits(max_in_flight=1, max_queue=1, max_wait_s=0.05)
+    )
+    holder = control.reserve()
+    waiter = control.reserve()
+    with pytest.raises(QueueTimeoutError):
+        await _drain(waiter)
+    assert control.stats()["queued"] == 0
+    assert control.stats()["timed_out"] == 1
+    holder.release()
+    assert control.stats()["in_flight"] == 0
+
+
+async def test_abandoned_waiter_is_skipped():
+    control = AdmissionControl(AdmissionLimits(max_in_flight=1, max_queue=2))
+    holder = control.reserve()
+    gone, next_up = control.reserve(), control.reserve()
+    gone.release()
+    assert next_up.position() == 1
+    holder.release()
+    assert await _drain(next_up) == []
+    next_up.release()
+    assert control.stats()["in_flight"] == 0
@@ -1,19 +1,39 @@
 """Agent behavior tests — verify prompt → tool selection → output correctness."""
 
+import json
+from dataclasses import replace
 from pathlib import Path
+from typing import Any
 
+import httpx
 import pytest
-from pydantic_ai import Agent
+from anthropic import AsyncAnthropic
+from pydantic_ai import Agent, ToolCallPart
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models.anthropic import AnthropicModel
+from pydantic_ai.models.function import AgentInfo, FunctionModel
 from pydantic_ai.models.test import TestModel
+from pydantic_ai.providers.anthropic import AnthropicProvider
 
+from evals.cassette import CassetteMissError, CassetteModel
 from ops_agent.agent.agent import create_agent
 from ops_agent.agent.deps import AgentDeps
+from ops_agent.agent.records import ToolRecords
 from ops_agent.agent.schemas import AgentResponse
 from ops_agent.logger import AgentLogger
 from ops_agent.models.base import get_engine, get_session_factory
-from ops_agent.repositories.message_repo import SqlMessageRepository
-from ops_agent.repositories.order_repo import SqlOrderRepository
-from ops_agent.repositories.product_repo import SqlProductRepository
+from ops_agent.repositories.message_repo import (
+    AsyncSqlMessageRepository,
+    SqlMessageRepository,
+)
+from ops_agent.repositories.order_repo import (
+    AsyncSqlOrderRepository,
+    SqlOrderRepository,
+)
+from ops_agent.repositories.product_repo import (
+    AsyncSqlProductRepository,
+    SqlProductRepository,
+)
 from ops_agent.services.data_service import seed_database
 
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -47,11 +67,12 @@ def deps(seeded_engine):
 
 
 @pytest.mark.asyncio
-async def test_agent_has_three_tools(test_agent: Agent):
+async def test_agent_has_tools(test_agent: Agent):
     tool_names = list(test_agent._function_toolset.tools)
     assert "lookup_order" in tool_names
     assert "find_active_orders" in tool_names
     assert "get_order_sentiment" in tool_names
+    assert "get_order_overview" in tool_names
 
 
 @pytest.mark.asyncio
@@ -65,3 +86,207 @@ async def test_agent_calls_tools(test_agent: Agent, deps: AgentDeps):
     assert result.output is not None
     assert isinstance(result.output, AgentResponse)
     assert result.output.message
+
+
+@pytest.mark.asyncio
+async def test_agent_runs_on_async_repositories(test_agent: Agent, async_session):
+    """Tools await the aiosqlite-backed repositories transparently."""
+    async_deps = AgentDeps(
+        order_repo=AsyncSqlOrderRepository(async_session),
+        message_repo=AsyncSqlMessageRepository(async_session),
+        product_repo=AsyncSqlProductRepository(async_session),
+        logger=AgentLogger(Path("/tmp/test-logs")),
+        request_id="test-request-async",
+    )
+    result = await test_agent.run(
+        "How's the customer feeling about ORD-9910?",
+        deps=async_deps,
+    )
+    assert isinstance(result.output, AgentResponse)
+
+
+def _lookup_then_answer(
+    messages: list[ModelMessage], info: AgentInfo
+) -> ModelResponse:
+    """Look up two orders, then answer naming one of them."""
+    if len(messages) == 1:
+        return ModelResponse(
+            parts=[
+                ToolCallPart("lookup_order", {"order_code": "ORD-5353"}),
+                ToolCallPart("get_order_sentiment", {"order_code": "ORD-9910"}),
+                ToolCallPart("lookup_order", {"order_code": "ORD-1592"}),
+            ]
+        )
+    return ModelResponse(
+        parts=[
+            ToolCallPart(
+                "final_response",
+                {
+                    "message": "ORD-5353 is done; ORD-9910 needs a call.",
+                    "order_codes": ["ORD-5353", "ord-9910", "ORD-0000"],
+                },
+            )
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_response_fields_come_from_tool_records(deps: AgentDeps):
+    """The model names order codes; the data is attached server-side."""
+    agent = create_agent(model=FunctionModel(_lookup_then_answer))
+    result = await agent.run("Compare ORD-5353 and ORD-9910", deps=deps)
+    output = result.output
+    assert output.message == "ORD-5353 is done; ORD-9910 needs a call."
+    assert output.orders is not None
+    assert [o.code for o in output.orders] == ["ORD-5353"]
+    assert output.orders[0].product_name == "30 Yard Dumpster"
+    assert output.sentiment is not None
+    assert output.sentiment.message_count == 8
+    assert output.order_summaries is None
+
+
+@pytest.mark.asyncio
+async def test_response_without_codes_has_no_data(deps: AgentDeps):
+    agent = create_agent(
+        model=TestModel(
+            call_tools=[],
+            custom_output_args={
+                "message": "I can only help with rental operations.",
+                "order_codes": [],
+            },
+        )
+    )
+    result = await agent.run("What's the weather in Denver?", deps=deps)
+    assert result.output.orders is None
+    assert result.output.order_summaries is None
+    assert result.output.sentiment is None
+
+
+class _StubAnthropic:
+    """Answers the Messages API in-process and keeps each request body."""
+
+    def __init__(self) -> None:
+        self.requests: list[dict[str, Any]] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        first = len(self.requests) == 1
+        tool_use = (
+            {"name": "lookup_order", "input": {"order_code": "ORD-5353"}}
+            if first
+            else {
+                "name": "final_response",
+                "input": {"message": "Done.", "order_codes": ["ORD-5353"]},
+            }
+        )
+        return httpx.Response(
+            200,
+            json={
+                "id": f"msg_{len(self.requests)}",
+                "type": "message",
+                "role": "assistant",
+                "model": body["model"],
+                "content": [
+                    {"type": "tool_use", "id": f"tu_{len(self.requests)}"}
+                    | tool_use
+                ],
+                "stop_reason": "tool_use",
+                "stop_sequence": None,
+                "usage": {
+                    "input_tokens": 20,
+                    "output_tokens": 10,
+                    # Written on the first request, read back after
+                    "cache_creation_input_tokens": 1800 if first else 0,
+                    "cache_read_input_tokens": 0 if first else 1800,
+                },
+            },
+        )
+
+
+def _stub_anthropic_model(stub: _StubAnthropic) -> AnthropicModel:
+    client = AsyncAnthropic(
+        api_key="test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(stub)),
+    )
+    return AnthropicModel(
+        "claude-sonnet-4-5",
+        provider=AnthropicProvider(anthropic_client=client),
+    )
+
+
+@pytest.mark.asyncio
+async def test_prompt_and_tools_marked_cacheable(deps: AgentDeps):
+    stub = _StubAnthropic()
+    agent = create_agent(model=_stub_anthropic_model(stub))
+    result = await agent.run("What's the status of ORD-5353?", deps=deps)
+
+    assert len(stub.requests) == 2
+    for body in stub.requests:
+        system = body["system"]
+        assert isinstance(system, list)
+        assert system[-1]["cache_control"]["type"] == "ephemeral"
+        assert "Optimus" in system[-1]["text"]
+        tools = body["tools"]
+        assert tools[-1]["cache_control"]["type"] == "ephemeral"
+        assert all("cache_control" not in t for t in tools[:-1])
+
+    usage = result.usage()
+    assert usage.cache_write_tokens == 1800
+    assert usage.cache_read_tokens == 1800
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_can_be_disabled(deps: AgentDeps):
+    stub = _StubAnthropic()
+    agent = create_agent(
+        model=_stub_anthropic_model(stub), prompt_cache_ttl=None
+    )
+    await agent.run("What's the status of ORD-5353?", deps=deps)
+    body = stub.requests[0]
+    assert isinstance(body["system"], str)
+    assert all("cache_control" not in t for t in body["tools"])
+
+
+def _no_llm(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+    raise AssertionError("replay must not call the model")
+
+
+@pytest.mark.asyncio
+async def test_cassette_replays_recorded_run(deps: AgentDeps, tmp_path: Path):
+    query = "Compare ORD-5353 and ORD-9910"
+    recorder = create_agent(
+        model=CassetteModel(
+            FunctionModel(_lookup_then_answer), "record", tmp_path
+        )
+    )
+    recorded = await recorder.run(query, deps=deps)
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+    player = create_agent(
+        model=CassetteModel(FunctionModel(_no_llm), "replay", tmp_path)
+    )
+    replayed = await player.run(
+        query, deps=replace(deps, records=ToolRecords())
+    )
+    assert replayed.output == recorded.output
+
+    with pytest.raises(CassetteMissError):
+        await player.run("Is ORD-1592 done?", deps=deps)
+
+
+async def test_cassette_replays_streamed_run(deps: AgentDeps, tmp_path: Path):
+    query = "What's the status of ORD-5353?"
+    recorder = create_agent(model=CassetteModel(TestModel(), "record", tmp_path))
+    async with recorder.run_stream(query, deps=deps) as result:
+        recorded = await result.get_output()
+    assert list(tmp_path.glob("*.json"))
+
+    player = create_agent(
+        model=CassetteModel(FunctionModel(_no_llm), "replay", tmp_path)
+    )
+    async with player.run_stream(
+        query, deps=replace(deps, records=ToolRecords())
+    ) as result:
+        replayed = await result.get_output()
+    assert replayed == recorded
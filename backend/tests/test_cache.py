@@ -0,0 +1,158 @@
+"""Tool cache tests — hits, bounds, expiry and data-version invalidation."""
+
+import asyncio
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine
+
+from ops_agent.agent.cache import ToolCache
+from ops_agent.agent.deps import AgentDeps
+from ops_agent.agent.tools import (
+    OrderNotFoundError,
+    fetch_company_orders,
+    fetch_order_info,
+    fetch_order_sentiment,
+)
+from ops_agent.models.base import get_engine
+from ops_agent.repositories.protocols import OrderFilter
+from ops_agent.services.data_service import seed_database
+from ops_agent.services.data_versions import DataVersions
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def db_url(tmp_path: Path) -> str:
+    """A database of the test's own, since these tests bump its versions."""
+    url = f"sqlite:///{tmp_path / 'ops.db'}"
+    engine = get_engine(url)
+    seed_database(engine, DATA_DIR)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture()
+def db_engine(db_url: str):
+    engine = get_engine(db_url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def versions(db_engine: Engine) -> DataVersions:
+    registry = DataVersions()
+    registry.load(db_engine)
+    return registry
+
+
+async def test_repeat_lookup_hits(deps: AgentDeps, versions: DataVersions):
+    cache = ToolCache(versions)
+    deps = replace(deps, tool_cache=cache)
+    first = await fetch_order_info(deps, "ORD-5353")
+    second = await fetch_order_info(deps, "ORD-5353")
+    assert second == first
+    await fetch_order_sentiment(deps, "ORD-9910")
+    await fetch_order_sentiment(deps, "ORD-9910")
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+async def test_company_names_normalize(
+    deps: AgentDeps, versions: DataVersions
+):
+    cache = ToolCache(versions)
+    deps = replace(deps, tool_cache=cache)
+    active = OrderFilter(status="Active")
+    await fetch_company_orders(deps, "Chase Construction", active)
+    await fetch_company_orders(deps, "chase_construction", active)
+    assert cache.stats()["hits"] == 1
+
+
+async def test_errors_are_not_cached(
+    deps: AgentDeps, versions: DataVersions
+):
+    cache = ToolCache(versions)
+    deps = replace(deps, tool_cache=cache)
+    for _ in range(2):
+        with pytest.raises(OrderNotFoundError):
+            await fetch_order_info(deps, "ORD-0000")
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["misses"] == 2
+
+
+async def test_lru_eviction(deps: AgentDeps, versions: DataVersions):
+    cache = ToolCache(versions, max_entries=2)
+    deps = replace(deps, tool_cache=cache)
+    for code in ("ORD-5353", "ORD-1592", "ORD-5353", "ORD-9910"):
+        await fetch_order_info(deps, code)
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    # ORD-1592 was least recently used, so it went first
+    await fetch_order_info(deps, "ORD-5353")
+    assert cache.stats()["hits"] == 2
+
+
+async def test_ttl_expiry(deps: AgentDeps, versions: DataVersions):
+    clock = _Clock()
+    cache = ToolCache(versions, ttl_s=10.0, clock=clock)
+    deps = replace(deps, tool_cache=cache)
+    await fetch_order_info(deps, "ORD-5353")
+    clock.now = 11.0
+    await fetch_order_info(deps, "ORD-5353")
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+async def test_version_bump_invalidates(
+    db_engine: Engine, deps: AgentDeps, versions: DataVersions
+):
+    cache = ToolCache(versions)
+    deps = replace(deps, tool_cache=cache)
+    await fetch_order_info(deps, "ORD-5353")
+    await fetch_order_sentiment(deps, "ORD-9910")
+    with db_engine.connect() as conn:
+        versions.bump(conn, "messages")
+        # Not committed yet, so still the old version
+        assert versions.get("messages") == 1
+        conn.commit()
+    versions.load(db_engine)
+    # Only tools reading messages see the new version
+    await fetch_order_info(deps, "ORD-5353")
+    await fetch_order_sentiment(deps, "ORD-9910")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+async def test_versions_refresh_picks_up_other_writers(
+    db_url: str, versions: DataVersions
+):
+    engine = get_engine(db_url)
+    refreshed = DataVersions()
+    refreshed.load(engine)
+    before = refreshed.get("orders")
+    refresher = asyncio.create_task(refreshed.refresh_periodically(engine, 0.01))
+    try:
+        # A reseed by another process, through its own engine
+        other = get_engine(db_url)
+        with other.begin() as conn:
+            versions.bump(conn, "orders")
+        other.dispose()
+        for _ in range(100):
+            if refreshed.get("orders") != before:
+                break
+            await asyncio.sleep(0.01)
+        assert refreshed.get("orders") == before + 1
+    finally:
+        refresher.cancel()
+        engine.dispose()
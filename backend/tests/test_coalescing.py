@@ -0,0 +1,77 @@
+"""Single-flight tests — shared runs, replay, cancellation and keys."""
+
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator
+
+from ops_agent.api.coalescing import Event, SingleFlight
+from ops_agent.models.base import Base, get_engine
+from ops_agent.services.data_versions import DataVersions
+
+
+def _numbered(gate: asyncio.Event, log: list[str]) -> AsyncGenerator[Event]:
+    async def run() -> AsyncGenerator[Event]:
+        try:
+            yield {"event": "thinking", "data": "1"}
+            await gate.wait()
+            yield {"event": "complete", "data": "2"}
+            log.append("finished")
+        except asyncio.CancelledError:
+            log.append("cancelled")
+            raise
+
+    return run()
+
+
+async def _collect(events: AsyncIterator[Event]) -> list[str]:
+    return [event["data"] async for event in events]
+
+
+async def test_late_subscriber_replays_then_follows():
+    gate, log = asyncio.Event(), []
+    coalescer = SingleFlight(DataVersions())
+    key = coalescer.key("active orders")
+    flight = coalescer.lead(key, None, "leader", _numbered(gate, log))
+    first = asyncio.create_task(_collect(flight.subscribe()))
+    await asyncio.sleep(0)
+    assert coalescer.find(coalescer.key(" active   orders ")) is flight
+    # Looking a run up is not joining it
+    assert coalescer.stats()["joined"] == 0
+    second = asyncio.create_task(_collect(coalescer.follow(flight)))
+    gate.set()
+    assert await first == await second == ["1", "2"]
+    assert log == ["finished"]
+    # A finished run is never joined
+    assert coalescer.find(key) is None
+    assert coalescer.stats() == {"in_flight": 0, "led": 1, "joined": 1}
+
+
+async def test_run_outlives_all_but_the_last_subscriber():
+    gate, log = asyncio.Event(), []
+    coalescer = SingleFlight(DataVersions())
+    flight = coalescer.lead(
+        coalescer.key("q"), None, "leader", _numbered(gate, log)
+    )
+    leaving = asyncio.create_task(_collect(flight.subscribe()))
+    staying = asyncio.create_task(_collect(flight.subscribe()))
+    await asyncio.sleep(0.01)
+    leaving.cancel()
+    await asyncio.sleep(0.01)
+    assert log == []
+    staying.cancel()
+    await asyncio.gather(leaving, staying, return_exceptions=True)
+    assert log == ["cancelled"]
+    assert flight.done
+
+
+async def test_reseed_starts_a_fresh_run():
+    # A database of its own, so the bump is not seen by other tests
+    engine = get_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    versions = DataVersions()
+    coalescer = SingleFlight(versions)
+    before = coalescer.key("q")
+    with engine.begin() as conn:
+        versions.bump(conn, "orders")
+    versions.load(engine)
+    assert coalescer.key("q") != before
+    engine.dispose()
@@ -0,0 +1,199 @@
+"""Seed loader tests — chunked CSV loading and the seed manifest."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, func, select, text
+
+from ops_agent.models.base import get_engine
+from ops_agent.models.company_index import company_user_ids
+from ops_agent.models.data_version import DataVersion
+from ops_agent.models.message import Message
+from ops_agent.models.order import Order
+from ops_agent.models.product import Product
+from ops_agent.models.seed_manifest import SeedManifest
+from ops_agent.models.user import User
+from ops_agent.services import data_service
+from ops_agent.services.data_service import seed_database
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+@pytest.fixture()
+def data_dir(tmp_path: Path) -> Path:
+    target = tmp_path / "data"
+    shutil.copytree(DATA_DIR, target)
+    return target
+
+
+@pytest.fixture()
+def seeded(data_dir: Path) -> Engine:
+    engine = get_engine("sqlite://")
+    seed_database(engine, data_dir)
+    return engine
+
+
+def test_chunked_load_matches_csv(data_dir: Path):
+    engine = get_engine("sqlite://")
+    loaded = seed_database(engine, data_dir, chunk_size=7)
+    assert loaded == {
+        "users": 10,
+        "products": 3,
+        "orders": 20,
+        "messages": 60,
+    }
+    with engine.connect() as conn:
+        product = conn.execute(
+            select(Product).where(Product.main_product_code == "DUMP-30")
+        ).one()
+        live_orders = conn.scalar(
+            select(func.count()).where(Order.is_deleted.is_(False))
+        )
+        manifest = conn.execute(
+            select(SeedManifest.csv_name, SeedManifest.row_count)
+        ).all()
+    assert product.included_tonnage_quantity == 4.0
+    assert live_orders == 20
+    assert ("messages.csv", 60) in manifest
+
+
+def test_unchanged_files_skip_without_hashing(
+    seeded: Engine, data_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    def fail(path: Path) -> str:
+        raise AssertionError(f"{path} should not be hashed")
+
+    monkeypatch.setattr(data_service, "_file_sha256", fail)
+    assert seed_database(seeded, data_dir) == {}
+
+
+def test_touched_but_identical_file_is_not_reloaded(
+    seeded: Engine, data_dir: Path
+):
+    orders_csv = data_dir / "orders.csv"
+    stat = orders_csv.stat()
+    os.utime(orders_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert seed_database(seeded, data_dir) == {}
+    # The new mtime is recorded, so the next boot skips in O(1) again
+    with seeded.connect() as conn:
+        mtime = conn.scalar(
+            select(SeedManifest.mtime_ns).where(
+                SeedManifest.csv_name == "orders.csv"
+            )
+        )
+    assert mtime == orders_csv.stat().st_mtime_ns
+
+
+def test_changed_file_is_reloaded(seeded: Engine, data_dir: Path):
+    orders_csv = data_dir / "orders.csv"
+    orders_csv.write_text(
+        orders_csv.read_text(encoding="utf-8").replace(
+            "Front driveway", "Side gate", 1
+        ),
+        encoding="utf-8",
+    )
+    with (data_dir / "messages.csv").open("a", encoding="utf-8") as f:
+        f.write(
+            "new-msg,conv-x,user-x,Where is my dumpster?,"
+            "negative,2026-02-01T00:00:00,False\n"
+        )
+    assert seed_database(seeded, data_dir) == {"orders": 20, "messages": 61}
+    with seeded.connect() as conn:
+        access = conn.scalar(
+            select(Order.access_details).where(Order.code == "ORD-5353")
+        )
+        total = conn.scalar(select(func.count()).select_from(Message))
+    assert access == "Side gate"
+    assert total == 61
+
+
+def test_reload_keeps_rows_missing_from_csv(seeded: Engine, data_dir: Path):
+    users_csv = data_dir / "users.csv"
+    header, _, *rest = users_csv.read_text(encoding="utf-8").splitlines()
+    users_csv.write_text("\n".join([header, *rest]) + "\n", encoding="utf-8")
+    assert seed_database(seeded, data_dir) == {"users": 9}
+    with seeded.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(User)) == 10
+
+
+def test_prune_deletes_rows_missing_from_csv(seeded: Engine, data_dir: Path):
+    users_csv = data_dir / "users.csv"
+    header, _, *rest = users_csv.read_text(encoding="utf-8").splitlines()
+    users_csv.write_text("\n".join([header, *rest]) + "\n", encoding="utf-8")
+    # What a load that failed part way leaves on the pooled connection
+    with seeded.connect() as conn:
+        conn.execute(
+            text(f"CREATE TEMP TABLE {data_service.SEEN_IDS} (id TEXT)")
+        )
+        conn.execute(text(f"INSERT INTO {data_service.SEEN_IDS} VALUES ('x')"))
+        conn.commit()
+    assert seed_database(seeded, data_dir, prune=True) == {"users": 9}
+    with seeded.connect() as conn:
+        usernames = set(conn.scalars(select(User.username)))
+        search = company_user_ids("Chase Construction")
+        assert search is not None
+        matches = conn.scalars(search).all()
+    assert len(usernames) == 9
+    assert "Chase_Construction" not in usernames
+    # The delete reaches the search index through its trigger
+    assert matches == []
+
+
+def test_force_reloads_everything(seeded: Engine, data_dir: Path):
+    loaded = seed_database(seeded, data_dir, force=True)
+    assert set(loaded) == {"users", "products", "orders", "messages"}
+
+
+def test_reload_bumps_data_versions(seeded: Engine, data_dir: Path):
+    with seeded.connect() as conn:
+        before = dict(
+            conn.execute(
+                select(DataVersion.table_name, DataVersion.version)
+            ).all()
+        )
+    assert set(before) == {"users", "products", "orders", "messages"}
+    orders_csv = data_dir / "orders.csv"
+    orders_csv.write_text(
+        orders_csv.read_text(encoding="utf-8").replace(
+            "Front driveway", "Side gate", 1
+        ),
+        encoding="utf-8",
+    )
+    seed_database(seeded, data_dir)
+    with seeded.connect() as conn:
+        after = dict(
+            conn.execute(
+                select(DataVersion.table_name, DataVersion.version)
+            ).all()
+        )
+    assert after == {**before, "orders": before["orders"] + 1}
+
+
+def test_existing_database_gets_new_indexes(seeded: Engine, data_dir: Path):
+    # The orders/messages indexes of a database built before they existed
+    with seeded.begin() as conn:
+        conn.execute(text("DROP INDEX ix_orders_user_status_start"))
+        conn.execute(text("DROP INDEX ix_messages_conversation_sentiment_created"))
+        conn.execute(text("CREATE INDEX ix_orders_user_id ON orders (user_id)"))
+    seed_database(seeded, data_dir)
+    with seeded.connect() as conn:
+        indexes = set(
+            conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+        )
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT code FROM orders "
+                    "WHERE user_id = 'u' AND status = 'Active' "
+                    "ORDER BY start_date, code"
+                )
+            )
+        )
+    assert "ix_orders_user_status_start" in indexes
+    assert "ix_messages_conversation_sentiment_created" in indexes
+    assert "ix_orders_user_id" not in indexes
+    assert "ix_orders_user_status_start" in plan
+    assert "TEMP B-TREE" not in plan
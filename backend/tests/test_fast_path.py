@@ -0,0 +1,77 @@
+"""Fast path tests — routing of simple order queries around the LLM."""
+
+import pytest
+
+from ops_agent.agent.deps import AgentDeps
+from ops_agent.agent.fast_path import (
+    FastPathIntent,
+    match_fast_path,
+    run_fast_path,
+)
+
+
+class TestMatchFastPath:
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "ORD-5353",
+            "What's the status of ORD-5353?",
+            "status of ord-5353",
+            "look up order ORD-5353",
+            "details for ORD-5353",
+        ],
+    )
+    def test_lookup_phrasings(self, query: str):
+        assert match_fast_path(query) == FastPathIntent(
+            "lookup_order", "ORD-5353"
+        )
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "sentiment on ORD-9910",
+            "How's the customer feeling about ORD-9910?",
+        ],
+    )
+    def test_sentiment_phrasings(self, query: str):
+        assert match_fast_path(query) == FastPathIntent(
+            "get_order_sentiment", "ORD-9910"
+        )
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "Compare ORD-5353 and ORD-9910",
+            "What's the status of ORD-5353 and is the customer happy?",
+            "How is everything going with ORD-9910?",
+            "Show me active orders for Chase Construction",
+            "status of my order",
+        ],
+    )
+    def test_ambiguous_queries_fall_through(self, query: str):
+        assert match_fast_path(query) is None
+
+
+class TestRunFastPath:
+    async def test_lookup(self, deps: AgentDeps):
+        response = await run_fast_path(
+            FastPathIntent("lookup_order", "ORD-5353"), deps
+        )
+        assert response.orders is not None
+        assert response.orders[0].product_name == "30 Yard Dumpster"
+        assert response.orders[0].customer == "Omaha Builders"
+
+    async def test_sentiment(self, deps: AgentDeps):
+        response = await run_fast_path(
+            FastPathIntent("get_order_sentiment", "ORD-9910"), deps
+        )
+        assert response.sentiment is not None
+        assert response.sentiment.message_count == 8
+        assert response.sentiment.negative == 3
+
+    async def test_not_found(self, deps: AgentDeps):
+        response = await run_fast_path(
+            FastPathIntent("lookup_order", "ORD-0000"), deps
+        )
+        assert response.orders is None
+        assert "ORD-0000" in response.message
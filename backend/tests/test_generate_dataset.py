@@ -0,0 +1,37 @@
+"""Dataset generator tests — reproducible output with a skewed load."""
+
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from benchmarks.generate_dataset import PRODUCTS, Scale, generate
+from ops_agent.models.base import get_engine
+from ops_agent.models.order import Order
+from ops_agent.services.data_service import seed_database
+
+
+def test_generated_dataset_seeds_with_skew(tmp_path: Path):
+    scale = Scale(companies=20, orders=400, messages=2_000)
+    written = generate(tmp_path / "a", scale, seed=7)
+    generate(tmp_path / "b", scale, seed=7)
+    for name in written:
+        a = (tmp_path / "a" / name).read_bytes()
+        assert a == (tmp_path / "b" / name).read_bytes()
+
+    engine = get_engine("sqlite://")
+    loaded = seed_database(engine, tmp_path / "a")
+    assert loaded == {
+        "users": 20,
+        "products": len(PRODUCTS),
+        "orders": 400,
+        "messages": 2_000,
+    }
+    with engine.connect() as conn:
+        per_owner = conn.scalars(
+            select(func.count())
+            .select_from(Order)
+            .group_by(Order.user_id)
+            .order_by(func.count().desc())
+        ).all()
+    # The top account holds many times the median account's orders
+    assert per_owner[0] > 5 * per_owner[len(per_owner) // 2]
@@ -0,0 +1,34 @@
+"""Load test tests — harvesting queries from agent logs for replay."""
+
+import uuid
+from pathlib import Path
+
+import pytest
+
+from benchmarks.load_test import harvest_queries
+from ops_agent.config import AgentLogOptions
+from ops_agent.logger import AgentLogger
+
+
+@pytest.mark.parametrize("log_format", ["text", "json"])
+def test_load_test_replays_logged_queries(tmp_path: Path, log_format: str):
+    agent_logger = AgentLogger(
+        tmp_path,
+        AgentLogOptions.model_validate({"format": log_format}),
+        name=f"ops_agent.test.{uuid.uuid4().hex}",
+    )
+    queries = ["Is ORD-5353 done?", "Who's \"Chase\"? It's 'urgent'"]
+    for query in queries:
+        agent_logger.log_request(
+            request_id=str(uuid.uuid4()),
+            query=query,
+            model="test",
+            input_tokens=0,
+            output_tokens=0,
+            tools_called=[],
+            duration_ms=1,
+        )
+    agent_logger.log_error(request_id="r", tool_name="chat", error="boom")
+    agent_logger.close()
+
+    assert harvest_queries([tmp_path / "agent.log"]) == queries
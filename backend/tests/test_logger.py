@@ -0,0 +1,83 @@
+"""Agent log tests — JSON lines, text format, batching and rotation."""
+
+import json
+import uuid
+from pathlib import Path
+
+from ops_agent.config import AgentLogOptions
+from ops_agent.logger import AgentLogger
+
+
+def _logger(tmp_path: Path, **options: object) -> AgentLogger:
+    # A fresh logger name per test, so each gets its own writer
+    return AgentLogger(
+        tmp_path,
+        AgentLogOptions.model_validate(options),
+        name=f"ops_agent.test.{uuid.uuid4().hex}",
+    )
+
+
+def _log_request(agent_logger: AgentLogger, request_id: str) -> None:
+    agent_logger.log_request(
+        request_id=request_id,
+        query="Is ORD-5353 done?",
+        model="test",
+        input_tokens=10,
+        output_tokens=5,
+        tools_called=["lookup_order"],
+        duration_ms=42,
+        phases_ms={"queue": 0, "model": 30, "tools": 7},
+    )
+
+
+def test_json_lines_carry_full_ids_and_phases(tmp_path: Path):
+    agent_logger = _logger(tmp_path, format="json")
+    request_id = str(uuid.uuid4())
+    _log_request(agent_logger, request_id)
+    agent_logger.log_error(
+        request_id=request_id, tool_name="chat", error="boom"
+    )
+    agent_logger.close()
+
+    lines = (tmp_path / "agent.log").read_text().splitlines()
+    request, error = (json.loads(line) for line in lines)
+    assert request["event"] == "request"
+    assert request["request_id"] == request_id
+    assert request["tools"] == ["lookup_order"]
+    assert request["phases_ms"] == {"queue": 0, "model": 30, "tools": 7}
+    assert error["level"] == "error"
+    assert error["request_id"] == request_id
+    assert error["error"] == "boom"
+
+
+def test_text_mode_keeps_key_value_lines(tmp_path: Path):
+    agent_logger = _logger(tmp_path)
+    _log_request(agent_logger, "abcdef0123456789")
+    agent_logger.close()
+
+    [line] = (tmp_path / "agent.log").read_text().splitlines()
+    assert "request_id=abcdef01 outcome=completed" in line
+    assert "tokens=15" in line
+    assert "tools=[lookup_order] duration=42ms" in line
+
+
+def test_records_are_written_in_batches(tmp_path: Path):
+    agent_logger = _logger(tmp_path, batch_size=1000, flush_interval_s=60)
+    for i in range(50):
+        _log_request(agent_logger, f"request-{i}")
+    # Nothing reaches the file until the batch closes
+    assert (tmp_path / "agent.log").read_text() == ""
+    agent_logger.close()
+    assert len((tmp_path / "agent.log").read_text().splitlines()) == 50
+
+
+def test_log_rotates_by_size(tmp_path: Path):
+    agent_logger = _logger(
+        tmp_path, max_bytes=1000, backup_count=2, batch_size=1
+    )
+    for i in range(30):
+        _log_request(agent_logger, f"request-{i}")
+    agent_logger.close()
+    assert (tmp_path / "agent.log.1").exists()
+    assert (tmp_path / "agent.log.2").exists()
+    assert not (tmp_path / "agent.log.3").exists()
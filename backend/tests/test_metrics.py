@@ -0,0 +1,88 @@
+"""Metrics tests — registry rendering and the instrumented code paths."""
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import FallbackExceptionGroup, ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart
+from pydantic_ai.models.fallback import FallbackModel
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from ops_agent.agent.agent import _count_fallbacks
+from ops_agent.metrics import MODEL_FALLBACKS, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram(
+        "test_seconds", "Test latency.", ("tool",), buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, tool='say "hi"')
+    lines = registry.render().splitlines()
+    assert lines[:2] == [
+        "# HELP test_seconds Test latency.",
+        "# TYPE test_seconds histogram",
+    ]
+    assert lines[2:] == [
+        'test_seconds_bucket{tool="say \\"hi\\"",le="0.1"} 1',
+        'test_seconds_bucket{tool="say \\"hi\\"",le="1.0"} 3',
+        'test_seconds_bucket{tool="say \\"hi\\"",le="+Inf"} 4',
+        'test_seconds_sum{tool="say \\"hi\\""} 4.25',
+        'test_seconds_count{tool="say \\"hi\\""} 4',
+    ]
+    assert latency.count(tool='say "hi"') == 4
+
+
+def test_counter_totals_per_label_set():
+    registry = MetricsRegistry()
+    tokens = registry.counter("test_total", "Tokens.", ("kind",))
+    tokens.inc(10, kind="input")
+    tokens.inc(5, kind="input")
+    tokens.inc(kind="output")
+    assert tokens.value(kind="input") == 15
+    assert registry.render().splitlines()[2:] == [
+        'test_total{kind="input"} 15.0',
+        'test_total{kind="output"} 1.0',
+    ]
+
+
+async def test_fallback_activations_are_counted():
+    def overloaded(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> ModelResponse:
+        raise ModelHTTPError(529, "primary", body="overloaded")
+
+    def answer(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        return ModelResponse(parts=[TextPart("ok")])
+
+    before = MODEL_FALLBACKS.value(error="ModelHTTPError")
+    last = FunctionModel(answer)
+    model = FallbackModel(
+        FunctionModel(overloaded),
+        last,
+        fallback_on=_count_fallbacks(last),
+    )
+    assert (await Agent(model).run("hi")).output == "ok"
+    assert MODEL_FALLBACKS.value(error="ModelHTTPError") == before + 1
+
+
+async def test_last_model_failing_is_not_a_fallback():
+    def overloaded(name: str) -> FunctionModel:
+        def raise_error(
+            messages: list[ModelMessage], info: AgentInfo
+        ) -> ModelResponse:
+            raise ModelHTTPError(529, name, body="overloaded")
+
+        return FunctionModel(raise_error, model_name=name)
+
+    before = MODEL_FALLBACKS.value(error="ModelHTTPError")
+    last = overloaded("haiku")
+    model = FallbackModel(
+        overloaded("sonnet"),
+        last,
+        fallback_on=_count_fallbacks(last),
+    )
+    with pytest.raises(FallbackExceptionGroup):
+        await Agent(model).run("hi")
+    # Sonnet fell back to Haiku; Haiku had nowhere to go
+    assert MODEL_FALLBACKS.value(error="ModelHTTPError") == before + 1
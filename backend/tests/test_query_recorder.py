@@ -0,0 +1,29 @@
+"""Query recorder tests — scopes, nesting and async engines."""
+
+from sqlalchemy import Engine, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ops_agent.models.query_recorder import record_queries
+
+
+def test_nested_scopes_both_count(db_engine: Engine):
+    with db_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # outside any scope
+        with record_queries() as outer:
+            conn.execute(text("SELECT 1"))
+            with record_queries(keep_statements=True) as inner:
+                conn.execute(text("SELECT 2"))
+    assert outer.count == 2
+    assert inner.count == 1
+    assert inner.statements == ["SELECT 2"]
+    assert outer.statements is None
+    assert outer.duration_s >= inner.duration_s > 0
+
+
+async def test_async_engine_statements_are_recorded(
+    async_session: AsyncSession,
+):
+    with record_queries() as stats:
+        await async_session.execute(text("SELECT 1"))
+        await async_session.execute(text("SELECT 2"))
+    assert stats.count == 2
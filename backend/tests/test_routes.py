@@ -0,0 +1,526 @@
+"""API tests — SSE phases and payloads from /api/chat."""
+
+import asyncio
+import json
+from collections.abc import AsyncGenerator, AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models.function import (
+    AgentInfo,
+    DeltaToolCall,
+    DeltaToolCalls,
+    FunctionModel,
+)
+from pydantic_ai.models.test import TestModel
+from sqlalchemy import Engine
+
+from ops_agent.agent.agent import create_agent
+from ops_agent.agent.cache import ToolCache
+from ops_agent.api.admission import AdmissionControl
+from ops_agent.api.coalescing import SingleFlight
+from ops_agent.api.routes import (
+    PARTIAL_DEBOUNCE_S,
+    _tool_status_message,
+    chat,
+    router,
+)
+from ops_agent.api.schemas import ChatRequest
+from ops_agent.config import AdmissionLimits
+from ops_agent.logger import AgentLogger
+from ops_agent.models.base import (
+    get_async_engine,
+    get_async_session_factory,
+    get_engine,
+    get_session_factory,
+)
+from ops_agent.services.data_service import seed_database
+from ops_agent.services.data_versions import DataVersions
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+def _no_llm(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+    raise AssertionError("the model must not be called")
+
+
+def _make_client(
+    db_engine: Engine, model: Any, versions: DataVersions | None = None
+) -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    app.state.engine = db_engine
+    app.state.session_factory = get_session_factory(db_engine)
+    app.state.agent = create_agent(model=model)
+    app.state.agent_logger = AgentLogger(Path("/tmp/test-logs"))
+    if versions is not None:
+        app.state.data_versions = versions
+    return TestClient(app)
+
+
+def _events(body: str) -> list[tuple[str, dict[str, Any]]]:
+    events: list[tuple[str, dict[str, Any]]] = []
+    event = ""
+    for line in body.splitlines():
+        if line.startswith("event:"):
+            event = line.removeprefix("event:").strip()
+        elif line.startswith("data:"):
+            data = json.loads(line.removeprefix("data:").strip())
+            events.append((event, data))
+    return events
+
+
+@pytest.fixture()
+def file_engine(db_file_url: str):
+    # TestClient serves from a worker thread, so use the on-disk DB
+    engine = get_engine(db_file_url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def client_without_llm(file_engine: Engine) -> TestClient:
+    return _make_client(file_engine, FunctionModel(_no_llm))
+
+
+def test_fast_path_skips_model(client_without_llm: TestClient):
+    resp = client_without_llm.post(
+        "/api/chat", json={"message": "What's the status of ORD-5353?"}
+    )
+    events = _events(resp.text)
+    assert [e for e, _ in events] == ["thinking", "tool_call", "complete"]
+    assert events[1][1]["message"] == "Looking up order ORD-5353..."
+    complete = events[-1][1]
+    assert complete["orders"][0]["code"] == "ORD-5353"
+    assert complete["orders"][0]["status"] == "Completed"
+
+
+def test_other_queries_use_agent(file_engine: Engine):
+    client = _make_client(file_engine, TestModel())
+    resp = client.post(
+        "/api/chat",
+        json={"message": "How is everything going with ORD-9910?"},
+    )
+    phases = [e for e, _ in _events(resp.text)]
+    assert phases[0] == "thinking"
+    assert "tool_call" in phases
+    assert phases[-1] == "complete"
+
+
+async def _streamed_answer(
+    messages: list[ModelMessage], info: AgentInfo
+) -> AsyncIterator[DeltaToolCalls]:
+    """Look up ORD-5353, then write the answer in two bursts."""
+    if len(messages) == 1:
+        yield {
+            0: DeltaToolCall(
+                name="lookup_order",
+                json_args='{"order_code": "ORD-5353"}',
+                tool_call_id="lookup",
+            )
+        }
+        return
+    yield {
+        0: DeltaToolCall(
+            name="final_response",
+            json_args='{"message": "ORD-5353 wrapped up',
+            tool_call_id="answer",
+        )
+    }
+    await asyncio.sleep(2 * PARTIAL_DEBOUNCE_S)
+    yield {
+        0: DeltaToolCall(
+            json_args=' on time.", "order_codes": ["ORD-5353"]}'
+        )
+    }
+
+
+def test_partial_answers_stream_before_complete(file_engine: Engine):
+    client = _make_client(
+        file_engine, FunctionModel(stream_function=_streamed_answer)
+    )
+    resp = client.post(
+        "/api/chat",
+        json={"message": "Is ORD-5353 done, and was it on time?"},
+    )
+    events = _events(resp.text)
+    phases = [e for e, _ in events]
+    assert phases[-1] == "complete"
+    partials = [data for e, data in events if e == "partial"]
+    assert len(partials) >= 2
+    assert phases.index("partial") > phases.index("tool_call")
+    final = events[-1][1]
+    assert partials[0]["message"] == "ORD-5353 wrapped up"
+    assert partials[-1] == final
+    assert final["orders"][0]["code"] == "ORD-5353"
+
+
+def test_stats_reports_storage(file_engine: Engine):
+    client = _make_client(file_engine, TestModel())
+    stats = client.get("/api/stats").json()
+    assert stats["storage"]["journal_mode"] == "wal"
+    assert "pool" in stats["storage"]
+    assert stats["tool_cache"] is None
+
+
+def test_fast_path_uses_tool_cache(client_without_llm: TestClient):
+    app: Any = client_without_llm.app
+    app.state.tool_cache = ToolCache(DataVersions())
+    for _ in range(2):
+        client_without_llm.post(
+            "/api/chat", json={"message": "status of ORD-5353"}
+        )
+    tool_cache = client_without_llm.get("/api/stats").json()["tool_cache"]
+    assert tool_cache["misses"] == 1
+    assert tool_cache["hits"] == 1
+
+
+def test_tool_status_lists_codes():
+    assert (
+        _tool_status_message(
+            "lookup_orders", '{"codes": ["ORD-1592", "ORD-5353"]}'
+        )
+        == "Looking up orders ORD-1592, ORD-5353..."
+    )
+
+
+class _RecordingLogger(AgentLogger):
+    def __init__(self) -> None:
+        super().__init__(Path("/tmp/test-logs"))
+        self.requests: list[dict[str, Any]] = []
+
+    def log_request(self, **kwargs: Any) -> None:
+        self.requests.append(kwargs)
+
+
+async def test_disconnect_cancels_run_and_releases_session(
+    db_file_url: str,
+):
+    answering = asyncio.Event()
+
+    async def hang_on_answer(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[DeltaToolCalls]:
+        if len(messages) == 1:
+            yield {
+                0: DeltaToolCall(
+                    name="lookup_order",
+                    json_args='{"order_code": "ORD-5353"}',
+                    tool_call_id="lookup",
+                )
+            }
+            return
+        answering.set()
+        await asyncio.Event().wait()  # the client leaves first
+        yield {}
+
+    engine = get_async_engine(db_file_url)
+    agent_logger = _RecordingLogger()
+    app = FastAPI()
+    app.state.session_factory = get_async_session_factory(engine)
+    app.state.agent = create_agent(
+        model=FunctionModel(stream_function=hang_on_answer)
+    )
+    app.state.agent_logger = agent_logger
+    request = Request({"type": "http", "app": app, "headers": []})
+    response = await chat(
+        ChatRequest(message="Is ORD-5353 done?"), request
+    )
+
+    async def consume() -> None:
+        async for _ in response.body_iterator:
+            pass
+
+    # Cancel the way sse-starlette does when the client disconnects
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(consume)
+        await answering.wait()
+        tg.cancel_scope.cancel()
+
+    [logged] = agent_logger.requests
+    assert logged["outcome"] == "cancelled"
+    assert logged["tools_called"] == ["lookup_order"]
+    assert logged["input_tokens"] > 0
+    assert engine.sync_engine.pool.checkedout() == 0
+    await engine.dispose()
+
+
+async def test_closing_stream_between_events_cancels_run(
+    db_file_url: str,
+):
+    answering = asyncio.Event()
+
+    async def hang_on_answer(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[DeltaToolCalls]:
+        if len(messages) == 1:
+            yield {
+                0: DeltaToolCall(
+                    name="lookup_order",
+                    json_args='{"order_code": "ORD-5353"}',
+                    tool_call_id="lookup",
+                )
+            }
+            return
+        answering.set()
+        await asyncio.Event().wait()
+        yield {}
+
+    engine = get_async_engine(db_file_url)
+    agent_logger = _RecordingLogger()
+    app = FastAPI()
+    app.state.session_factory = get_async_session_factory(engine)
+    app.state.agent = create_agent(
+        model=FunctionModel(stream_function=hang_on_answer)
+    )
+    app.state.agent_logger = agent_logger
+    app.state.coalescer = SingleFlight(DataVersions())
+    request = Request({"type": "http", "app": app, "headers": []})
+    response = await chat(
+        ChatRequest(message="Is ORD-5353 done?"), request
+    )
+    stream = response.body_iterator
+    assert isinstance(stream, AsyncGenerator)
+
+    # Close from outside while the stream is parked at a yield, the way
+    # the server finalizes a response whose client has gone
+    async for event in stream:
+        if "'tool_call'" in str(event):
+            break
+    await answering.wait()
+    await stream.aclose()
+
+    [logged] = agent_logger.requests
+    assert logged["outcome"] == "cancelled"
+    assert app.state.coalescer.stats()["in_flight"] == 0
+    assert engine.sync_engine.pool.checkedout() == 0
+    await engine.dispose()
+
+
+def test_full_queue_is_rejected_with_retry_after(
+    client_without_llm: TestClient,
+):
+    app: Any = client_without_llm.app
+    admission = AdmissionControl(
+        AdmissionLimits(max_in_flight=1, max_queue=0)
+    )
+    app.state.admission = admission
+    holder = admission.reserve()
+    resp = client_without_llm.post(
+        "/api/chat", json={"message": "status of ORD-5353"}
+    )
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    holder.release()
+    resp = client_without_llm.post(
+        "/api/chat", json={"message": "status of ORD-5353"}
+    )
+    assert _events(resp.text)[-1][0] == "complete"
+    stats = client_without_llm.get("/api/stats").json()["admission"]
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_queued_phase_reports_position(client_without_llm: TestClient):
+    app: Any = client_without_llm.app
+    admission = AdmissionControl(
+        AdmissionLimits(max_in_flight=1, max_queue=1, max_wait_s=0.1)
+    )
+    app.state.admission = admission
+    holder = admission.reserve()
+    resp = client_without_llm.post(
+        "/api/chat", json={"message": "status of ORD-5353"}
+    )
+    holder.release()
+    events = _events(resp.text)
+    assert events[0] == (
+        "queued",
+        {
+            "message": "Waiting for a free slot (#1 in line)...",
+            "position": 1,
+        },
+    )
+    # The slot never freed up within the queue-time budget
+    assert events[-1][0] == "error"
+    assert admission.stats()["timed_out"] == 1
+    assert admission.stats()["queued"] == 0
+
+
+async def test_identical_queries_share_one_run(db_file_url: str):
+    requests = 0
+    gate = asyncio.Event()
+
+    async def gated_answer(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[DeltaToolCalls]:
+        nonlocal requests
+        requests += 1
+        await gate.wait()
+        if len(messages) == 1:
+            yield {
+                0: DeltaToolCall(
+                    name="lookup_order",
+                    json_args='{"order_code": "ORD-5353"}',
+                    tool_call_id="lookup",
+                )
+            }
+            return
+        yield {
+            0: DeltaToolCall(
+                name="final_response",
+                json_args='{"message": "Done.", "order_codes": ["ORD-5353"]}',
+                tool_call_id="final",
+            )
+        }
+
+    engine = get_engine(db_file_url)
+    agent_logger = _RecordingLogger()
+    app = FastAPI()
+    app.state.session_factory = get_session_factory(engine)
+    app.state.agent = create_agent(
+        model=FunctionModel(stream_function=gated_answer)
+    )
+    app.state.agent_logger = agent_logger
+    app.state.coalescer = SingleFlight(DataVersions())
+    request = Request({"type": "http", "app": app, "headers": []})
+
+    bodies: list[list[str]] = [[], []]
+
+    async def consume(message: str, into: list[str]) -> None:
+        response = await chat(ChatRequest(message=message), request)
+        async for event in response.body_iterator:
+            into.append(str(event))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(consume, "Is ORD-5353 done?", bodies[0])
+        await anyio.wait_all_tasks_blocked()
+        tg.start_soon(consume, "  Is ORD-5353   done? ", bodies[1])
+        await anyio.wait_all_tasks_blocked()
+        gate.set()
+
+    # One tool call and one answer, whoever asked
+    assert requests == 2
+    assert bodies[0] == bodies[1]
+    assert "'complete'" in bodies[0][-1]
+    leader, follower = agent_logger.requests
+    assert leader["request_id"] != follower["request_id"]
+    assert follower["coalesced_with"] == leader["request_id"]
+    assert leader["outcome"] == follower["outcome"] == "completed"
+    assert leader["input_tokens"] > 0
+    assert follower["input_tokens"] == 0
+    assert {"queue", "model", "tools", "db"} <= leader["phases_ms"].keys()
+    # One order lookup, shared by both
+    assert leader["queries"] == follower["queries"] == 1
+    assert app.state.coalescer.stats() == {
+        "in_flight": 0,
+        "led": 1,
+        "joined": 1,
+    }
+    engine.dispose()
+
+
+def test_order_endpoint_serves_etag_and_304(client_without_llm: TestClient):
+    resp = client_without_llm.get("/api/orders/ORD-5353")
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "Completed"
+    etag = resp.headers["ETag"]
+    assert etag.startswith('"')
+
+    resp = client_without_llm.get(
+        "/api/orders/ORD-5353", headers={"If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.content == b""
+
+    other = client_without_llm.get("/api/orders/ORD-9910").headers["ETag"]
+    assert other != etag
+    assert client_without_llm.get("/api/orders/ORD-0000").status_code == 404
+
+
+def test_star_etag_matches_only_existing_resources(
+    client_without_llm: TestClient,
+):
+    for url, status in (
+        ("/api/orders/ORD-5353", 304),
+        ("/api/orders/ORD-0000", 404),
+        ("/api/orders/ORD-9910/sentiment", 304),
+        ("/api/orders/ORD-0000/sentiment", 404),
+        ("/api/companies/Chase Construction/orders", 304),
+    ):
+        resp = client_without_llm.get(url, headers={"If-None-Match": "*"})
+        assert resp.status_code == status, url
+
+
+def test_company_orders_endpoint_pages(client_without_llm: TestClient):
+    url = "/api/companies/Chase Construction/orders"
+    first = client_without_llm.get(url, params={"limit": 1}).json()
+    assert len(first["orders"]) == 1
+    assert first["total"] > 1
+    second = client_without_llm.get(
+        url, params={"limit": 1, "cursor": first["next_cursor"]}
+    ).json()
+    assert second["orders"][0]["code"] != first["orders"][0]["code"]
+
+    bad = client_without_llm.get(url, params={"start_from": "soon"})
+    assert bad.status_code == 400
+    assert "YYYY-MM-DD" in bad.json()["detail"]
+
+
+def test_sentiment_etag_follows_message_data(tmp_path: Path):
+    # Its own database and versions, since the test bumps them
+    engine = get_engine(f"sqlite:///{tmp_path / 'ops.db'}")
+    seed_database(engine, DATA_DIR)
+    versions = DataVersions()
+    versions.load(engine)
+    client = _make_client(engine, FunctionModel(_no_llm), versions)
+    resp = client.get("/api/orders/ORD-9910/sentiment")
+    assert resp.status_code == 200
+    assert resp.json()["order_code"] == "ORD-9910"
+    sentiment_etag = resp.headers["ETag"]
+    order_etag = client.get("/api/orders/ORD-9910").headers[
+        "ETag"
+    ]
+
+    with engine.begin() as conn:
+        versions.bump(conn, "messages")
+    versions.load(engine)
+    # Reloaded messages invalidate sentiment but not the order itself
+    resp = client.get(
+        "/api/orders/ORD-9910/sentiment",
+        headers={"If-None-Match": sentiment_etag},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != sentiment_etag
+    resp = client.get(
+        "/api/orders/ORD-9910", headers={"If-None-Match": order_etag}
+    )
+    assert resp.status_code == 304
+    engine.dispose()
+
+
+def test_metrics_break_down_a_chat(file_engine: Engine):
+    client = _make_client(file_engine, TestModel())
+    client.post(
+        "/api/chat",
+        json={"message": "How is everything going with ORD-9910?"},
+    )
+    resp = client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert "# TYPE ops_agent_chat_duration_seconds histogram" in body
+    assert 'ops_agent_chat_duration_seconds_count{outcome="completed"}' in body
+    assert "ops_agent_chat_first_event_seconds_count" in body
+    assert 'ops_agent_model_request_seconds_count{model="test"}' in body
+    assert 'ops_agent_tool_duration_seconds_count{tool="lookup_order"}' in body
+    assert (
+        "ops_agent_repository_query_seconds_count"
+        '{query="SqlOrderRepository.get_by_code"}'
+    ) in body
+    assert 'ops_agent_tokens_total{kind="input"}' in body
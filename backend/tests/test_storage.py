@@ -0,0 +1,58 @@
+"""Storage profile tests — PRAGMAs and pooling applied at connect time."""
+
+import threading
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from ops_agent.config import SqliteProfile
+from ops_agent.models.base import (
+    get_async_engine,
+    get_engine,
+    optimize_database,
+    read_storage_settings,
+)
+
+
+def test_file_engine_applies_profile(tmp_path: Path):
+    profile = SqliteProfile(mmap_size=1 << 20, cache_size=-2000, pool_size=3)
+    engine = get_engine(f"sqlite:///{tmp_path / 'ops.db'}", profile)
+    storage = read_storage_settings(engine)
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 3
+    assert storage["journal_mode"] == "wal"
+    assert storage["synchronous"] == 1  # NORMAL
+    assert storage["mmap_size"] == 1 << 20
+    assert storage["cache_size"] == -2000
+    assert storage["busy_timeout"] == 5000
+    optimize_database(engine, analyze=True)
+    engine.dispose()
+
+
+def test_memory_engine_is_shared_across_threads():
+    engine = get_engine("sqlite://")
+    assert isinstance(engine.pool, StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+
+    seen: list[int] = []
+
+    def count() -> None:
+        with engine.connect() as conn:
+            seen.append(conn.execute(text("SELECT count(*) FROM t")).scalar_one())
+
+    worker = threading.Thread(target=count)
+    worker.start()
+    worker.join()
+    assert seen == [0]
+
+
+async def test_async_engine_applies_profile(tmp_path: Path):
+    engine = get_async_engine(f"sqlite:///{tmp_path / 'ops.db'}")
+    async with engine.connect() as conn:
+        mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        timeout = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+    await engine.dispose()
+    assert mode == "wal"
+    assert timeout == 5000
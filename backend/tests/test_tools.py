@@ -1,7 +1,45 @@
 """Tool correctness tests — verify data access layer returns expected results."""
 
-from ops_agent.repositories.message_repo import SqlMessageRepository
-from ops_agent.repositories.order_repo import SqlOrderRepository
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from typing import Any
+
+import pytest
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ops_agent.agent.agent import create_agent
+from ops_agent.agent.deps import AgentDeps
+from ops_agent.agent.tools import (
+    ToolInputError,
+    fetch_company_orders,
+    fetch_order_info,
+    fetch_order_overview,
+    fetch_order_sentiment,
+    fetch_orders,
+    format_order_batch,
+    format_order_page,
+)
+from ops_agent.models.query_recorder import QueryStats
+from ops_agent.repositories.message_repo import (
+    AsyncSqlMessageRepository,
+    SqlMessageRepository,
+)
+from ops_agent.repositories.order_repo import (
+    AsyncSqlOrderRepository,
+    SqlOrderRepository,
+)
+from ops_agent.repositories.product_repo import (
+    AsyncSqlProductRepository,
+    SqlProductRepository,
+)
+from ops_agent.repositories.protocols import OrderFilter, OrderKey
+
+CHASE_USER_ID = "e0e2c88b-2d81-4999-92b9-6fb213680985"
+DUMPSTER_20 = "50d08ffd-afb9-416d-a63f-3890c6005a1c"
+TOILET = "7a39e872-212d-44f3-adf7-e431f2a93f5c"
 
 
 class TestLookupOrder:
@@ -30,6 +68,36 @@ class TestFindActiveOrders:
         orders = order_repo.find_active_by_company("Nonexistent Company")
         assert orders == []
 
+    def test_case_and_separator_insensitive(
+        self, order_repo: SqlOrderRepository
+    ):
+        for name in ("chase construction", "Chase_Construction", "chase const"):
+            codes = [o.code for o in order_repo.find_active_by_company(name)]
+            assert "ORD-1592" in codes
+
+    def test_contact_names_are_not_searched(
+        self, order_repo: SqlOrderRepository
+    ):
+        # Every customer's contact is "<City> Admin"
+        assert order_repo.find_active_by_company("Admin") == []
+        assert order_repo.find_active_by_company("Omaha Construction") == []
+
+    def test_wildcards_are_literal(self, order_repo: SqlOrderRepository):
+        assert order_repo.find_active_by_company("%") == []
+        assert order_repo.find_active_by_company("C_ase") == []
+
+    def test_index_follows_user_writes(self, db_session: Session):
+        db_session.execute(
+            text(
+                "UPDATE users SET username = 'Chase_Demolition' "
+                "WHERE username = 'Chase_Construction'"
+            )
+        )
+        repo = SqlOrderRepository(db_session)
+        assert repo.find_active_by_company("Chase Construction") == []
+        assert repo.find_active_by_company("Chase Demolition")
+        db_session.rollback()
+
 
 class TestGetOrderSentiment:
     def test_order_9910_sentiment(
@@ -53,3 +121,331 @@ class TestGetOrderSentiment:
         assert counts["positive"] == 2
         assert counts["neutral"] == 3
         assert counts["negative"] >= counts["positive"]
+
+    def test_tally_matches_messages(
+        self,
+        order_repo: SqlOrderRepository,
+        message_repo: SqlMessageRepository,
+    ):
+        order = order_repo.get_by_code("ORD-9910")
+        assert order is not None
+        messages = message_repo.get_by_conversation(order.conversation_id)
+        tally = message_repo.get_sentiment_tally(order.conversation_id, 10)
+        assert sum(tally.counts.values()) == len(messages)
+        negatives = [
+            m.message for m in messages if m.sentiment_label == "negative"
+        ]
+        assert tally.flagged == negatives[::-1]
+
+    def test_tally_bounds_flagged(
+        self,
+        order_repo: SqlOrderRepository,
+        message_repo: SqlMessageRepository,
+    ):
+        order = order_repo.get_by_code("ORD-9910")
+        assert order is not None
+        full = message_repo.get_sentiment_tally(order.conversation_id, 10)
+        tally = message_repo.get_sentiment_tally(order.conversation_id, 1)
+        assert tally.flagged == full.flagged[:1]
+        assert tally.counts == full.counts
+
+    def test_tally_skips_deleted(
+        self,
+        db_session: Session,
+        order_repo: SqlOrderRepository,
+        message_repo: SqlMessageRepository,
+    ):
+        order = order_repo.get_by_code("ORD-9910")
+        assert order is not None
+        before = message_repo.get_sentiment_tally(order.conversation_id, 10)
+        db_session.execute(
+            text(
+                "UPDATE messages SET is_deleted = 1 "
+                "WHERE conversation_id = :cid AND sentiment_label = 'negative'"
+            ),
+            {"cid": order.conversation_id},
+        )
+        after = message_repo.get_sentiment_tally(order.conversation_id, 10)
+        db_session.rollback()
+        assert "negative" in before.counts
+        assert "negative" not in after.counts
+        assert after.flagged == []
+
+
+class TestBatchedReads:
+    def test_get_many(self, product_repo: SqlProductRepository):
+        assert product_repo.get_many([]) == {}
+        dumpster = "2ff30fa7-a78d-4a29-a4d6-5413653ccb50"
+        products = product_repo.get_many([dumpster, dumpster, "missing"])
+        assert list(products) == [dumpster]
+        assert products[dumpster].name == "30 Yard Dumpster"
+
+    def test_get_many_by_code(self, order_repo: SqlOrderRepository):
+        assert order_repo.get_many_by_code([]) == {}
+        orders = order_repo.get_many_by_code(
+            ["ORD-1592", "ORD-5353", "ORD-1592", "ORD-0000"]
+        )
+        assert set(orders) == {"ORD-1592", "ORD-5353"}
+        assert orders["ORD-5353"].user.username == "Omaha_Builders"
+
+    async def test_batch_lookup_uses_one_query(
+        self,
+        deps: AgentDeps,
+        query_budget: Callable[[int], AbstractContextManager[QueryStats]],
+    ):
+        codes = ["ORD-9910", "ORD-0000", "ORD-1592", "ORD-5353"]
+        with query_budget(1):
+            batch = await fetch_orders(deps, codes)
+        assert [o.code for o in batch.orders] == [
+            "ORD-9910",
+            "ORD-1592",
+            "ORD-5353",
+        ]
+        assert batch.not_found == ["ORD-0000"]
+        assert batch.orders[2] == await fetch_order_info(deps, "ORD-5353")
+        assert "No order found with codes: ORD-0000" in format_order_batch(
+            batch
+        )
+        with pytest.raises(ToolInputError):
+            await fetch_orders(deps, [f"ORD-{i}" for i in range(51)])
+
+    def test_order_eager_loads_product(self, order_repo: SqlOrderRepository):
+        order = order_repo.get_by_code("ORD-1592")
+        assert order is not None
+        assert order.product is not None
+        assert order.product.name == "20 Yard Dumpster"
+
+    async def test_tools_use_one_query(
+        self,
+        deps: AgentDeps,
+        query_budget: Callable[[int], AbstractContextManager[QueryStats]],
+    ):
+        # The page itself plus its total count
+        with query_budget(2):
+            page = await fetch_company_orders(
+                deps, "Chase Construction", OrderFilter(status="Active")
+            )
+        assert page.orders
+        with query_budget(1):
+            info = await fetch_order_info(deps, "ORD-5353")
+        assert info.product_name == "30 Yard Dumpster"
+
+    async def test_overview_resolves_order_once(
+        self,
+        deps: AgentDeps,
+        query_budget: Callable[[int], AbstractContextManager[QueryStats]],
+    ):
+        # One order query plus the two-query sentiment tally
+        with query_budget(3):
+            overview = await fetch_order_overview(deps, "ORD-9910")
+        assert overview.order == await fetch_order_info(deps, "ORD-9910")
+        assert overview.sentiment == await fetch_order_sentiment(
+            deps, "ORD-9910"
+        )
+
+
+class TestCompanyOrderPages:
+    def _add_orders(self, session: Session) -> None:
+        # Seven more active Chase orders; two share a start date
+        for i, start in enumerate(
+            [
+                "2026-01-02",
+                "2026-01-05",
+                "2026-01-05",
+                "2026-01-09",
+                "2026-01-20",
+                "2026-02-01",
+                "2026-02-03",
+            ]
+        ):
+            session.execute(
+                text(
+                    "INSERT INTO orders (id, user_id, conversation_id, "
+                    "code, start_date, end_date, status, waste_type_id, "
+                    "access_details, is_deleted) VALUES (:id, :user_id, "
+                    "'conv', :code, :start, '2026-03-01', 'Active', "
+                    ":product, '', 0)"
+                ),
+                {
+                    "id": f"page-{i}",
+                    "user_id": CHASE_USER_ID,
+                    "code": f"ORD-90{i}",
+                    "start": start,
+                    "product": TOILET if i % 2 else DUMPSTER_20,
+                },
+            )
+
+    def test_pages_cover_all_in_order(self, db_session: Session):
+        self._add_orders(db_session)
+        repo = SqlOrderRepository(db_session)
+        active = OrderFilter(status="Active")
+        expected = sorted(
+            (o.start_date, o.code)
+            for o in repo.find_active_by_company("Chase Construction")
+        )
+        seen: list[OrderKey] = []
+        after: OrderKey | None = None
+        while True:
+            page = repo.find_by_company(
+                "Chase Construction", active, limit=3, after=after
+            )
+            assert page.total == len(expected)
+            assert len(page.orders) <= 3
+            seen += [(o.start_date, o.code) for o in page.orders]
+            if page.next_key is None:
+                break
+            after = page.next_key
+        db_session.rollback()
+        assert seen == expected
+
+    def test_filters(self, db_session: Session):
+        self._add_orders(db_session)
+        repo = SqlOrderRepository(db_session)
+        toilets = repo.find_by_company(
+            "Chase Construction",
+            OrderFilter(status="Active", product_name="toilet"),
+            limit=10,
+        )
+        window = repo.find_by_company(
+            "Chase Construction",
+            OrderFilter(
+                status="Active",
+                start_from="2026-01-05",
+                start_to="2026-01-20",
+            ),
+            limit=10,
+        )
+        assert toilets.total == 3
+        assert {o.waste_type_id for o in toilets.orders} == {TOILET}
+        assert [o.start_date for o in window.orders] == [
+            "2026-01-05",
+            "2026-01-05",
+            "2026-01-09",
+            "2026-01-12",
+            "2026-01-20",
+        ]
+        db_session.rollback()
+
+    def test_unknown_company_is_empty(self, order_repo: SqlOrderRepository):
+        page = order_repo.find_by_company("%", OrderFilter(), limit=5)
+        assert page.orders == [] and page.total == 0
+        assert page.next_key is None
+
+    async def test_tool_returns_cursor_hint(
+        self, db_session: Session, deps: AgentDeps
+    ):
+        self._add_orders(db_session)
+        active = OrderFilter(status="Active")
+        first = await fetch_company_orders(
+            deps, "Chase Construction", active, limit=5
+        )
+        assert first.next_cursor is not None
+        assert "Showing 5 of 8 orders" in format_order_page(first)
+        assert first.next_cursor in format_order_page(first)
+        rest = await fetch_company_orders(
+            deps,
+            "Chase Construction",
+            active,
+            cursor=first.next_cursor,
+            limit=5,
+        )
+        db_session.rollback()
+        assert len(rest.orders) == 3 and rest.next_cursor is None
+        codes = [o.code for o in first.orders + rest.orders]
+        assert len(set(codes)) == 8
+
+    async def test_bad_arguments(self, deps: AgentDeps):
+        with pytest.raises(ToolInputError, match="cursor"):
+            await fetch_company_orders(
+                deps, "Chase", OrderFilter(), cursor="not-a-cursor"
+            )
+        with pytest.raises(ToolInputError, match="start_from"):
+            await fetch_company_orders(
+                deps, "Chase", OrderFilter(start_from="last week")
+            )
+
+
+class TestAsyncRepositories:
+    async def test_get_by_code(self, async_order_repo: AsyncSqlOrderRepository):
+        order = await async_order_repo.get_by_code("ORD-5353")
+        assert order is not None
+        assert order.user.username == "Omaha_Builders"
+
+    async def test_find_active_by_company(
+        self, async_order_repo: AsyncSqlOrderRepository
+    ):
+        orders = await async_order_repo.find_active_by_company(
+            "Chase Construction"
+        )
+        assert "ORD-1592" in [o.code for o in orders]
+
+    async def test_get_many_by_code(
+        self, async_order_repo: AsyncSqlOrderRepository
+    ):
+        orders = await async_order_repo.get_many_by_code(
+            ["ORD-5353", "ORD-0000"]
+        )
+        assert list(orders) == ["ORD-5353"]
+        assert orders["ORD-5353"].product is not None
+
+    async def test_find_by_company(
+        self, async_order_repo: AsyncSqlOrderRepository
+    ):
+        page = await async_order_repo.find_by_company(
+            "Chase Construction", OrderFilter(status="Active"), limit=10
+        )
+        assert [o.code for o in page.orders] == ["ORD-1592"]
+        assert page.total == 1 and page.next_key is None
+
+    async def test_messages_and_product(
+        self,
+        async_order_repo: AsyncSqlOrderRepository,
+        async_message_repo: AsyncSqlMessageRepository,
+        async_product_repo: AsyncSqlProductRepository,
+    ):
+        order = await async_order_repo.get_by_code("ORD-9910")
+        assert order is not None
+        messages = await async_message_repo.get_by_conversation(
+            order.conversation_id
+        )
+        assert len(messages) == 8
+        assert order.product is not None
+        products = await async_product_repo.get_many([order.waste_type_id])
+        assert products[order.waste_type_id].name == order.product.name
+
+
+# Most SQL statements each tool may run against the seeded DB
+TOOL_QUERY_BUDGETS: list[tuple[str, dict[str, Any], int]] = [
+    ("lookup_order", {"order_code": "ORD-5353"}, 1),
+    ("lookup_orders", {"codes": ["ORD-5353", "ORD-9910", "ORD-0000"]}, 1),
+    ("find_active_orders", {"company_name": "Chase Construction"}, 2),
+    ("get_order_sentiment", {"order_code": "ORD-9910"}, 3),
+    ("get_order_overview", {"order_code": "ORD-9910"}, 3),
+]
+
+
+@pytest.mark.parametrize(
+    ("tool", "args", "max_queries"),
+    TOOL_QUERY_BUDGETS,
+    ids=[tool for tool, _, _ in TOOL_QUERY_BUDGETS],
+)
+async def test_tool_query_budget(
+    tool: str,
+    args: dict[str, Any],
+    max_queries: int,
+    deps: AgentDeps,
+    query_budget: Callable[[int], AbstractContextManager[QueryStats]],
+):
+    def call_tool(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> ModelResponse:
+        if len(messages) == 1:
+            return ModelResponse(parts=[ToolCallPart(tool, args)])
+        return ModelResponse(
+            parts=[ToolCallPart("final_response", {"message": "Done."})]
+        )
+
+    agent = create_agent(model=FunctionModel(call_tool))
+    with query_budget(max_queries) as queries:
+        await agent.run("budget check", deps=deps)
+    assert queries.count > 0
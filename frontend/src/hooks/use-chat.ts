@@ -15,6 +15,27 @@ export function useChat() {
 
   const nextId = useCallback(() => `msg-${++idCounterRef.current}`, []);
 
+  // Partial snapshots and the final response render the same way
+  const showResponse = useCallback((response: StreamUpdate) => {
+    const id = assistantIdRef.current;
+    const { message, orders, order_summaries, sentiment } = response;
+    setMessages((prev) =>
+      prev.map((m) =>
+        m.id === id
+          ? {
+              ...m,
+              content: message ?? m.content,
+              orders: orders ?? undefined,
+              order_summaries: order_summaries ?? undefined,
+              sentiment: sentiment ?? undefined,
+              isLoading: false,
+              statusText: undefined,
+            }
+          : m
+      )
+    );
+  }, []);
+
   const { state, start } = useSSEStream<
     ChatRequest,
     ChatResponse,
@@ -29,33 +50,21 @@ export function useChat() {
     errorEvent: "error",
     onUpdate: (_event, data) => {
       const id = assistantIdRef.current;
-      if (_event === "thinking" || _event === "tool_call") {
+      if (
+        _event === "queued" ||
+        _event === "thinking" ||
+        _event === "tool_call"
+      ) {
         setMessages((prev) =>
           prev.map((m) =>
             m.id === id ? { ...m, statusText: data.message } : m
           )
         );
+      } else if (_event === "partial") {
+        showResponse(data);
       }
     },
-    onComplete: (response) => {
-      const id = assistantIdRef.current;
-      const { message, orders, order_summaries, sentiment } = response;
-      setMessages((prev) =>
-        prev.map((m) =>
-          m.id === id
-            ? {
-                ...m,
-                content: message,
-                orders: orders ?? undefined,
-                order_summaries: order_summaries ?? undefined,
-                sentiment: sentiment ?? undefined,
-                isLoading: false,
-                statusText: undefined,
-              }
-            : m
-        )
-      );
-    },
+    onComplete: showResponse,
     onError: () => {
       const id = assistantIdRef.current;
       setMessages((prev) =>
@@ -51,11 +51,13 @@ export interface ChatMessage {
 
 export type StreamEvent =
   | "idle"
+  | "queued"
   | "thinking"
   | "tool_call"
+  | "partial"
   | "complete"
   | "error";
 
-export interface StreamUpdate {
-  message?: string;
-}
+// Status events carry only a message (queued events add the place in
+// line); partial events carry a snapshot of the response so far
+export type StreamUpdate = Partial<ChatResponse> & { position?: number };